@@ -0,0 +1,136 @@
+# Vendored from sasha_agent/audio_cache.py; do not edit this copy.
+# Change the original and run `python vendor_shared.py` in sasha_agent.
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.getenv('SASHA_TTS_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'sasha', 'tts'))
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+AUDIO_SUFFIX = '.audio'
+
+class AudioCache:
+    """
+    Content-addressed, on-disk cache of synthesized speech.
+
+    Entries are keyed by a hash of everything that affects the audio, so
+    every TTS call site pointing at the same directory shares results.
+    Files are evicted least-recently-used first once the byte budget is
+    exceeded; recency is mirrored into file mtimes so it survives restarts
+    and is visible to other processes using the directory.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def make_key(text: str, voice_name: str, pitch: float = 0.0,
+                 speaking_rate: float = 1.0, encoding: str = 'MP3') -> str:
+        payload = json.dumps([text, voice_name, float(pitch), float(speaking_rate), str(encoding)])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + AUDIO_SUFFIX)
+
+    def _load_index(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(AUDIO_SUFFIX):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, name[:-len(AUDIO_SUFFIX)], stat.st_size))
+
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+        self._evict()
+        logger.info(f"Loaded TTS audio cache with {len(self._entries)} entries ({self._total_bytes} bytes)")
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key in self._entries:
+                try:
+                    with open(self._path(key), 'rb') as f:
+                        audio = f.read()
+                    os.utime(self._path(key))
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return audio
+                except FileNotFoundError:
+                    # Evicted by another process sharing the directory
+                    self._total_bytes -= self._entries.pop(key)
+            self.misses += 1
+            return None
+
+    def put(self, key: str, audio: bytes):
+        if len(audio) > self.max_bytes:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(audio)
+        os.replace(tmp_path, self._path(key))
+
+        with self._lock:
+            self._total_bytes -= self._entries.pop(key, 0)
+            self._entries[key] = len(audio)
+            self._total_bytes += len(audio)
+            self._evict()
+
+    def get_or_synthesize(self, key: str, synthesize: Callable[[], bytes]) -> bytes:
+        audio = self.get(key)
+        if audio is None:
+            audio = synthesize()
+            self.put(key, audio)
+        return audio
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes
+            }
+
+_shared_caches: Dict[str, AudioCache] = {}
+_shared_lock = threading.Lock()
+
+def get_audio_cache(directory: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES) -> AudioCache:
+    """Return the process-wide cache for ``directory`` so all call sites share one index."""
+    directory = os.path.abspath(directory or DEFAULT_CACHE_DIR)
+    with _shared_lock:
+        if directory not in _shared_caches:
+            _shared_caches[directory] = AudioCache(directory, max_bytes)
+        return _shared_caches[directory]
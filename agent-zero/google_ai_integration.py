@@ -6,6 +6,7 @@ from google.cloud import texttospeech
 from google.cloud import vision
 import vertexai
 from vertexai.preview.generative_models import GenerativeModel, Image
+from audio_cache import AudioCache, get_audio_cache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -30,8 +31,9 @@ class GoogleAIIntegration:
             vertexai.init(project="mport-media-group", location="us-central1")
             self.vertex_model = GenerativeModel("gemini-pro-vision")
             
-            # Initialize Text-to-Speech
+            # Initialize Text-to-Speech, sharing synthesized audio with the Sasha service
             self.tts_client = texttospeech.TextToSpeechClient()
+            self.tts_cache = get_audio_cache()
             
             # Initialize Vision
             self.vision_client = vision.ImageAnnotatorClient()
@@ -98,23 +100,29 @@ class GoogleAIIntegration:
     def text_to_speech(self, text: str, voice_name: str = "en-US-Neural2-F") -> Dict[str, Any]:
         """Convert text to speech using Google TTS."""
         try:
-            synthesis_input = texttospeech.SynthesisInput(text=text)
-            voice = texttospeech.VoiceSelectionParams(
-                language_code="en-US",
-                name=voice_name
-            )
-            audio_config = texttospeech.AudioConfig(
-                audio_encoding=texttospeech.AudioEncoding.MP3
-            )
+            def synthesize() -> bytes:
+                synthesis_input = texttospeech.SynthesisInput(text=text)
+                voice = texttospeech.VoiceSelectionParams(
+                    language_code="en-US",
+                    name=voice_name
+                )
+                audio_config = texttospeech.AudioConfig(
+                    audio_encoding=texttospeech.AudioEncoding.MP3
+                )
+                
+                response = self.tts_client.synthesize_speech(
+                    input=synthesis_input,
+                    voice=voice,
+                    audio_config=audio_config
+                )
+                return response.audio_content
             
-            response = self.tts_client.synthesize_speech(
-                input=synthesis_input,
-                voice=voice,
-                audio_config=audio_config
-            )
+            # Default AudioConfig uses pitch 0.0 and speaking rate 1.0
+            key = AudioCache.make_key(text, voice_name, 0.0, 1.0, 'MP3')
+            audio_content = self.tts_cache.get_or_synthesize(key, synthesize)
             
             return {
-                'audio_content': response.audio_content,
+                'audio_content': audio_content,
                 'voice': voice_name,
                 'encoding': 'MP3'
             }
@@ -179,7 +187,8 @@ class GoogleAIIntegration:
                     'status': 'active' if vision_status else 'error'
                 },
                 'tts': {
-                    'status': 'active' if tts_status else 'error'
+                    'status': 'active' if tts_status else 'error',
+                    'cache': self.tts_cache.stats()
                 }
             }
         except Exception as e:
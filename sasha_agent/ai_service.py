@@ -1,32 +1,47 @@
 import os
 import yaml
+import time
+import asyncio
 import logging
-from typing import List, Dict, Optional
+from typing import Annotated, AsyncIterator, List, Dict, Optional, TypedDict
 import google.generativeai as genai
 from huggingface_client import HuggingFaceClient
+from voice_jobs import VoiceJobQueue, VoiceQueueFull
+from provider_pool import ProviderExecutor
+from session_store import create_session_store
+from prompt_history import HistoryBuilder, estimate_tokens
+from summarizer import RollingSummarizer
+from chat_sessions import ChatSessionCache
+from provider_router import create_provider_router
+from audio_cache import AudioCache, DEFAULT_MAX_BYTES, get_audio_cache
+from audio_store import AudioArtifact, AudioStore, DEFAULT_MAX_MEMORY_BYTES
+from lazy_resource import LazyResource
+from audit_log import AuditLog
+from memory_writer import MemoryWriter
+from metrics import ServiceMetrics
+from safety_policy import SafetyPolicy
+from response_cache import ResponseCache
+from graph_registry import get_graph, traced_node, tracer as graph_tracer
+from tts_stream import DEFAULT_MAX_CHARS, DEFAULT_MIN_CHARS, split_sentences, synthesize_stream
 from datetime import datetime
-from transformers import pipeline
 import json
 import uuid
-from langgraph.graph import StateGraph, END
-from google.cloud import texttospeech, firestore, storage
+from langgraph.graph import StateGraph, START, END
+from langchain_core.runnables import RunnableConfig
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class SystemAccess:
-    def __init__(self):
-        self.audit_log = []
+    def __init__(self, audit_log: AuditLog):
+        self.audit_log = audit_log
         self.permissions = {}
         self.pending_approvals = {}
         self.personality_memory = {}
     
     def log_access(self, action: str, details: Dict):
-        self.audit_log.append({
-            'timestamp': datetime.utcnow().isoformat(),
-            'action': action,
-            'details': details
-        })
+        # Never blocks; entries are persisted by the audit log's writer thread
+        self.audit_log.append(action, details)
     
     def request_approval(self, action: str, details: Dict) -> str:
         approval_id = str(uuid.uuid4())
@@ -49,80 +64,142 @@ class SystemAccess:
         })
 
 class TextToSpeech:
-    def __init__(self, config: Dict):
-        self.client = texttospeech.TextToSpeechClient()
+    def __init__(self, config: Dict, store: AudioStore):
+        self.config = config
+        self.store = store
+        self.client_resource = LazyResource('text_to_speech', self._create_client)
+        cache_config = config.get('cache', {})
+        self.cache = None
+        if cache_config.get('enabled', True):
+            self.cache = get_audio_cache(
+                cache_config.get('directory'),
+                cache_config.get('max_bytes', DEFAULT_MAX_BYTES)
+            )
+    
+    def _create_client(self):
+        # Imported here so the gRPC stack is only loaded when voice is first needed
+        from google.cloud import texttospeech
         self.voice = texttospeech.VoiceSelectionParams(
             language_code="en-US",
-            name=config['voice_id'],
+            name=self.config['voice_id'],
             ssml_gender=texttospeech.SsmlVoiceGender.FEMALE
         )
         self.audio_config = texttospeech.AudioConfig(
             audio_encoding=texttospeech.AudioEncoding.MP3,
-            pitch=config['pitch'],
-            speaking_rate=config['speaking_rate']
+            pitch=self.config['pitch'],
+            speaking_rate=self.config['speaking_rate']
         )
+        return texttospeech.TextToSpeechClient()
+    
+    @property
+    def client(self):
+        return self.client_resource.get()
     
-    def speak(self, text: str) -> str:
+    def _synthesize_uncached(self, text: str) -> bytes:
+        from google.cloud import texttospeech
+        client = self.client
         synthesis_input = texttospeech.SynthesisInput(text=text)
-        response = self.client.synthesize_speech(
+        response = client.synthesize_speech(
             input=synthesis_input,
             voice=self.voice,
             audio_config=self.audio_config
         )
-        
-        # Save to temporary file
-        filename = f"temp_{uuid.uuid4()}.mp3"
-        with open(filename, "wb") as out:
-            out.write(response.audio_content)
-        return filename
+        return response.audio_content
+    
+    def synthesize(self, text: str) -> bytes:
+        if self.cache is None:
+            return self._synthesize_uncached(text)
+        key = AudioCache.make_key(
+            text,
+            self.config['voice_id'],
+            self.config['pitch'],
+            self.config['speaking_rate'],
+            'MP3'
+        )
+        return self.cache.get_or_synthesize(key, lambda: self._synthesize_uncached(text))
+    
+    def speak(self, text: str) -> AudioArtifact:
+        # Held by the audio store and served from its URL until it expires
+        return self.store.put(self.synthesize(text))
+
+def _merge_context(current: Optional[Dict], update: Optional[Dict]) -> Dict:
+    # Parallel branches each add their own keys to the shared context
+    return {**(current or {}), **(update or {})}
+
+class DecisionState(TypedDict, total=False):
+    input: str
+    context: Annotated[Dict, _merge_context]
+    decision: str
+    escalated: bool
+    safety: Dict
+
+# Context gathered in parallel branches, each from an async callable passed in
+# config["configurable"]["context_sources"] so the compiled graph stays shareable.
+# The turn's prompt is built from the merged context the graph returns.
+CONTEXT_SOURCES = ("preferences", "permissions", "memory")
+
+def _context_loader(source: str):
+    async def load(state: DecisionState, config: RunnableConfig) -> Dict:
+        loader = config.get("configurable", {}).get("context_sources", {}).get(source)
+        if loader is None:
+            return {}
+        return {"context": {source: await loader(state)}}
+    return load
+
+async def _decide_action(state: DecisionState, config: RunnableConfig) -> Dict:
+    # Analyze the action for safety with the caller's policy; without one, escalation is off
+    policy = config.get("configurable", {}).get("safety_policy")
+    if policy is None:
+        return {"decision": "safe"}
+    classification = policy.classify(state.get("input", ""))
+    return {"decision": classification.label, "safety": classification.to_dict()}
+
+async def _execute_action(state: DecisionState) -> Dict:
+    # Execute the safe action
+    return {"escalated": False}
+
+async def _escalate(state: DecisionState) -> Dict:
+    # Handle unsafe actions by escalating; which rules matched is already in state["safety"]
+    return {"escalated": True}
+
+def _build_decision_graph():
+    graph = StateGraph(DecisionState)
+    
+    # Context sources and the safety check only read the input, so they all run in the first step
+    for source in CONTEXT_SOURCES:
+        node = f"load_{source}"
+        graph.add_node(node, traced_node(node, _context_loader(source)))
+        graph.add_edge(START, node)
+        graph.add_edge(node, END)
+    graph.add_node("decide_action", traced_node("decide_action", _decide_action))
+    graph.add_edge(START, "decide_action")
+    
+    # The chosen action runs once every branch has finished, with the full context
+    graph.add_node("execute_action", traced_node("execute_action", _execute_action))
+    graph.add_node("escalate", traced_node("escalate", _escalate))
+    graph.add_conditional_edges("decide_action", lambda state: state["decision"], {
+        "safe": "execute_action",
+        "unsafe": "escalate"
+    })
+    graph.add_edge("execute_action", END)
+    graph.add_edge("escalate", END)
+    
+    return graph.compile()
 
 class DecisionGraph:
     def __init__(self, config: Dict):
-        self.graph = self._build_graph()
         self.threshold = config['decision_threshold']
         self.escalation_enabled = config['escalation_enabled']
+        # Compiled once per graph; classifying is a single pass over the input
+        self.policy = SafetyPolicy.from_config(config.get('safety'))
+        # Compiled once per process and shared by every instance; the policy is passed per call
+        self.graph = get_graph('decision_graph', _build_decision_graph)
     
-    def _build_graph(self):
-        graph = StateGraph()
-        
-        # Add nodes
-        graph.add_node("retrieve_context", self._retrieve_context)
-        graph.add_node("decide_action", self._decide_action)
-        graph.add_node("execute_action", self._execute_action)
-        graph.add_node("escalate", self._escalate)
-        
-        # Set entry point
-        graph.set_entry_point("retrieve_context")
-        
-        # Add edges
-        graph.add_edge("retrieve_context", "decide_action")
-        graph.add_conditional_edges("decide_action", {
-            "safe": "execute_action",
-            "unsafe": "escalate"
-        })
-        graph.add_edge("execute_action", END)
-        graph.add_edge("escalate", END)
-        
-        return graph.compile()
-    
-    def _retrieve_context(self, state: Dict) -> Dict:
-        # Add context from memory, preferences, etc.
-        return state
-    
-    def _decide_action(self, state: Dict) -> str:
-        # Analyze the action for safety
-        if any(word in state.get("input", "").lower() for word in ["delete", "remove", "drop", "destroy"]):
-            return "unsafe"
-        return "safe"
-    
-    def _execute_action(self, state: Dict) -> Dict:
-        # Execute the safe action
-        return state
-    
-    def _escalate(self, state: Dict) -> Dict:
-        # Handle unsafe actions by escalating
-        state["escalated"] = True
-        return state
+    async def ainvoke(self, state: DecisionState, context_sources: Optional[Dict] = None) -> Dict:
+        return await self.graph.ainvoke(state, config={"configurable": {
+            "context_sources": context_sources or {},
+            "safety_policy": self.policy if self.escalation_enabled else None
+        }})
 
 class ConversationMemory:
     def __init__(self, max_history: int = 10):
@@ -150,13 +227,171 @@ class ConversationMemory:
 class AIService:
     def __init__(self, config_path: str):
         self.config = self._load_config(config_path)
-        self.conversations: Dict[str, List[Dict]] = {}
-        self.user_preferences: Dict[str, Dict] = {}
-        self.system_access = SystemAccess()
-        self.tts = TextToSpeech(self.config['integrations']['text_to_speech'])
-        self.decision_graph = DecisionGraph(self.config['integrations']['langgraph'])
+        self.metrics = ServiceMetrics()
+        self.sessions = create_session_store(
+            self.config['conversation'],
+            base_dir=os.path.dirname(os.path.abspath(config_path))
+        )
+        self.history = HistoryBuilder(
+            max_messages=self.config['conversation']['max_history'],
+            max_windows=self.config['conversation'].get('store', {}).get('max_sessions', 10000)
+        )
+        summary_config = self.config['conversation'].get('summary', {})
+        self.summarizer = None
+        if summary_config.get('enabled', False):
+            self.summarizer = RollingSummarizer(
+                self.sessions,
+                self._summarize,
+                max_words=summary_config.get('max_words', 200),
+                run=lambda fn, *args: self.providers.run('sessions', fn, *args)
+            )
+        audit_config = self.config.get('audit_log', {})
+        audit_dir = audit_config.get('directory', 'audit_logs')
+        if not os.path.isabs(audit_dir):
+            audit_dir = os.path.join(os.path.dirname(os.path.abspath(config_path)), audit_dir)
+        self.system_access = SystemAccess(AuditLog(
+            audit_dir,
+            buffer_size=audit_config.get('buffer_size', 1000),
+            segment_bytes=audit_config.get('segment_bytes', 8 * 1024 * 1024),
+            flush_interval=audit_config.get('flush_interval_seconds', 1.0),
+            max_queue=audit_config.get('max_queue', 10000),
+            retain_segments=audit_config.get('retain_segments', 200)
+        ))
+        concurrency = self.config.get('concurrency', {})
+        self.providers = ProviderExecutor(
+            max_workers=concurrency.get('executor_workers', 16),
+            limits=concurrency.get('limits', {})
+        )
+        tts_config = self.config['integrations']['text_to_speech']
+        store_config = tts_config.get('store', {})
+        spill_dir = store_config.get('spill_directory')
+        if spill_dir and not os.path.isabs(spill_dir):
+            spill_dir = os.path.join(os.path.dirname(os.path.abspath(config_path)), spill_dir)
+        self.audio_store = AudioStore(
+            max_memory_bytes=store_config.get('max_memory_bytes', DEFAULT_MAX_MEMORY_BYTES),
+            spill_directory=spill_dir,
+            ttl_seconds=store_config.get('ttl_seconds', 300)
+        )
+        self.tts = TextToSpeech(tts_config, self.audio_store)
+        self.voice_queue = VoiceJobQueue(
+            self._speak,
+            workers=tts_config.get('workers', 2),
+            max_pending=tts_config.get('max_pending', 100),
+            max_jobs=tts_config.get('max_jobs', 500),
+            executor=self.providers
+        )
+        self.router = create_provider_router(self.config.get('routing', {}))
+        cache_config = self.config.get('response_cache', {})
+        self.response_cache = None
+        if cache_config.get('enabled', False):
+            self.response_cache = ResponseCache(
+                max_entries=cache_config.get('max_entries', 1000),
+                ttl_seconds=cache_config.get('ttl_seconds', 600),
+                history_tail=cache_config.get('history_tail', 4)
+            )
+        semantic_config = cache_config.get('semantic', {})
+        self.semantic_cache = None
+        if self.response_cache is not None and semantic_config.get('enabled', False):
+            # numpy and sentence-transformers are only needed when the semantic cache is on
+            from semantic_cache import SemanticCache, DEFAULT_EMBEDDING_MODEL
+            model_name = semantic_config.get('model', DEFAULT_EMBEDDING_MODEL)
+            self._embedder = LazyResource('embeddings', lambda: self._load_embedder(model_name))
+            self.semantic_cache = SemanticCache(
+                dim=semantic_config.get('dimensions', 384),
+                max_entries=semantic_config.get('max_entries', 5000),
+                threshold=semantic_config.get('threshold', 0.92),
+                ttl_seconds=semantic_config.get('ttl_seconds', cache_config.get('ttl_seconds', 600))
+            )
+        self._decision_graph = LazyResource(
+            'decision_graph',
+            lambda: DecisionGraph(self.config['integrations']['langgraph'])
+        )
+        self._primary_checked = False
+        self._primary_recheck: Optional[asyncio.Task] = None
         self._initialize_models()
         self._initialize_storage()
+        self._register_metrics()
+
+    def _register_metrics(self):
+        def observe_graph_span(span: Dict):
+            self.metrics.graph_node_seconds.observe(
+                span['duration_ms'] / 1000, graph=span['graph'] or 'untraced', node=span['name']
+            )
+        self._graph_span_listener = observe_graph_span
+        graph_tracer.add_listener(observe_graph_span)
+
+        def cache_lookups():
+            samples = {}
+            if self.tts.cache is not None:
+                stats = self.tts.cache.stats()
+                samples[('audio', 'hit')] = stats['hits']
+                samples[('audio', 'miss')] = stats['misses']
+            if self.response_cache is not None:
+                stats = self.response_cache.stats()
+                samples[('response', 'hit')] = stats['hits']
+                samples[('response', 'miss')] = stats['misses']
+                samples[('response', 'bypass')] = stats['bypasses']
+            if self.semantic_cache is not None:
+                stats = self.semantic_cache.stats()
+                samples[('semantic', 'hit')] = stats['hits']
+                samples[('semantic', 'miss')] = stats['misses']
+            # A reused Gemini chat is a hit; a rebuilt one re-sends the whole window
+            prompt_stats = self.chats.stats.snapshot()
+            samples[('chat', 'hit')] = prompt_stats['turns'] - prompt_stats['rebuilds']
+            samples[('chat', 'miss')] = prompt_stats['rebuilds']
+            return samples
+
+        self.metrics.callback(
+            'sasha_cache_lookups_total', 'Cache lookups by cache and result.', 'counter',
+            cache_lookups, ['cache', 'result']
+        )
+        # Divide by the chat lookups above for bytes per turn, before (legacy) and after chat reuse
+        self.metrics.callback(
+            'sasha_prompt_bytes_total',
+            'Prompt bytes: the legacy single-string prompt, what was rendered for the turn, and the full request.',
+            'counter',
+            lambda: {(prompt,): self.chats.stats.snapshot()[f'{key}_bytes']
+                     for prompt, key in (('legacy', 'legacy'), ('rendered', 'new'), ('request', 'request'))},
+            ['prompt']
+        )
+        if self.memory_writer is not None:
+            self.metrics.callback(
+                'sasha_memory_writes_total', 'Conversation turns by Firestore write-behind outcome.', 'counter',
+                lambda: {(result,): self.memory_writer.stats()[result] for result in ('committed', 'failed', 'dropped')},
+                ['result']
+            )
+        self.metrics.callback(
+            'sasha_active_sessions', 'Conversations currently held by the session store.', 'gauge',
+            lambda: {(): self.sessions.session_count()}
+        )
+        self.metrics.callback(
+            'sasha_provider_calls_in_flight', 'Provider calls holding a concurrency slot.', 'gauge',
+            lambda: {(provider,): count for provider, count in self.providers.in_flight.items()},
+            ['provider']
+        )
+        self.metrics.callback(
+            'sasha_circuit_open', 'Whether a provider circuit is open (1) or half open (0.5).', 'gauge',
+            lambda: {
+                (name,): {'closed': 0, 'half_open': 0.5, 'open': 1}[breaker.state]
+                for name, breaker in self.router.breakers.items()
+            },
+            ['provider']
+        )
+
+    def _synthesize_voice(self, text: str) -> bytes:
+        with self.metrics.stage('tts'):
+            return self.tts.synthesize(text)
+
+    def _speak(self, text: str) -> AudioArtifact:
+        with self.metrics.stage('tts'):
+            return self.tts.speak(text)
+
+    def _record_reply(self, provider: str, prompt_tokens: int, response_text: str):
+        self.metrics.responses.inc(provider=provider)
+        if provider != self.router.order[0]:
+            self.metrics.fallbacks.inc()
+        self.metrics.tokens.inc(prompt_tokens, provider=provider, kind='prompt')
+        self.metrics.tokens.inc(estimate_tokens(response_text), provider=provider, kind='completion')
 
     def _load_config(self, config_path: str) -> dict:
         try:
@@ -179,75 +414,231 @@ class AIService:
                     'top_k': self.config['gemini']['top_k'],
                 }
             )
-            
-            # Initialize Hugging Face fallback
-            self.hf_model = pipeline(
-                'text-generation',
-                model=self.config['huggingface']['model'],
-                max_length=self.config['huggingface']['max_length'],
-                temperature=self.config['huggingface']['temperature']
+            self.chats = ChatSessionCache(
+                self.gemini_model.start_chat,
+                max_sessions=self.config['conversation'].get('store', {}).get('max_sessions', 10000),
+                rebuild_slack=self.config['conversation'].get('chat_rebuild_slack', 10)
             )
             
+            # The Hugging Face fallback is loaded on first use or by warm_up, unless it is
+            # served by the Inference API
+            self._hf_model = LazyResource('huggingface', self._load_hf_model)
+            hf_config = self.config['huggingface']
+            self.hf_client = None
+            if hf_config.get('backend', 'local') == 'inference_api':
+                api_config = hf_config.get('inference_api', {})
+                self.hf_client = HuggingFaceClient(
+                    os.getenv('HUGGINGFACE_API_KEY'),
+                    timeout=api_config.get('timeout_seconds', 30.0),
+                    max_connections=api_config.get('max_connections', 20),
+                    batch_window=api_config.get('batch_window_seconds', 0.01),
+                    max_batch_size=api_config.get('max_batch_size', 8),
+                    max_retries=api_config.get('max_retries', 3),
+                    max_wait=api_config.get('max_wait_seconds', 60.0)
+                )
+            
             logger.info("Successfully initialized AI models")
         except Exception as e:
             logger.error(f"Failed to initialize AI models: {str(e)}")
             raise
 
+    def _load_hf_model(self):
+        # transformers takes seconds to import, so it is kept off the startup path
+        from transformers import pipeline
+        return pipeline(
+            'text-generation',
+            model=self.config['huggingface']['model'],
+            max_length=self.config['huggingface']['max_length'],
+            temperature=self.config['huggingface']['temperature']
+        )
+
+    def _load_embedder(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name)
+
     def _initialize_storage(self):
-        try:
-            if self.config['integrations']['firestore']['enabled']:
-                self.firestore_client = firestore.Client()
-                self.memory_collection = self.firestore_client.collection(
-                    self.config['integrations']['firestore']['collection']
-                )
-            
-            if self.config['integrations']['storage']['enabled']:
-                self.storage_client = storage.Client()
-                self.assets_bucket = self.storage_client.bucket(
-                    self.config['integrations']['storage']['bucket']
-                )
-            
-            logger.info("Successfully initialized storage clients")
-        except Exception as e:
-            logger.error(f"Failed to initialize storage: {str(e)}")
-            raise
+        # Clients are created on first use; see memory_collection and assets_bucket
+        self._memory_collection = LazyResource('firestore', self._create_memory_collection)
+        self._assets_bucket = LazyResource('storage', self._create_assets_bucket)
+        firestore_config = self.config['integrations']['firestore']
+        write_config = firestore_config.get('write_behind', {})
+        self.memory_writer = None
+        if firestore_config['enabled'] and write_config.get('enabled', False):
+            self.memory_writer = MemoryWriter(
+                self._connect_memory,
+                batch_size=write_config.get('batch_size', 100),
+                flush_interval=write_config.get('flush_interval_ms', 500) / 1000,
+                max_queue=write_config.get('max_queue', 10000),
+                put_timeout=write_config.get('put_timeout_ms', 2000) / 1000
+            )
 
-    def _get_conversation_history(self, session_id: str) -> str:
-        if session_id not in self.conversations:
-            return ""
-        
-        history = self.conversations[session_id]
-        max_history = self.config['conversation']['max_history']
-        recent_history = history[-max_history:]
+    def _create_memory_collection(self):
+        from google.cloud import firestore
+        self.firestore_client = firestore.Client()
+        return self.firestore_client.collection(
+            self.config['integrations']['firestore']['collection']
+        )
+
+    def _connect_memory(self):
+        # Called from the memory writer's thread on its first commit
+        collection = self._memory_collection.get()
+        return self.firestore_client, collection
+
+    def _create_assets_bucket(self):
+        from google.cloud import storage
+        self.storage_client = storage.Client()
+        return self.storage_client.bucket(
+            self.config['integrations']['storage']['bucket']
+        )
+
+    @property
+    def decision_graph(self) -> 'DecisionGraph':
+        return self._decision_graph.get()
+
+    @property
+    def hf_model(self):
+        return self._hf_model.get()
+
+    @property
+    def memory_collection(self):
+        if not self.config['integrations']['firestore']['enabled']:
+            return None
+        return self._memory_collection.get()
+
+    @property
+    def assets_bucket(self):
+        if not self.config['integrations']['storage']['enabled']:
+            return None
+        return self._assets_bucket.get()
+
+    async def _check_primary_model(self) -> bool:
+        # One cheap round trip opens the Gemini connection and proves the key and model work
+        attempts = self.config.get('startup', {}).get('primary_check_attempts', 3)
+        for attempt in range(1, attempts + 1):
+            try:
+                await self.providers.run('gemini', self.gemini_model.count_tokens, "ping")
+                return True
+            except Exception as e:
+                logger.warning(f"Gemini readiness check {attempt}/{attempts} failed: {str(e)}")
+                if attempt < attempts:
+                    await asyncio.sleep(2 ** attempt)
+        return False
+
+    async def _recheck_primary_model(self):
+        interval = self.config.get('startup', {}).get('primary_recheck_seconds', 30)
+        while not self._primary_checked:
+            await asyncio.sleep(interval)
+            self._primary_checked = await self._check_primary_model()
+        logger.info("Gemini is answering; Sasha is ready")
+
+    async def warm_up(self):
+        """
+        Initialize backends after the server has started listening.
+
+        The service reports ready once the decision graph and the primary
+        model are usable; the remaining clients are warmed afterwards so the
+        first requests that need them do not pay their start-up cost. If
+        Gemini does not answer, the check is retried in the background and
+        the service stays unready (serving with the fallback) until it does.
+        """
+        startup_config = self.config.get('startup', {})
+        started = time.perf_counter()
+        try:
+            await self.providers.run('warmup', self._decision_graph.get)
+        except Exception:
+            logger.error("Decision graph failed to initialize; it will be retried on first use")
+        self._primary_checked = await self._check_primary_model()
+        if self._primary_checked:
+            logger.info(f"Sasha is ready after {time.perf_counter() - started:.2f}s of warm-up")
+        else:
+            logger.warning("Gemini is not answering; serving with the fallback model until it recovers")
+            self._primary_recheck = asyncio.create_task(self._recheck_primary_model())
         
-        return "\n".join([
-            f"{'User' if msg['role'] == 'user' else 'Sasha'}: {msg['content']}"
-            for msg in recent_history
-        ])
+        deferred = [self.tts.client_resource]
+        if self.config['integrations']['firestore']['enabled']:
+            deferred.append(self._memory_collection)
+        if self.config['integrations']['storage']['enabled']:
+            deferred.append(self._assets_bucket)
+        if startup_config.get('warm_fallback', True) and self.hf_client is None:
+            deferred.append(self._hf_model)
+        if self.semantic_cache is not None:
+            deferred.append(self._embedder)
+        for resource in deferred:
+            try:
+                await self.providers.run('warmup', resource.get)
+            except Exception:
+                # Logged by LazyResource; the resource is retried on first use
+                pass
+
+    def is_ready(self) -> bool:
+        return self._primary_checked and self._decision_graph.loaded
+
+    def get_startup_status(self) -> Dict:
+        return {
+            'ready': self.is_ready(),
+            'primary_checked': self._primary_checked,
+            'backends': {
+                resource.name: resource.status()
+                for resource in (self._decision_graph, self._hf_model, self.tts.client_resource,
+                                 self._memory_collection, self._assets_bucket)
+            }
+        }
+
+    def _history_token_budget(self, reserved_tokens: int) -> int:
+        # Whatever the context window has left after the prompt and the reply
+        context_window = self.config['conversation'].get('context_window', 8192)
+        reply_tokens = self.config['gemini']['max_tokens']
+        return max(0, context_window - reply_tokens - reserved_tokens)
+
+    def _get_conversation_history(self, session_id: str, messages: List[Dict], reserved_tokens: int = 0) -> str:
+        history, evicted = self.history.build(
+            session_id,
+            messages,
+            self._history_token_budget(reserved_tokens)
+        )
+        if self.summarizer is not None:
+            # Turns leaving the window are folded into the session summary in the background
+            self.summarizer.submit(session_id, evicted)
+        return history
+
+    async def _summarize(self, prompt: str) -> str:
+        async with self.providers.limit('gemini'):
+            response = await self.gemini_model.generate_content_async(prompt)
+        return response.text
 
-    def _get_user_preferences(self, session_id: str) -> Dict:
-        return self.user_preferences.get(session_id, {})
+    def _load_memory(self, session_id: str) -> Dict:
+        return {
+            'messages': self.sessions.get_messages(session_id),
+            'summary': self.sessions.get_summary(session_id).get('text')
+        }
 
-    def _update_user_preferences(self, session_id: str, message: str):
-        if session_id not in self.user_preferences:
-            self.user_preferences[session_id] = {}
+    def _update_user_preferences(self, session_id: str, message: str) -> Dict:
+        current = self.sessions.get_preferences(session_id)
+        prefs = dict(current)
         
         # Analyze message for preferences
         if "casual" in message.lower():
-            self.user_preferences[session_id]['tone'] = 'casual'
+            prefs['tone'] = 'casual'
         elif "formal" in message.lower():
-            self.user_preferences[session_id]['tone'] = 'formal'
+            prefs['tone'] = 'formal'
         
         if "detailed" in message.lower() or "comprehensive" in message.lower():
-            self.user_preferences[session_id]['detail_level'] = 'comprehensive'
+            prefs['detail_level'] = 'comprehensive'
         elif "brief" in message.lower() or "concise" in message.lower():
-            self.user_preferences[session_id]['detail_level'] = 'concise'
+            prefs['detail_level'] = 'concise'
+        
+        if prefs != current:
+            self.sessions.set_preferences(session_id, prefs)
+        return prefs
 
-    def _build_system_prompt(self, mode: str, session_id: str) -> str:
+    def _build_system_prompt(self, mode: str, prefs: Dict, permissions: Dict, summary: Optional[str] = None) -> str:
         base_prompt = self.config['system_prompts'].get(mode, self.config['system_prompts']['default'])
         
+        # Add the running summary of turns that no longer fit in the history
+        if summary:
+            base_prompt += f"\n\nSummary of the earlier conversation:\n{summary}"
+        
         # Add user preferences if available
-        prefs = self._get_user_preferences(session_id)
         if prefs:
             preference_text = "Based on your preferences:\n"
             if 'tone' in prefs:
@@ -257,9 +648,9 @@ class AIService:
             base_prompt += f"\n\n{preference_text}"
         
         # Add system access context
-        if self.system_access.permissions:
+        if permissions:
             access_text = "\nCurrent System Access:\n"
-            for resource, details in self.system_access.permissions.items():
+            for resource, details in permissions.items():
                 access_text += f"- {resource}: {details['level']}\n"
             base_prompt += f"\n{access_text}"
         
@@ -278,97 +669,511 @@ class AIService:
         
         return False, f"No permission for {action} on {resource}"
 
-    async def generate_response(self, message: str, session_id: str, mode: str = "default") -> Dict:
+    def _build_prompt(self, system_prompt: str, history: str, message: str) -> str:
+        return f"{system_prompt}\n\nConversation History:\n{history}\n\nUser: {message}\nSasha:"
+
+    async def _prepare_turn(self, message: str, session_id: str, mode: str) -> Dict:
+        # The turn's Firestore write gets its queue slot now, so _finish_turn always has room
+        memory_slot = False
+        if self.memory_writer is not None:
+            memory_slot = await self.memory_writer.reserve()
+            if not memory_slot:
+                # Firestore is far behind; the turn goes ahead but will not be persisted there
+                logger.warning("Memory write queue stayed full; this turn may not be persisted")
         try:
+            turn = await self._build_turn(message, session_id, mode)
+        except BaseException:
+            if memory_slot:
+                self.memory_writer.release()
+            raise
+        turn["memory_slot"] = memory_slot
+        return turn
+
+    def _release_memory_slot(self, turn: Optional[Dict]):
+        # A turn that ends without _finish_turn gives back the slot it reserved
+        if turn is not None and turn.pop("memory_slot", False):
+            self.memory_writer.release()
+
+    async def _build_turn(self, message: str, session_id: str, mode: str) -> Dict:
+        # The decision graph loads the turn's context in parallel branches. The session
+        # store may be SQLite, where a write can wait on another worker's lock, so its
+        # reads and writes go through the sessions pool rather than the event loop.
+        async def load_preferences(state: Dict) -> Dict:
             # Update user preferences based on the message
-            self._update_user_preferences(session_id, message)
-            
-            # Get conversation history
-            history = self._get_conversation_history(session_id)
-            
+            return await self.providers.run('sessions', self._update_user_preferences, session_id, message)
+
+        async def load_permissions(state: Dict) -> Dict:
+            return dict(self.system_access.permissions)
+
+        async def load_memory(state: Dict) -> Dict:
+            return await self.providers.run('sessions', self._load_memory, session_id)
+
+        with self.metrics.stage('decision_graph'):
+            # Compiling happens on first use unless warm-up already did it; keep that off the loop
+            decision_graph = (self.decision_graph if self._decision_graph.loaded
+                              else await self.providers.run('langgraph', self._decision_graph.get))
+            async with self.providers.limit('langgraph'):
+                decision_result = await decision_graph.ainvoke(
+                    {"input": message},
+                    context_sources={
+                        "preferences": load_preferences,
+                        "permissions": load_permissions,
+                        "memory": load_memory
+                    }
+                )
+        context = decision_result["context"]
+        
+        with self.metrics.stage('prompt_build'):
             # Build system prompt with preferences and access context
-            system_prompt = self._build_system_prompt(mode, session_id)
-            
-            # Store the message in conversation history
-            if session_id not in self.conversations:
-                self.conversations[session_id] = []
-            self.conversations[session_id].append({
-                'role': 'user',
-                'content': message
-            })
-            
-            # Log the interaction
-            self.system_access.log_access('user_message', {
-                'session_id': session_id,
-                'message_length': len(message)
-            })
-            
-            # Process through decision graph
-            decision_result = self.decision_graph.graph.invoke({
-                "input": message,
-                "context": {
-                    "history": history,
-                    "preferences": self._get_user_preferences(session_id),
-                    "permissions": self.system_access.permissions
-                }
-            })
+            system_prompt = self._build_system_prompt(
+                mode, context["preferences"], context["permissions"], context["memory"]["summary"]
+            )
             
-            # Generate response using Gemini
-            try:
-                chat = self.gemini_model.start_chat(history=[])
-                response = chat.send_message(
-                    f"{system_prompt}\n\nConversation History:\n{history}\n\nUser: {message}\nSasha:"
+            # Get conversation history, trimmed to what the context window has room for
+            history = self._get_conversation_history(
+                session_id,
+                context["memory"]["messages"],
+                reserved_tokens=estimate_tokens(system_prompt) + estimate_tokens(message)
+            )
+            window = self.history.window_messages(session_id)
+            prompt_key = self._build_system_prompt(mode, context["preferences"], context["permissions"])
+        
+        # Store the message in conversation history
+        await self.providers.run('sessions', self.sessions.append_message, session_id, 'user', message)
+        
+        # Log the interaction
+        self.system_access.log_access('user_message', {
+            'session_id': session_id,
+            'message_length': len(message)
+        })
+        
+        prompt = self._build_prompt(system_prompt, history, message)
+        return {
+            "prompt": prompt,
+            "system_prompt": system_prompt,
+            # The summary changes as turns are trimmed, but a reused chat still holds
+            # those turns verbatim, so only the rest of the prompt invalidates it
+            "prompt_key": prompt_key,
+            "window": window,
+            "prompt_tokens": estimate_tokens(prompt),
+            "escalated": decision_result.get("escalated", False)
+        }
+
+    def _checkout_chat(self, session_id: str, message: str, turn: Dict):
+        return self.chats.checkout(
+            session_id,
+            prompt_key=turn["prompt_key"],
+            system_prompt=turn["system_prompt"],
+            window=turn["window"],
+            message=message,
+            legacy_prompt=turn["prompt"]
+        )
+
+    async def _finish_turn(self, session_id: str, message: str, response_text: str, turn: Dict, **details):
+        # Store the response in conversation history
+        await self.providers.run('sessions', self.sessions.append_message, session_id, 'assistant', response_text)
+        
+        # Persisted to Firestore in the background, batched with other turns
+        if self.memory_writer is not None:
+            self.memory_writer.submit_turn(
+                session_id, message, response_text, reserved=turn.pop("memory_slot", False), **details
+            )
+        
+        # Log the response
+        self.system_access.log_access('assistant_response', {
+            'session_id': session_id,
+            'response_length': len(response_text),
+            **details
+        })
+
+    async def _generate_fallback(self, prompt: str) -> str:
+        with self.metrics.stage('huggingface'):
+            if self.hf_client is not None:
+                # Not held to the local pipeline's limit so concurrent fallbacks can share a batch
+                generated_text = await self.hf_client.generate(
+                    prompt,
+                    model=self.config['huggingface']['model'],
+                    parameters={
+                        'max_new_tokens': self.config['huggingface'].get('max_new_tokens', 512),
+                        'temperature': self.config['huggingface']['temperature'],
+                        'return_full_text': False
+                    }
+                )
+            else:
+                # The pipeline is resolved inside the worker thread in case it still has to load
+                response = await self.providers.run(
+                    'huggingface',
+                    lambda: self.hf_model(
+                        prompt,
+                        max_length=self.config['huggingface']['max_length'],
+                        num_return_sequences=1
+                    )
                 )
+                generated_text = response[0]['generated_text']
+        return generated_text.split('Sasha:')[-1].strip()
+
+    def _queue_voice(self, response_text: str) -> Optional[str]:
+        try:
+            return self.voice_queue.submit(response_text)
+        except VoiceQueueFull as e:
+            logger.warning(f"Skipping voice synthesis: {str(e)}")
+            return None
+
+    async def _call_gemini(self, session_id: str, message: str, turn: Dict) -> str:
+        # Send only the new turn through the session's Gemini chat
+        async with self.chats.lock(session_id):
+            chat = self._checkout_chat(session_id, message, turn)
+            response_text = None
+            try:
+                async with self.providers.limit('gemini'):
+                    with self.metrics.stage('gemini'):
+                        response = await chat.send_message_async(message)
                 response_text = response.text
+            finally:
+                if response_text is None:
+                    self.chats.invalidate(session_id)
+                else:
+                    self.chats.commit(session_id, message, response_text)
+        return response_text
+
+    def _response_cache_key(self, message: str, mode: str, turn: Dict, cache: Optional[str]) -> Optional[str]:
+        """Key for this turn's reply in the response cache, or None when the cache is not used."""
+        if self.response_cache is None:
+            return None
+        # A sampled reply is one of many possible answers; repeating it is opt-in
+        sampled = (self.config['gemini']['temperature'] > 0
+                   and not self.config['response_cache'].get('allow_sampled', False))
+        if cache == 'bypass' or sampled:
+            self.response_cache.record_bypass()
+            return None
+        return self.response_cache.make_key(mode, turn["system_prompt"], turn["window"], message)
+
+    async def _embed(self, text: str):
+        with self.metrics.stage('embedding'):
+            return await self.providers.run(
+                'embeddings',
+                lambda: self._embedder.get().encode([text], normalize_embeddings=True)[0]
+            )
+
+    async def _lookup_reply(self, message: str, mode: str, turn: Dict, cache: Optional[str]) -> Optional[Dict]:
+        """
+        Look the turn up in the response caches: the exact cache, then the
+        semantic one for differently worded questions. Returns None when
+        caching does not apply, otherwise what ``_cache_reply`` needs with
+        the cached ``response`` (or None on a miss).
+        """
+        cache_key = self._response_cache_key(message, mode, turn, cache)
+        if cache_key is None:
+            return None
+        lookup = {'key': cache_key, 'message': message, 'response': self.response_cache.get(cache_key),
+                  'partition': None, 'vector': None}
+        if lookup['response'] is None and self.semantic_cache is not None:
+            # Same scope as the exact key, minus the wording of the message
+            lookup['partition'] = self.response_cache.make_key(mode, turn["system_prompt"], turn["window"], "")
+            try:
+                lookup['vector'] = await self._embed(message)
+                lookup['response'] = self.semantic_cache.lookup(lookup['partition'], message, lookup['vector'])
             except Exception as e:
-                logger.warning(f"Gemini failed, falling back to Hugging Face: {str(e)}")
-                # Fallback to Hugging Face
-                response = self.hf_model(
-                    f"{system_prompt}\n\nConversation History:\n{history}\n\nUser: {message}\nSasha:",
-                    max_length=self.config['huggingface']['max_length'],
-                    num_return_sequences=1
-                )
-                response_text = response[0]['generated_text'].split('Sasha:')[-1].strip()
+                logger.warning(f"Semantic cache lookup failed: {str(e)}")
+        return lookup
+
+    def _cache_reply(self, lookup: Optional[Dict], provider: str, response_text: str):
+        # Fallback replies are not worth repeating once Gemini is back
+        if lookup is None or provider != self.router.order[0] or not response_text:
+            return
+        self.response_cache.put(lookup['key'], response_text)
+        if lookup['vector'] is not None:
+            self.semantic_cache.add(lookup['partition'], lookup['message'], lookup['vector'], response_text)
+
+    async def generate_response(self, message: str, session_id: str, mode: str = "default",
+                                voice: bool = False, cache: Optional[str] = None) -> Dict:
+        turn = None
+        try:
+            turn = await self._prepare_turn(message, session_id, mode)
+            prompt = turn["prompt"]
             
-            # Generate voice response
-            voice_path = self.tts.speak(response_text)
+            lookup = await self._lookup_reply(message, mode, turn, cache)
+            cached = lookup['response'] if lookup else None
+            if cached is not None:
+                provider, response_text = 'cache', cached
+            else:
+                # Gemini first, Hugging Face when Gemini fails, times out or its circuit is open
+                provider, response_text = await self.router.call({
+                    'gemini': lambda: self._call_gemini(session_id, message, turn),
+                    'huggingface': lambda: self._generate_fallback(prompt)
+                })
+                self._cache_reply(lookup, provider, response_text)
+                self._record_reply(provider, turn["prompt_tokens"], response_text)
             
-            # Store the response in conversation history
-            self.conversations[session_id].append({
-                'role': 'assistant',
-                'content': response_text
-            })
+            # Voice is synthesized in the background so the text reply is not held up
+            voice_job_id = self._queue_voice(response_text) if voice else None
             
-            # Log the response
-            self.system_access.log_access('assistant_response', {
-                'session_id': session_id,
-                'response_length': len(response_text),
-                'voice_generated': True
-            })
+            await self._finish_turn(
+                session_id,
+                message,
+                response_text,
+                turn,
+                voice_generated=voice_job_id is not None,
+                provider=provider
+            )
             
             return {
                 "response": response_text,
-                "voice": voice_path,
-                "escalated": decision_result.get("escalated", False)
+                "voice_job_id": voice_job_id,
+                "escalated": turn["escalated"]
             }
             
         except Exception as e:
             logger.error(f"Error generating response: {str(e)}")
             raise
+        finally:
+            # Failed or cancelled (e.g. a batch whose client left) before the reply was stored
+            self._release_memory_slot(turn)
+
+    async def _stream_gemini(self, session_id: str, message: str, turn: Dict,
+                             chunks: List[str]) -> AsyncIterator[Dict]:
+        async with self.chats.lock(session_id):
+            chat = self._checkout_chat(session_id, message, turn)
+            streamed = False
+            try:
+                async with self.providers.limit('gemini'):
+                    # Time spent waiting on the client to read tokens counts too
+                    with self.metrics.stage('gemini'):
+                        response = await asyncio.wait_for(
+                            chat.send_message_async(message, stream=True),
+                            timeout=self.router.timeouts.get('gemini')
+                        )
+                        async for chunk in response:
+                            text = chunk.text
+                            if text:
+                                chunks.append(text)
+                                yield {"event": "token", "text": text}
+                streamed = True
+            finally:
+                # Anything short of a complete reply leaves the chat out of step with the history
+                if streamed:
+                    self.chats.commit(session_id, message, "".join(chunks))
+                else:
+                    self.chats.invalidate(session_id)
+
+    async def stream_response(self, message: str, session_id: str, mode: str = "default",
+                              cache: Optional[str] = None) -> AsyncIterator[Dict]:
+        """
+        Stream a reply as it is generated.
+
+        Yields a ``start`` event, one ``token`` event per Gemini chunk and a
+        final ``done`` event. The reply is stored in the conversation history
+        and audit log when the stream closes, including when the client
+        disconnects part way through. A stream that ends before any of the
+        reply was generated stores nothing and is audited as a failure.
+        """
+        turn = await self._prepare_turn(message, session_id, mode)
+        prompt = turn["prompt"]
+        chunks: List[str] = []
+        completed = False
+        provider = 'gemini'
+        try:
+            lookup = await self._lookup_reply(message, mode, turn, cache)
+        except BaseException:
+            self._release_memory_slot(turn)
+            raise
+        cached = lookup['response'] if lookup else None
+        error: Optional[BaseException] = None
+        
+        try:
+            yield {"event": "start", "session_id": session_id, "escalated": turn["escalated"]}
+            
+            if cached is not None:
+                provider = 'cache'
+                chunks.append(cached)
+                yield {"event": "token", "text": cached}
+            
+            use_gemini = cached is None and self.router.available('gemini')
+            if use_gemini:
+                started = time.monotonic()
+                try:
+                    async for event in self._stream_gemini(session_id, message, turn, chunks):
+                        yield event
+                except Exception as e:
+                    self.router.record('gemini', False, time.monotonic() - started)
+                    # Once tokens have reached the client we cannot switch models
+                    if chunks:
+                        raise
+                    logger.warning(f"Gemini stream failed, falling back to Hugging Face: {str(e)}")
+                    use_gemini = False
+                except BaseException:
+                    # Client went away; the call says nothing about Gemini's health
+                    self.router.release('gemini')
+                    raise
+                else:
+                    self.router.record('gemini', True, time.monotonic() - started)
+            
+            if cached is None and not use_gemini:
+                provider, text = await self.router.call({
+                    'huggingface': lambda: self._generate_fallback(prompt)
+                })
+                chunks.append(text)
+                yield {"event": "token", "text": text}
+            
+            completed = True
+            if cached is None:
+                self._cache_reply(lookup, provider, "".join(chunks))
+                self._record_reply(provider, turn["prompt_tokens"], "".join(chunks))
+            yield {"event": "done", "response": "".join(chunks)}
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if chunks or completed:
+                await self._finish_turn(
+                    session_id,
+                    message,
+                    "".join(chunks),
+                    turn,
+                    voice_generated=False,
+                    streamed=True,
+                    completed=completed,
+                    provider=provider
+                )
+            else:
+                # No reply to keep: an empty one would only clutter the history and Firestore
+                self._release_memory_slot(turn)
+                self.system_access.log_access('assistant_response_failed', {
+                    'session_id': session_id,
+                    'streamed': True,
+                    'provider': provider,
+                    'error': ("client disconnected" if isinstance(error, (GeneratorExit, asyncio.CancelledError))
+                              else str(error))
+                })
 
-    def clear_conversation(self, session_id: str):
-        if session_id in self.conversations:
-            del self.conversations[session_id]
-        if session_id in self.user_preferences:
-            del self.user_preferences[session_id]
+    async def generate_batch(self, items: List[Dict], concurrency: Optional[int] = None) -> AsyncIterator[Dict]:
+        """
+        Answer many messages concurrently, yielding each result as it completes.
+
+        ``items`` are dicts with ``message`` and optionally ``session_id``,
+        ``mode`` and ``voice``. Messages for the same session run in order,
+        one after another, so each sees the previous reply in its history;
+        different sessions run in parallel, at most ``concurrency`` turns at
+        a time. Results carry the item's ``index`` and either the reply or
+        an ``error``, so one failing prompt does not end the batch.
+        """
+        batch_config = self.config.get('batch', {})
+        limit = max(1, min(concurrency or batch_config.get('concurrency', 8),
+                           batch_config.get('max_concurrency', 32)))
+        semaphore = asyncio.Semaphore(limit)
+        results: asyncio.Queue = asyncio.Queue()
+        
+        chains: Dict[str, List[int]] = {}
+        for index, item in enumerate(items):
+            chains.setdefault(item.get('session_id') or f"batch-{uuid.uuid4()}", []).append(index)
+        
+        async def run_chain(session_id: str, indexes: List[int]):
+            for index in indexes:
+                item = items[index]
+                async with semaphore:
+                    try:
+                        result = await self.generate_response(
+                            message=item['message'],
+                            session_id=session_id,
+                            mode=item.get('mode', 'default'),
+                            voice=item.get('voice', False),
+                            cache=item.get('cache')
+                        )
+                        await results.put({'index': index, 'session_id': session_id, **result})
+                    except Exception as e:
+                        await results.put({'index': index, 'session_id': session_id, 'error': str(e)})
+        
+        tasks = [asyncio.create_task(run_chain(session_id, indexes)) for session_id, indexes in chains.items()]
+        try:
+            for _ in range(len(items)):
+                yield await results.get()
+        finally:
+            # The client may stop reading part way; do not keep generating for nobody
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def clear_conversation(self, session_id: str):
+        await self.providers.run('sessions', self.sessions.delete, session_id)
+        self.history.discard(session_id)
+        self.chats.discard(session_id)
         
         # Log the conversation clear
         self.system_access.log_access('conversation_cleared', {
             'session_id': session_id
         })
 
-    def get_audit_log(self) -> List[Dict]:
-        return self.system_access.audit_log
+    def get_prompt_stats(self) -> Dict:
+        return self.chats.stats.snapshot()
+
+    def get_cache_stats(self) -> Dict:
+        stats = {
+            'response': self.response_cache.stats() if self.response_cache is not None else None,
+            'semantic': None,
+            # Reused Gemini chats, with prompt bytes per turn before and after reuse
+            'prompt': self.get_prompt_stats()
+        }
+        if self.semantic_cache is not None:
+            stats['semantic'] = {
+                **self.semantic_cache.stats(),
+                'recent_hits': list(self.semantic_cache.recent_hits)
+            }
+        return stats
+
+    def get_graph_traces(self, limit: int = 20) -> Dict:
+        return {'spans': graph_tracer.export(limit), 'summary': graph_tracer.summary()}
+
+    def get_voice_job(self, job_id: str) -> Optional[Dict]:
+        return self.voice_queue.get(job_id)
+
+    async def speak(self, text: str) -> AudioArtifact:
+        return await self.providers.run('tts', self._speak, text)
+
+    def get_audio(self, artifact_id: str) -> Optional[AudioArtifact]:
+        return self.audio_store.get(artifact_id)
+
+    async def stream_speech(self, text: str) -> AsyncIterator[bytes]:
+        """Yield MP3 audio for ``text`` sentence by sentence, starting as soon as the first is synthesized."""
+        streaming = self.config['integrations']['text_to_speech'].get('streaming', {})
+        chunks = split_sentences(
+            text,
+            max_chars=streaming.get('max_chunk_chars', DEFAULT_MAX_CHARS),
+            min_chars=streaming.get('min_chunk_chars', DEFAULT_MIN_CHARS)
+        )
+        # Each sentence goes through the audio cache, so repeated phrases are synthesized once
+        async def synthesize(chunk: str) -> bytes:
+            return await self.providers.run('tts', self._synthesize_voice, chunk)
+
+        async for audio in synthesize_stream(chunks, synthesize, lookahead=streaming.get('lookahead', 3)):
+            yield audio
+
+    async def shutdown(self):
+        if self._primary_recheck is not None and not self._primary_recheck.done():
+            self._primary_recheck.cancel()
+        await self.voice_queue.stop()
+        if self.summarizer is not None:
+            await self.summarizer.stop()
+        if self.hf_client is not None:
+            await self.hf_client.aclose()
+        if self.memory_writer is not None:
+            # Commit the turns still buffered before the process exits
+            await asyncio.to_thread(self.memory_writer.close)
+        self.providers.shutdown()
+        self.sessions.close()
+        graph_tracer.remove_listener(self._graph_span_listener)
+        self.system_access.audit_log.close()
+
+    def get_audit_log(self, start: Optional[str] = None, end: Optional[str] = None,
+                      action: Optional[str] = None, limit: int = 100,
+                      cursor: Optional[str] = None) -> Dict:
+        return self.system_access.audit_log.query(
+            start=start,
+            end=end,
+            action=action,
+            limit=limit,
+            cursor=cursor,
+            flush=True
+        )
 
     def get_pending_approvals(self) -> Dict:
         return self.system_access.pending_approvals
@@ -1,12 +1,17 @@
 from fastapi import FastAPI, Request, HTTPException
 from pydantic import BaseModel
+from typing import List, Literal, Optional
 import yaml
 import logging
 import uuid
 import os
+import json
+import asyncio
+import time
 from ai_service import AIService
+from metrics import MetricsMiddleware
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.exception_handlers import RequestValidationError
 from fastapi.exceptions import RequestValidationError
 
@@ -45,15 +50,34 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware, metrics=ai_service.metrics)
 
 class ChatRequest(BaseModel):
     message: str
     session_id: str = None
     mode: str = "default"
+    voice: bool = False
+    cache: Optional[Literal["default", "bypass"]] = None  # "bypass" skips the response cache
 
 class ChatResponse(BaseModel):
     response: str
     session_id: str
+    escalated: bool = False
+    voice_job_id: Optional[str] = None
+
+class BatchChatItem(BaseModel):
+    message: str
+    session_id: Optional[str] = None
+    mode: str = "default"
+    voice: bool = False
+    cache: Optional[Literal["default", "bypass"]] = None
+
+class BatchChatRequest(BaseModel):
+    items: List[BatchChatItem]
+    concurrency: Optional[int] = None
+
+class SpeakRequest(BaseModel):
+    text: str
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request, exc):
@@ -80,14 +104,18 @@ async def chat_endpoint(req: ChatRequest):
         response = await ai_service.generate_response(
             message=req.message,
             session_id=session_id,
-            mode=req.mode
+            mode=req.mode,
+            voice=req.voice,
+            cache=req.cache
         )
         
-        logger.info(f"Generated response: {response[:50]}...")
+        logger.info(f"Generated response: {response['response'][:50]}...")
         
         return ChatResponse(
-            response=response,
-            session_id=session_id
+            response=response['response'],
+            session_id=session_id,
+            escalated=response['escalated'],
+            voice_job_id=response['voice_job_id']
         )
     except Exception as e:
         logger.error(f"Error in chat endpoint: {str(e)}", exc_info=True)
@@ -96,11 +124,132 @@ async def chat_endpoint(req: ChatRequest):
             detail=f"Failed to generate response: {str(e)}"
         )
 
+@app.post('/chat/stream')
+async def chat_stream_endpoint(req: ChatRequest):
+    """Stream Sasha's reply as Server-Sent Events while it is generated."""
+    session_id = req.session_id or str(uuid.uuid4())
+    logger.info(f"Received streaming chat request for session: {session_id}")
+    
+    async def event_stream():
+        try:
+            async for event in ai_service.stream_response(
+                message=req.message,
+                session_id=session_id,
+                mode=req.mode,
+                cache=req.cache
+            ):
+                yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+        except Exception as e:
+            logger.error(f"Error in chat stream: {str(e)}", exc_info=True)
+            error = {"event": "error", "detail": f"Failed to generate response: {str(e)}"}
+            yield f"event: error\ndata: {json.dumps(error)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post('/chat/batch')
+async def chat_batch_endpoint(req: BatchChatRequest):
+    """
+    Answer many messages at once, streaming one NDJSON line per message as it completes.
+
+    Lines arrive in completion order; each has the item's ``index`` and
+    either ``response`` or ``error``. Items sharing a ``session_id`` are
+    answered in order within that conversation.
+    """
+    max_items = ai_service.config.get('batch', {}).get('max_items', 1000)
+    if len(req.items) > max_items:
+        raise HTTPException(status_code=413, detail=f"A batch can hold at most {max_items} items")
+    logger.info(f"Received batch chat request with {len(req.items)} items")
+    
+    async def result_lines():
+        async for result in ai_service.generate_batch(
+            [item.model_dump() for item in req.items],
+            concurrency=req.concurrency
+        ):
+            yield json.dumps(result) + "\n"
+    
+    return StreamingResponse(
+        result_lines(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post('/voice/stream')
+async def voice_stream_endpoint(req: SpeakRequest):
+    """Stream MP3 audio for ``text``; playback can start once the first sentence is synthesized."""
+    if not req.text.strip():
+        raise HTTPException(status_code=422, detail="text must not be empty")
+    return StreamingResponse(
+        ai_service.stream_speech(req.text),
+        media_type="audio/mpeg",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post('/voice/speak')
+async def voice_speak_endpoint(req: SpeakRequest):
+    """Synthesize ``text`` and return a short-lived URL for the audio."""
+    if not req.text.strip():
+        raise HTTPException(status_code=422, detail="text must not be empty")
+    artifact = await ai_service.speak(req.text)
+    return artifact.to_dict()
+
+@app.get('/audio/{artifact_id}')
+async def audio_endpoint(artifact_id: str):
+    """Serve a stored audio artifact until it expires."""
+    artifact = await ai_service.providers.run('audio', ai_service.get_audio, artifact_id)
+    if artifact is None:
+        raise HTTPException(status_code=404, detail="Audio not found or expired")
+    max_age = max(0, int(artifact.expires_at - time.time()))
+    return Response(
+        content=artifact.data,
+        media_type=artifact.content_type,
+        headers={"Cache-Control": f"private, max-age={max_age}"}
+    )
+
+@app.get('/voice/{job_id}')
+async def voice_endpoint(job_id: str):
+    """Return the synthesized audio for a voice job, or its status while pending."""
+    job = ai_service.get_voice_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown voice job: {job_id}")
+    
+    if job['status'] == 'done':
+        # The audio itself is held by the audio store, which may have spilled or expired it
+        artifact = await ai_service.providers.run('audio', ai_service.get_audio, job['artifact']['id'])
+        if artifact is None:
+            raise HTTPException(status_code=410, detail=f"Audio for voice job {job_id} has expired")
+        return Response(content=artifact.data, media_type=artifact.content_type)
+    if job['status'] == 'failed':
+        raise HTTPException(status_code=500, detail=f"Voice synthesis failed: {job['error']}")
+    
+    return JSONResponse(status_code=202, content={"job_id": job_id, "status": job['status']})
+
+@app.get('/audit-log')
+async def audit_log_endpoint(start: Optional[str] = None, end: Optional[str] = None,
+                             action: Optional[str] = None, limit: int = 100,
+                             cursor: Optional[str] = None):
+    """Page through audit entries between ISO 8601 ``start`` and ``end``, oldest first."""
+    if not 1 <= limit <= 1000:
+        raise HTTPException(status_code=422, detail="limit must be between 1 and 1000")
+    # Reading segments is file I/O, so keep it off the event loop
+    return await ai_service.providers.run(
+        'audit',
+        ai_service.get_audit_log,
+        start=start,
+        end=end,
+        action=action,
+        limit=limit,
+        cursor=cursor
+    )
+
 @app.post('/clear-conversation')
 async def clear_conversation(session_id: str):
     try:
         logger.info(f"Clearing conversation for session: {session_id}")
-        ai_service.clear_conversation(session_id)
+        await ai_service.clear_conversation(session_id)
         return {"status": "success", "message": "Conversation cleared"}
     except Exception as e:
         logger.error(f"Error clearing conversation: {str(e)}", exc_info=True)
@@ -109,7 +258,46 @@ async def clear_conversation(session_id: str):
             detail=f"Failed to clear conversation: {str(e)}"
         )
 
+@app.get('/cache/stats')
+async def cache_stats_endpoint():
+    """Response cache counters, recent semantic cache hits for reviewing the threshold, and prompt bytes per turn."""
+    return ai_service.get_cache_stats()
+
+@app.get('/graph/traces')
+async def graph_traces_endpoint(limit: int = 20):
+    """Spans for the last ``limit`` decision graph runs, plus per-node latency over all kept runs."""
+    if not 1 <= limit <= 200:
+        raise HTTPException(status_code=422, detail="limit must be between 1 and 200")
+    return ai_service.get_graph_traces(limit)
+
+@app.get('/metrics')
+async def metrics_endpoint():
+    """Prometheus scrape endpoint."""
+    return Response(content=ai_service.metrics.render(), media_type=ai_service.metrics.content_type)
+
 @app.get('/health')
+@app.get('/health/live')
 async def health_check():
-    """Health check endpoint to verify the service is running."""
-    return {"status": "healthy", "service": "sasha-ai"} 
\ No newline at end of file
+    """Liveness check: the process is up and serving HTTP."""
+    return {"status": "healthy", "service": "sasha-ai"}
+
+@app.get('/health/ready')
+async def readiness_check():
+    """Readiness check: the decision graph and primary model are usable."""
+    status = ai_service.get_startup_status()
+    return JSONResponse(
+        status_code=200 if status['ready'] else 503,
+        content={"status": "ready" if status['ready'] else "starting", "service": "sasha-ai", **status}
+    )
+
+@app.on_event("startup")
+async def startup_event():
+    # Backends warm up after uvicorn has bound the port, unless configured to block startup
+    if ai_service.config.get('startup', {}).get('warm_in_background', True):
+        app.state.warm_up_task = asyncio.create_task(ai_service.warm_up())
+    else:
+        await ai_service.warm_up()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await ai_service.shutdown()
@@ -0,0 +1,209 @@
+import heapq
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "audit-"
+SEGMENT_SUFFIX = ".jsonl"
+
+class AuditLog:
+    """
+    Append-only audit log with asynchronous, batched persistence.
+
+    ``append`` never blocks: the entry goes into a bounded in-memory ring
+    buffer and onto a queue drained by a background writer thread, which
+    writes batches to JSONL segment files and rotates them by size. Each
+    process writes its own shard of segments (named by pid), so several
+    uvicorn workers can share one directory; queries merge all shards,
+    and the newest ``retain_segments`` segments are kept across all of
+    them, so shards left by earlier processes are pruned as well.
+
+    Entry ids start with the entry's timestamp, so ordering by id orders
+    by time, and the last id of a page is the cursor for the next one.
+    """
+
+    def __init__(self, directory: str, buffer_size: int = 1000, segment_bytes: int = 8 * 1024 * 1024,
+                 flush_interval: float = 1.0, batch_size: int = 500, max_queue: int = 10000,
+                 retain_segments: int = 200):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.retain_segments = retain_segments
+        self.recent = deque(maxlen=buffer_size)
+        self.dropped = 0
+        self._shard = f"{os.getpid():07d}"
+        self._counter = itertools.count()
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._segment_path: Optional[str] = None
+        self._segment_size = 0
+        self._closed = False
+        os.makedirs(directory, exist_ok=True)
+        self._writer = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+        self._writer.start()
+
+    def append(self, action: str, details: Dict) -> Dict:
+        timestamp = datetime.utcnow().isoformat(timespec='microseconds')
+        entry = {
+            'id': f"{timestamp}-{self._shard}-{next(self._counter):012d}",
+            'timestamp': timestamp,
+            'action': action,
+            'details': details
+        }
+        self.recent.append(entry)
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            # Losing an entry on disk is better than stalling a request on the writer
+            self.dropped += 1
+        return entry
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self._closed:
+                    return
+                continue
+            batch, barriers = [], []
+            while item is not None:
+                if isinstance(item, threading.Event):
+                    barriers.append(item)
+                else:
+                    batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = None
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    logger.error(f"Failed to persist {len(batch)} audit entries: {str(e)}")
+            for barrier in barriers:
+                barrier.set()
+            if self._closed and self._queue.empty():
+                return
+
+    def _write(self, batch: List[Dict]):
+        if self._segment_path is None or self._segment_size >= self.segment_bytes:
+            self._rotate(batch[0]['timestamp'])
+        data = "".join(json.dumps(entry, default=str) + "\n" for entry in batch).encode('utf-8')
+        with open(self._segment_path, 'ab') as f:
+            f.write(data)
+        self._segment_size += len(data)
+
+    def _rotate(self, first_timestamp: str):
+        stamp = first_timestamp.replace('-', '').replace(':', '').replace('.', '')
+        self._segment_path = os.path.join(
+            self.directory, f"{SEGMENT_PREFIX}{stamp}-{self._shard}{SEGMENT_SUFFIX}"
+        )
+        self._segment_size = 0
+        # Retention counts every shard, so segments of exited workers are pruned too. Names sort
+        # by start time; a live worker whose current segment goes recreates it on its next write.
+        segments = sorted(self._segments(), key=os.path.basename)
+        for path in segments[:max(0, len(segments) - self.retain_segments)]:
+            if path == self._segment_path:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _segments(self) -> List[str]:
+        return [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        ]
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until everything appended so far is on disk; False if that took over ``timeout``."""
+        barrier = threading.Event()
+        try:
+            self._queue.put(barrier, timeout=timeout)
+        except queue.Full:
+            return False
+        return barrier.wait(timeout)
+
+    @staticmethod
+    def _segment_start(path: str) -> str:
+        # audit-<YYYYmmddTHHMMSSffffff>-<shard>.jsonl -> ISO timestamp of its first entry
+        stamp = os.path.basename(path)[len(SEGMENT_PREFIX):].split('-')[0]
+        return datetime.strptime(stamp, "%Y%m%dT%H%M%S%f").isoformat(timespec='microseconds')
+
+    def _shard_entries(self, paths: List[str], start: Optional[str], end: Optional[str]) -> Iterator[Dict]:
+        # A segment covers [its start, the next segment's start) within one shard
+        starts = [self._segment_start(p) for p in paths]
+        for index, path in enumerate(paths):
+            next_start = starts[index + 1] if index + 1 < len(paths) else None
+            if end is not None and starts[index] > end:
+                break
+            if start is not None and next_start is not None and next_start < start:
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if line.strip():
+                            yield json.loads(line)
+            except FileNotFoundError:
+                continue
+
+    def query(self, start: Optional[str] = None, end: Optional[str] = None, action: Optional[str] = None,
+              limit: int = 100, cursor: Optional[str] = None, flush: bool = False,
+              flush_timeout: float = 1.0) -> Dict:
+        """
+        Return up to ``limit`` entries with ``start <= timestamp <= end``
+        (ISO 8601 strings), oldest first, after the entry id ``cursor``.
+        Only the segments overlapping the range are read, line by line.
+        With ``flush``, first waits up to ``flush_timeout`` for entries
+        still queued to reach disk.
+        """
+        if flush:
+            self.flush(flush_timeout)
+        # Segments that end before the cursor's timestamp cannot hold the next page
+        segment_start = start
+        if cursor is not None and (segment_start is None or cursor[:26] > segment_start):
+            segment_start = cursor[:26]
+        shards: Dict[str, List[str]] = {}
+        for path in sorted(self._segments()):
+            shards.setdefault(path[:-len(SEGMENT_SUFFIX)].rsplit('-', 1)[1], []).append(path)
+
+        merged = heapq.merge(
+            *[self._shard_entries(paths, segment_start, end) for paths in shards.values()],
+            key=lambda entry: entry['id']
+        )
+        entries = []
+        for entry in merged:
+            if cursor is not None and entry['id'] <= cursor:
+                continue
+            if start is not None and entry['timestamp'] < start:
+                continue
+            if end is not None and entry['timestamp'] > end:
+                break
+            if action is not None and entry['action'] != action:
+                continue
+            entries.append(entry)
+            if len(entries) >= limit:
+                break
+
+        return {
+            'entries': entries,
+            'next_cursor': entries[-1]['id'] if len(entries) >= limit else None
+        }
+
+    def close(self, timeout: float = 5.0):
+        self._closed = True
+        self.flush(timeout)
+        self._writer.join(timeout=timeout)
@@ -0,0 +1,91 @@
+"""
+Hit rate and precision report for the semantic response cache.
+
+Offline, from labelled question pairs (JSONL lines like
+``{"a": "what can you do?", "b": "what are you able to help with?", "same": true}``),
+it embeds both questions and, for each threshold, reports:
+
+- hit rate:  share of pairs the cache would treat as the same question
+- precision: share of those hits labelled ``same`` (wrong answers served otherwise)
+- recall:    share of ``same`` pairs that would be hits
+
+    python benchmarks/semantic_cache_report.py --pairs pairs.jsonl
+
+Against a running service, it prints the live hit rate and writes the
+recent hits (lowest similarity first) as unlabelled pairs; add ``same`` to
+each line and feed the file back with ``--pairs``:
+
+    python benchmarks/semantic_cache_report.py --url http://localhost:8000 --export hits.jsonl
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List
+
+DEFAULT_THRESHOLDS = [0.80, 0.85, 0.88, 0.90, 0.92, 0.94, 0.96]
+
+def load_pairs(path: str) -> List[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def similarities(pairs: List[Dict], model_name: str) -> List[float]:
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(model_name)
+    a = model.encode([p['a'] for p in pairs], normalize_embeddings=True)
+    b = model.encode([p['b'] for p in pairs], normalize_embeddings=True)
+    return [float(x @ y) for x, y in zip(a, b)]
+
+def threshold_report(pairs: List[Dict], scores: List[float], thresholds: List[float]) -> List[Dict]:
+    same_total = sum(1 for p in pairs if p['same'])
+    rows = []
+    for threshold in thresholds:
+        hits = [p for p, score in zip(pairs, scores) if score >= threshold]
+        correct = sum(1 for p in hits if p['same'])
+        rows.append({
+            'threshold': threshold,
+            'hit_rate': len(hits) / len(pairs) if pairs else 0.0,
+            'precision': correct / len(hits) if hits else None,
+            'recall': correct / same_total if same_total else None
+        })
+    return rows
+
+def print_rows(rows: List[Dict]):
+    print(f"{'threshold':>9} {'hit rate':>9} {'precision':>9} {'recall':>9}")
+    for row in rows:
+        precision = f"{row['precision']:.3f}" if row['precision'] is not None else "-"
+        recall = f"{row['recall']:.3f}" if row['recall'] is not None else "-"
+        print(f"{row['threshold']:>9.2f} {row['hit_rate']:>9.3f} {precision:>9} {recall:>9}")
+
+def live_report(url: str, export: str):
+    import requests
+    stats = requests.get(f"{url.rstrip('/')}/cache/stats", timeout=10).json().get('semantic')
+    if stats is None:
+        sys.exit("The semantic cache is not enabled on this service")
+    print(f"hits {stats['hits']}  misses {stats['misses']}  hit rate {stats['hit_rate']:.3f}  "
+          f"threshold {stats['threshold']}  entries {stats['entries']}/{stats['max_entries']}")
+    hits = sorted(stats['recent_hits'], key=lambda hit: hit['similarity'])
+    if export:
+        with open(export, 'w', encoding='utf-8') as f:
+            for hit in hits:
+                f.write(json.dumps({'a': hit['question'], 'b': hit['matched'], 'similarity': hit['similarity']}) + "\n")
+        print(f"Wrote {len(hits)} recent hits to {export}; label each with \"same\" to use --pairs")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", help="Labelled question pairs (JSONL)")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=DEFAULT_THRESHOLDS)
+    parser.add_argument("--url", help="Base URL of a running Sasha API")
+    parser.add_argument("--export", help="With --url, write recent hits here for labelling")
+    args = parser.parse_args()
+
+    if args.url:
+        live_report(args.url, args.export)
+    if args.pairs:
+        pairs = load_pairs(args.pairs)
+        print_rows(threshold_report(pairs, similarities(pairs, args.model), sorted(args.thresholds)))
+    if not args.url and not args.pairs:
+        parser.error("pass --pairs and/or --url")
+
+if __name__ == "__main__":
+    main()
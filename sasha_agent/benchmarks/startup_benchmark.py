@@ -0,0 +1,105 @@
+"""
+Cold-start benchmark for the Sasha API.
+
+Each run starts a fresh interpreter, imports ``api`` (everything uvicorn
+needs before it can bind the port) and then runs the background warm-up,
+recording:
+
+- listen: time until the app object exists and the port could be bound
+- ready:  time until /health/ready would return 200; blank for runs where
+          Gemini never answered during the warm-up
+- warm:   time until every backend is loaded
+
+Run from the sasha_agent directory with real credentials configured:
+
+    python benchmarks/startup_benchmark.py --runs 5
+    python benchmarks/startup_benchmark.py --runs 5 --eager
+
+``--eager`` is the baseline: it warms everything before the port is bound,
+as ``startup.warm_in_background: false`` does and as startup did before
+backends were created lazily, so ``listen`` includes the whole warm-up.
+
+Without credentials or network, ``--stub-backends`` replaces the Gemini
+readiness call and every deferred client loader with no-ops. The decision
+graph is still compiled for real, so the numbers are the cost of imports,
+configuration and the graph rather than of the backends.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CHILD = r"""
+import asyncio, json, sys, time
+started = time.perf_counter()
+import api
+listen = time.perf_counter() - started
+
+def stub_backends(service):
+    class Model:
+        def count_tokens(self, text):
+            return 0
+    service.gemini_model = Model()
+    for resource in (service._hf_model, service.tts.client_resource, service._memory_collection,
+                     service._assets_bucket, getattr(service, '_embedder', None)):
+        if resource is not None:
+            resource.loader = lambda: None
+
+async def main():
+    global listen
+    service = api.ai_service
+    if "--stub-backends" in sys.argv:
+        stub_backends(service)
+    if "--eager" in sys.argv:
+        await service.warm_up()
+        listen = warm = time.perf_counter() - started
+        ready = listen if service.is_ready() else None
+    else:
+        task = asyncio.create_task(service.warm_up())
+        while not service.is_ready() and not task.done():
+            await asyncio.sleep(0.005)
+        ready = time.perf_counter() - started if service.is_ready() else None
+        await task
+        warm = time.perf_counter() - started
+    await service.shutdown()
+    return ready, warm
+
+ready, warm = asyncio.run(main())
+print(json.dumps({"listen": listen, "ready": ready, "warm": warm}))
+"""
+
+def run_once(cwd: str, flags: list) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD] + flags,
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--stub-backends", action="store_true",
+                        help="replace Gemini and the deferred clients with no-ops")
+    parser.add_argument("--eager", action="store_true",
+                        help="warm every backend before the port is bound (the baseline)")
+    args = parser.parse_args()
+
+    flags = [flag for flag, on in (("--stub-backends", args.stub_backends), ("--eager", args.eager)) if on]
+    service_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    runs = [run_once(service_dir, flags) for _ in range(args.runs)]
+
+    print(f"{'stage':<8}{'median s':>10}{'min s':>10}{'max s':>10}{'runs':>6}")
+    for stage in ("listen", "ready", "warm"):
+        values = [run[stage] for run in runs if run[stage] is not None]
+        if not values:
+            print(f"{stage:<8}{'-':>10}{'-':>10}{'-':>10}{0:>6}")
+            continue
+        print(f"{stage:<8}{statistics.median(values):>10.2f}{min(values):>10.2f}{max(values):>10.2f}{len(values):>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+SYSTEM_ACK = "Understood."
+
+def _message_key(message: Dict) -> Tuple[str, str]:
+    return (message['role'], message['content'])
+
+def _to_content(message: Dict) -> Dict:
+    return {'role': 'user' if message['role'] == 'user' else 'model', 'parts': [message['content']]}
+
+class PromptStats:
+    """
+    Prompt bytes per turn, comparing the old one-blob prompt with what the
+    reused chat actually adds.
+
+    ``legacy_bytes`` is the size of the single system + transcript + message
+    string the service used to build every turn. ``new_bytes`` is what had
+    to be rendered for this turn: just the message when the chat is reused,
+    the seeded history too when it is rebuilt. ``request_bytes`` is the
+    full structured contents sent to the API.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.turns = 0
+        self.rebuilds = 0
+        self.legacy_bytes = 0
+        self.new_bytes = 0
+        self.request_bytes = 0
+
+    def record(self, legacy_bytes: int, new_bytes: int, request_bytes: int, rebuilt: bool):
+        with self._lock:
+            self.turns += 1
+            self.rebuilds += int(rebuilt)
+            self.legacy_bytes += legacy_bytes
+            self.new_bytes += new_bytes
+            self.request_bytes += request_bytes
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            turns = self.turns or 1
+            return {
+                'turns': self.turns,
+                'rebuilds': self.rebuilds,
+                'legacy_bytes': self.legacy_bytes,
+                'new_bytes': self.new_bytes,
+                'request_bytes': self.request_bytes,
+                'avg_legacy_bytes': self.legacy_bytes / turns,
+                'avg_new_bytes': self.new_bytes / turns,
+                'avg_request_bytes': self.request_bytes / turns
+            }
+
+class _ChatEntry:
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.chat: Any = None
+        self.prompt_hash: Optional[str] = None
+        self.last_key: Optional[Tuple] = None
+        self.message_count = 0
+        self.history_bytes = 0
+
+class ChatSessionCache:
+    """
+    Keeps one Gemini ChatSession per conversation so each turn only appends
+    the new message to structured multi-turn contents.
+
+    A chat is rebuilt from the session's history window when its prompt key
+    changes, when the stored history moved on without it (fallback replies,
+    other workers), or when it holds more than ``rebuild_slack`` messages
+    beyond the window. The slack lets a long session keep its chat for a
+    few turns after the window starts trimming instead of rebuilding on
+    every turn. Entries are evicted least-recently-used beyond
+    ``max_sessions`` and dropped with the conversation.
+    """
+
+    def __init__(self, start_chat: Callable[..., Any], max_sessions: int = 10000,
+                 rebuild_slack: int = 10):
+        self.start_chat = start_chat
+        self.max_sessions = max_sessions
+        self.rebuild_slack = rebuild_slack
+        self.stats = PromptStats()
+        self._entries: "OrderedDict[str, _ChatEntry]" = OrderedDict()
+
+    def lock(self, session_id: str) -> asyncio.Lock:
+        """Per-session lock; hold it from ``checkout`` until ``commit`` or ``discard``."""
+        entry = self._entries.get(session_id)
+        if entry is None:
+            entry = _ChatEntry()
+            self._entries[session_id] = entry
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+        self._entries.move_to_end(session_id)
+        return entry.lock
+
+    def checkout(self, session_id: str, prompt_key: str, system_prompt: str, window: List[Dict],
+                 message: str, legacy_prompt: str) -> Any:
+        """
+        Return the session's chat, ready for ``message``.
+
+        ``prompt_key`` is the part of the system prompt that invalidates the
+        chat when it changes; ``system_prompt`` is what a rebuilt chat is
+        seeded with (it may also carry a running summary of trimmed turns).
+        """
+        entry = self._entries.setdefault(session_id, _ChatEntry())
+        prompt_hash = hashlib.sha256(prompt_key.encode('utf-8')).hexdigest()
+        last_key = _message_key(window[-1]) if window else None
+        message_bytes = len(message.encode('utf-8'))
+
+        rebuilt = (
+            entry.chat is None
+            or entry.prompt_hash != prompt_hash
+            or entry.last_key != last_key
+            or entry.message_count > len(window) + self.rebuild_slack
+        )
+        if rebuilt:
+            seed = [
+                {'role': 'user', 'parts': [system_prompt]},
+                {'role': 'model', 'parts': [SYSTEM_ACK]}
+            ] + [_to_content(m) for m in window]
+            entry.chat = self.start_chat(history=seed)
+            entry.prompt_hash = prompt_hash
+            entry.last_key = last_key
+            entry.message_count = len(window)
+            entry.history_bytes = sum(len(c['parts'][0].encode('utf-8')) for c in seed)
+            new_bytes = entry.history_bytes + message_bytes
+        else:
+            new_bytes = message_bytes
+
+        self.stats.record(
+            legacy_bytes=len(legacy_prompt.encode('utf-8')),
+            new_bytes=new_bytes,
+            request_bytes=entry.history_bytes + message_bytes,
+            rebuilt=rebuilt
+        )
+        return entry.chat
+
+    def commit(self, session_id: str, message: str, response_text: str):
+        """Record that the chat now ends with this turn, matching the stored history."""
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return
+        entry.last_key = ('assistant', response_text)
+        entry.message_count += 2
+        entry.history_bytes += len(message.encode('utf-8')) + len(response_text.encode('utf-8'))
+
+    def invalidate(self, session_id: str):
+        """Force the next turn to rebuild, e.g. after a failed or partial reply."""
+        entry = self._entries.get(session_id)
+        if entry is not None:
+            entry.chat = None
+
+    def discard(self, session_id: str):
+        self._entries.pop(session_id, None)
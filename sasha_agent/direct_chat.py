@@ -1,31 +1,78 @@
 import requests
+import httpx
+import asyncio
 import json
 import uuid
 import os
-from typing import Optional, Dict, Any
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Optional, Dict, Any, AsyncIterator, Iterator, List, Tuple
+
+# A chat turn is not idempotent: retrying one that Sasha already ran would store it twice.
+# Only failures where the request never reached her are retried: connection errors, a
+# bad gateway and overload. A 504 or a read timeout may come after the turn has run.
+RETRY_STATUSES = (502, 503)
+RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+def _parse_sse(lines: Iterator[str]) -> Iterator[Dict[str, Any]]:
+    data = []
+    for line in lines:
+        if line.startswith("data:"):
+            data.append(line[5:].strip())
+        elif not line and data:
+            yield json.loads("\n".join(data))
+            data = []
 
 class SashaDirectChat:
-    def __init__(self, base_url: str = "http://localhost:8000"):
+    """
+    Blocking client for the Sasha API.
+    
+    Requests share one pooled keep-alive session instead of opening a new
+    connection per message, every call has a timeout, and failed
+    connections and 502/503 responses are retried with exponential
+    backoff. Read errors and timeouts are not retried, since Sasha may
+    already have answered.
+    """
+    
+    def __init__(self, base_url: str = "http://localhost:8000", timeout: Tuple[float, float] = (5.0, 120.0),
+                 retries: int = 3, backoff_factor: float = 0.5, pool_size: int = 10,
+                 check_health: bool = True):
         self.base_url = base_url
         self.session_id = str(uuid.uuid4())
-        self._check_health()
+        self.timeout = timeout  # (connect, read) seconds
+        self.http = requests.Session()
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            read=0,
+            other=0,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=None,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.http.mount("http://", adapter)
+        self.http.mount("https://", adapter)
+        if check_health:
+            self._check_health()
     
     def _check_health(self):
         try:
-            response = requests.get(f"{self.base_url}/health")
+            response = self.http.get(f"{self.base_url}/health", timeout=self.timeout)
             if response.status_code != 200:
                 raise ConnectionError("Sasha AI service is not healthy")
             print("✅ Connected to Sasha AI service")
         except Exception as e:
             raise ConnectionError(f"Failed to connect to Sasha AI service: {str(e)}")
     
-    def chat(self, message: str, mode: str = "default") -> Dict[str, Any]:
+    def chat(self, message: str, mode: str = "default", session_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Send a message to Sasha and get her response.
         
         Args:
             message (str): The message to send to Sasha
             mode (str): The interaction mode ('default', 'code', or 'devops')
+            session_id (str): Conversation to continue; defaults to this client's session
             
         Returns:
             Dict containing Sasha's response and session information
@@ -33,15 +80,11 @@ class SashaDirectChat:
         try:
             payload = {
                 "message": message,
-                "session_id": self.session_id,
+                "session_id": session_id or self.session_id,
                 "mode": mode
             }
             
-            response = requests.post(
-                f"{self.base_url}/chat",
-                json=payload,
-                headers={"Content-Type": "application/json"}
-            )
+            response = self.http.post(f"{self.base_url}/chat", json=payload, timeout=self.timeout)
             
             if response.status_code != 200:
                 raise Exception(f"Error: {response.text}")
@@ -52,13 +95,51 @@ class SashaDirectChat:
             print(f"Error communicating with Sasha: {str(e)}")
             return {"error": str(e)}
     
-    def clear_conversation(self):
+    def chat_stream(self, message: str, mode: str = "default",
+                    session_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Send a message and yield Sasha's reply as it is generated.
+        
+        Returns:
+            An iterator of events: 'start', one 'token' per chunk, then 'done' (or 'error')
+        """
+        payload = {
+            "message": message,
+            "session_id": session_id or self.session_id,
+            "mode": mode
+        }
+        with self.http.post(f"{self.base_url}/chat/stream", json=payload,
+                            timeout=self.timeout, stream=True) as response:
+            if response.status_code != 200:
+                raise Exception(f"Error: {response.text}")
+            yield from _parse_sse(response.iter_lines(decode_unicode=True))
+    
+    def chat_batch(self, items: List[Dict[str, Any]], concurrency: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Send many messages in one request and yield each result as it completes.
+        
+        Args:
+            items (list): Dicts with 'message' and optionally 'session_id', 'mode' and 'voice'
+            concurrency (int): How many messages the server answers at once
+            
+        Returns:
+            An iterator of result dicts, each with the item's 'index'
+        """
+        with self.http.post(f"{self.base_url}/chat/batch", json={"items": items, "concurrency": concurrency},
+                            timeout=self.timeout, stream=True) as response:
+            if response.status_code != 200:
+                raise Exception(f"Error: {response.text}")
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+    
+    def clear_conversation(self, session_id: Optional[str] = None):
         """Clear the current conversation history"""
         try:
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/clear-conversation",
-                json={"session_id": self.session_id},
-                headers={"Content-Type": "application/json"}
+                params={"session_id": session_id or self.session_id},
+                timeout=self.timeout
             )
             
             if response.status_code != 200:
@@ -68,6 +149,111 @@ class SashaDirectChat:
             
         except Exception as e:
             print(f"Error clearing conversation: {str(e)}")
+    
+    def close(self):
+        self.http.close()
+
+class AsyncSashaDirectChat:
+    """
+    asyncio client for the Sasha API, for scripts driving many sessions at once.
+    
+    One ``httpx.AsyncClient`` pools keep-alive connections across every
+    concurrent call (up to ``max_connections``). Failed connections and
+    502/503 responses are retried with exponential backoff, as in
+    ``SashaDirectChat``.
+    """
+    
+    def __init__(self, base_url: str = "http://localhost:8000", connect_timeout: float = 5.0,
+                 read_timeout: float = 120.0, retries: int = 3, backoff_factor: float = 0.5,
+                 max_connections: int = 100):
+        self.base_url = base_url
+        self.session_id = str(uuid.uuid4())
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.http = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+    
+    async def __aenter__(self) -> 'AsyncSashaDirectChat':
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+    
+    async def _backoff(self, attempt: int):
+        await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+    
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self.http.request(method, path, **kwargs)
+            except RETRY_ERRORS:
+                if attempt == self.retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    return response
+            await self._backoff(attempt)
+    
+    async def check_health(self) -> bool:
+        response = await self._request("GET", "/health")
+        return response.status_code == 200
+    
+    async def chat(self, message: str, mode: str = "default", session_id: Optional[str] = None) -> Dict[str, Any]:
+        response = await self._request("POST", "/chat", json={
+            "message": message,
+            "session_id": session_id or self.session_id,
+            "mode": mode
+        })
+        if response.status_code != 200:
+            raise Exception(f"Error: {response.text}")
+        return response.json()
+    
+    async def _stream_lines(self, path: str, payload: Dict[str, Any]) -> AsyncIterator[str]:
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.http.stream("POST", path, json=payload) as response:
+                    if response.status_code in RETRY_STATUSES and attempt < self.retries:
+                        await self._backoff(attempt)
+                        continue
+                    if response.status_code != 200:
+                        await response.aread()
+                        raise Exception(f"Error: {response.text}")
+                    async for line in response.aiter_lines():
+                        yield line
+                    return
+            except RETRY_ERRORS:
+                if attempt == self.retries:
+                    raise
+                await self._backoff(attempt)
+    
+    async def chat_stream(self, message: str, mode: str = "default",
+                          session_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        payload = {"message": message, "session_id": session_id or self.session_id, "mode": mode}
+        data = []
+        async for line in self._stream_lines("/chat/stream", payload):
+            if line.startswith("data:"):
+                data.append(line[5:].strip())
+            elif not line and data:
+                yield json.loads("\n".join(data))
+                data = []
+    
+    async def chat_batch(self, items: List[Dict[str, Any]],
+                         concurrency: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        async for line in self._stream_lines("/chat/batch", {"items": items, "concurrency": concurrency}):
+            if line:
+                yield json.loads(line)
+    
+    async def clear_conversation(self, session_id: Optional[str] = None):
+        response = await self._request("POST", "/clear-conversation",
+                                       params={"session_id": session_id or self.session_id})
+        if response.status_code != 200:
+            raise Exception(f"Error: {response.text}")
+    
+    async def aclose(self):
+        await self.http.aclose()
 
 def main():
     # Create a new chat session
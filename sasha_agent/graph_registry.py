@@ -0,0 +1,260 @@
+import contextvars
+import functools
+import inspect
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+def state_size(value: Any) -> int:
+    """Approximate payload size of a graph state in bytes, without serializing it."""
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 8
+    if isinstance(value, str):
+        return len(value.encode('utf-8', 'replace'))
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if hasattr(value, 'nbytes'):
+        # numpy arrays, e.g. embeddings carried in the state
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sum(state_size(k) + state_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sum(state_size(item) for item in value)
+    return len(repr(value))
+
+class GraphTracer:
+    """
+    Per-node timing for compiled graphs.
+
+    Node functions wrapped with ``node`` record a span (duration, input
+    state size, output size, error) into the trace of the ``invoke`` that
+    is running them, found through a context variable so concurrent
+    invocations on other threads or tasks keep separate traces. The last
+    ``max_traces`` traces are kept for ``export``; listeners are called
+    with every finished span, e.g. to feed a latency histogram.
+    """
+
+    def __init__(self, max_traces: int = 200):
+        self.traces = deque(maxlen=max_traces)
+        self.listeners: List[Callable[[Dict], None]] = []
+        self._current: contextvars.ContextVar = contextvars.ContextVar('graph_trace', default=None)
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: Callable[[Dict], None]):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Dict], None]):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def _finish(self, span: Dict):
+        for listener in self.listeners:
+            listener(span)
+
+    def _span(self, trace: Optional[Dict], name: str, started: float, wall_start: float,
+              attributes: Dict, error: Optional[BaseException]) -> Dict:
+        span = {
+            'trace_id': trace['trace_id'] if trace else None,
+            'span_id': uuid.uuid4().hex[:16],
+            'parent_id': trace['root_id'] if trace else None,
+            'graph': trace['graph'] if trace else None,
+            'name': name,
+            'start': wall_start,
+            'duration_ms': (time.perf_counter() - started) * 1000,
+            'status': 'error' if error else 'ok',
+            'attributes': attributes
+        }
+        if error is not None:
+            span['error'] = repr(error)
+        return span
+
+    def _record(self, trace: Optional[Dict], name: str, started: float, wall_start: float,
+                state: Any, result: Any, error: Optional[BaseException]):
+        span = self._span(trace, name, started, wall_start, {
+            'state_bytes': state_size(state),
+            'output_bytes': state_size(result)
+        }, error)
+        if trace is not None:
+            with self._lock:
+                trace['spans'].append(span)
+        self._finish(span)
+
+    def node(self, name: str, fn: Callable) -> Callable:
+        """Wrap the node function ``fn`` (sync or async) so each call is recorded as a span."""
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def traced_async(state, *args, **kwargs):
+                trace = self._current.get()
+                wall_start = time.time()
+                started = time.perf_counter()
+                error = None
+                result = None
+                try:
+                    result = await fn(state, *args, **kwargs)
+                    return result
+                except BaseException as e:
+                    error = e
+                    raise
+                finally:
+                    self._record(trace, name, started, wall_start, state, result, error)
+            return traced_async
+
+        @functools.wraps(fn)
+        def traced(state, *args, **kwargs):
+            trace = self._current.get()
+            wall_start = time.time()
+            started = time.perf_counter()
+            error = None
+            result = None
+            try:
+                result = fn(state, *args, **kwargs)
+                return result
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                self._record(trace, name, started, wall_start, state, result, error)
+        return traced
+
+    def _start_trace(self, graph_name: str) -> Dict:
+        return {
+            'trace_id': uuid.uuid4().hex,
+            'root_id': uuid.uuid4().hex[:16],
+            'graph': graph_name,
+            'spans': []
+        }
+
+    def _end_trace(self, trace: Dict, started: float, wall_start: float, state: Any, result: Any,
+                   error: Optional[BaseException]):
+        root = self._span(trace, 'invoke', started, wall_start, {
+            'state_bytes': state_size(state),
+            'output_bytes': state_size(result)
+        }, error)
+        root['span_id'] = trace['root_id']
+        root['parent_id'] = None
+        with self._lock:
+            spans = [root] + sorted(trace['spans'], key=lambda span: span['start'])
+            self.traces.append(spans)
+        self._finish(root)
+
+    def invoke(self, graph_name: str, graph: Any, state: Dict, *args, **kwargs) -> Any:
+        """Run ``graph.invoke`` as one trace: a root span plus a span per node that ran."""
+        trace = self._start_trace(graph_name)
+        token = self._current.set(trace)
+        wall_start = time.time()
+        started = time.perf_counter()
+        error = None
+        result = None
+        try:
+            result = graph.invoke(state, *args, **kwargs)
+            return result
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._current.reset(token)
+            self._end_trace(trace, started, wall_start, state, result, error)
+
+    async def ainvoke(self, graph_name: str, graph: Any, state: Dict, *args, **kwargs) -> Any:
+        """``invoke`` for ``graph.ainvoke``; nodes running as parallel tasks inherit the trace."""
+        trace = self._start_trace(graph_name)
+        token = self._current.set(trace)
+        wall_start = time.time()
+        started = time.perf_counter()
+        error = None
+        result = None
+        try:
+            result = await graph.ainvoke(state, *args, **kwargs)
+            return result
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._current.reset(token)
+            self._end_trace(trace, started, wall_start, state, result, error)
+
+    def export(self, limit: Optional[int] = None) -> List[Dict]:
+        """Recent spans, oldest trace first, as JSON-serializable dicts."""
+        with self._lock:
+            traces = list(self.traces)
+        if limit is not None:
+            traces = traces[-limit:] if limit > 0 else []
+        return [span for spans in traces for span in spans]
+
+    def export_json(self, limit: Optional[int] = None) -> str:
+        return json.dumps(self.export(limit))
+
+    def summary(self) -> Dict[str, Dict]:
+        """Call count, mean and max duration per ``graph.node`` over the kept traces."""
+        nodes: Dict[str, List[float]] = {}
+        for span in self.export():
+            nodes.setdefault(f"{span['graph']}.{span['name']}", []).append(span['duration_ms'])
+        return {
+            name: {
+                'count': len(durations),
+                'mean_ms': sum(durations) / len(durations),
+                'max_ms': max(durations)
+            }
+            for name, durations in nodes.items()
+        }
+
+class TracedGraph:
+    """A compiled graph whose ``invoke`` and ``ainvoke`` calls are traced; other attributes pass through."""
+
+    def __init__(self, name: str, graph: Any, tracer: GraphTracer):
+        self.name = name
+        self.graph = graph
+        self.tracer = tracer
+
+    def invoke(self, state: Dict, *args, **kwargs) -> Any:
+        return self.tracer.invoke(self.name, self.graph, state, *args, **kwargs)
+
+    async def ainvoke(self, state: Dict, *args, **kwargs) -> Any:
+        return await self.tracer.ainvoke(self.name, self.graph, state, *args, **kwargs)
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self.graph, attribute)
+
+class GraphRegistry:
+    """
+    Compiled graphs shared by the whole process.
+
+    ``get`` builds and compiles a graph the first time its ``name`` (and
+    ``key``, for graphs that depend on configuration) is requested and
+    returns the same traced instance afterwards, so callers no longer
+    compile their own copy.
+    """
+
+    def __init__(self, tracer: GraphTracer):
+        self.tracer = tracer
+        self._graphs: Dict[Hashable, TracedGraph] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str, builder: Callable[[], Any], key: Hashable = None) -> TracedGraph:
+        registry_key = (name, key)
+        graph = self._graphs.get(registry_key)
+        if graph is None:
+            with self._lock:
+                graph = self._graphs.get(registry_key)
+                if graph is None:
+                    graph = TracedGraph(name, builder(), self.tracer)
+                    self._graphs[registry_key] = graph
+        return graph
+
+    def clear(self):
+        with self._lock:
+            self._graphs.clear()
+
+tracer = GraphTracer()
+registry = GraphRegistry(tracer)
+
+def traced_node(name: str, fn: Callable) -> Callable:
+    return tracer.node(name, fn)
+
+def get_graph(name: str, builder: Callable[[], Any], key: Hashable = None) -> TracedGraph:
+    return registry.get(name, builder, key)
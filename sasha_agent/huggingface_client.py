@@ -1,26 +1,184 @@
+import asyncio
+import json
 import logging
-import requests
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+class HuggingFaceError(Exception):
+    """Raised when the Inference API returns an error or an unexpected payload."""
+
+class _Batch:
+    def __init__(self):
+        self.prompts: List[str] = []
+        self.futures: List[asyncio.Future] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
 
 class HuggingFaceClient:
-    def __init__(self, api_key):
+    """
+    Async client for the Hugging Face Inference API.
+
+    Requests share one pooled ``httpx.AsyncClient``. Prompts for the same
+    model and parameters that arrive within ``batch_window`` seconds of
+    each other are sent as one request with a list of ``inputs`` (up to
+    ``max_batch_size``). A 503 while the model is loading is retried after
+    the ``estimated_time`` the API reports, capped at ``max_wait``; other
+    5xx and 429 responses are retried with exponential backoff.
+    """
+
+    def __init__(self, api_key: str, base_url: str = "https://api-inference.huggingface.co/models",
+                 timeout: float = 30.0, max_connections: int = 20, batch_window: float = 0.01,
+                 max_batch_size: int = 8, max_retries: int = 3, backoff_factor: float = 0.5,
+                 max_wait: float = 60.0):
         self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_wait = max_wait
+        self._http: Optional[httpx.AsyncClient] = None
+        self._batches: Dict[Tuple[str, str], _Batch] = {}
+        # Requests in flight; held here so they are not garbage collected and aclose can finish them
+        self._tasks: Set[asyncio.Task] = set()
         logging.info('HuggingFaceClient initialized.')
 
-    def generate_response(self, prompt: str, model: str = 'gpt2') -> str:
-        url = f"https://api-inference.huggingface.co/models/{model}"
-        headers = {"Authorization": f"Bearer {self.api_key}"}
-        payload = {"inputs": prompt}
+    @property
+    def http(self) -> httpx.AsyncClient:
+        # Created on first use so it binds to the running event loop
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+        return self._http
+
+    async def generate(self, prompt: str, model: str = 'gpt2', parameters: Optional[Dict] = None) -> str:
+        """Generate text for ``prompt``, batched with concurrent calls; raises HuggingFaceError."""
+        key = (model, json.dumps(parameters or {}, sort_keys=True))
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = self._batches[key] = _Batch()
+            batch.timer = asyncio.get_running_loop().call_later(self.batch_window, self._flush, key)
+        future = asyncio.get_running_loop().create_future()
+        batch.prompts.append(prompt)
+        batch.futures.append(future)
+        if len(batch.prompts) >= self.max_batch_size:
+            batch.timer.cancel()
+            self._flush(key)
+        return await future
+
+    async def generate_response(self, prompt: str, model: str = 'gpt2') -> str:
         try:
-            resp = requests.post(url, headers=headers, json=payload, timeout=10)
-            resp.raise_for_status()
-            data = resp.json()
-            if isinstance(data, list) and data and 'generated_text' in data[0]:
-                return data[0]['generated_text']
-            elif isinstance(data, dict) and 'error' in data:
-                return f"[HuggingFace error: {data['error']}]"
-            else:
-                return str(data)
+            return await self.generate(prompt, model)
+        except HuggingFaceError as e:
+            return f"[HuggingFace error: {e}]"
         except Exception as e:
             return f"[HuggingFace API error: {e}]"
 
-    # TODO: Add methods for running models, etc. 
\ No newline at end of file
+    def _flush(self, key: Tuple[str, str]):
+        batch = self._batches.pop(key, None)
+        if batch is not None:
+            task = asyncio.ensure_future(self._send(key, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, key: Tuple[str, str], batch: _Batch):
+        model, parameters = key
+        payload: Dict[str, Any] = {"inputs": batch.prompts if len(batch.prompts) > 1 else batch.prompts[0]}
+        if parameters != "{}":
+            payload["parameters"] = json.loads(parameters)
+        try:
+            data = await self._post(model, payload)
+            texts = self._parse(data, len(batch.prompts))
+        except asyncio.CancelledError:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(HuggingFaceError("Client closed before the request finished"))
+            raise
+        except Exception as e:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future, text in zip(batch.futures, texts):
+            if not future.done():
+                future.set_result(text)
+
+    async def _post(self, model: str, payload: Dict) -> Any:
+        url = f"{self.base_url}/{model}"
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                resp = await self.http.post(url, json=payload)
+            except httpx.TransportError:
+                if last_attempt:
+                    raise
+                await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+                continue
+
+            if resp.status_code == 503 and not last_attempt:
+                # The model is being loaded onto a worker; the API says roughly how long that takes
+                try:
+                    estimated = float(resp.json().get('estimated_time'))
+                except Exception:
+                    estimated = self.backoff_factor * (2 ** attempt)
+                wait = min(max(estimated, 0.0), self.max_wait)
+                logger.info(f"Hugging Face model {model} is loading, retrying in {wait:.1f}s")
+                await asyncio.sleep(wait)
+                continue
+            if (resp.status_code == 429 or resp.status_code >= 500) and not last_attempt:
+                await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+                continue
+
+            try:
+                data = resp.json()
+            except ValueError:
+                raise HuggingFaceError(f"{resp.status_code}: {resp.text[:200]}")
+            if resp.status_code >= 400 or (isinstance(data, dict) and 'error' in data):
+                message = data.get('error') if isinstance(data, dict) else resp.text
+                raise HuggingFaceError(f"{resp.status_code}: {message}")
+            return data
+
+    @staticmethod
+    def _parse(data: Any, count: int) -> List[str]:
+        # One input returns [{"generated_text": ...}]; a list of inputs returns one such list
+        # per input, or a flat list of dicts depending on the task
+        if not isinstance(data, list) or (count > 1 and len(data) != count):
+            raise HuggingFaceError(f"Unexpected response: {str(data)[:200]}")
+        if count == 1:
+            data = [data]
+        texts = []
+        for item in data:
+            if isinstance(item, list):
+                item = item[0] if item else {}
+            if not isinstance(item, dict) or 'generated_text' not in item:
+                raise HuggingFaceError(f"Unexpected response: {str(item)[:200]}")
+            texts.append(item['generated_text'])
+        return texts
+
+    async def aclose(self, timeout: float = 5.0):
+        """
+        Send prompts still waiting for their batch window, wait up to
+        ``timeout`` seconds for requests in flight, cancel the rest (their
+        callers get a HuggingFaceError) and close the connection pool.
+        """
+        for key, batch in list(self._batches.items()):
+            batch.timer.cancel()
+            self._flush(key)
+        if self._tasks:
+            _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
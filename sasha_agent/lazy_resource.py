@@ -0,0 +1,53 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class LazyResource:
+    """
+    A backend client or model that is created on first use.
+
+    Loading is thread-safe, so a background warm-up and a request that
+    needs the resource early never load it twice. A failed load is not
+    cached; the next ``get`` tries again.
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Any]):
+        self.name = name
+        self.loader = loader
+        self.load_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self._value: Any = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def get(self) -> Any:
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded:
+                started = time.perf_counter()
+                try:
+                    self._value = self.loader()
+                except Exception as e:
+                    self.error = str(e)
+                    logger.error(f"Failed to initialize {self.name}: {str(e)}")
+                    raise
+                self.load_seconds = time.perf_counter() - started
+                self.error = None
+                self._loaded = True
+                logger.info(f"Initialized {self.name} in {self.load_seconds:.2f}s")
+        return self._value
+
+    def status(self) -> Dict:
+        return {
+            'loaded': self._loaded,
+            'load_seconds': self.load_seconds,
+            'error': self.error
+        }
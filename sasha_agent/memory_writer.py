@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Firestore rejects batches with more than 500 writes
+MAX_BATCH_WRITES = 500
+
+_STOP = object()
+
+class MemoryWriter:
+    """
+    Write-behind persistence of conversation turns to Firestore.
+
+    ``submit`` queues a turn document and returns at once; a background
+    thread commits queued documents with one ``batch()`` per
+    ``batch_size`` documents or ``flush_interval`` seconds, whichever
+    comes first, so a turn never waits on a Firestore round trip.
+    Document ids are assigned at submit time, which makes a retried
+    commit overwrite rather than duplicate.
+
+    The queue holds at most ``max_queue`` documents, counting slots
+    reserved for turns still in progress. ``reserve`` lets a request take
+    a slot when it starts, waiting (up to ``put_timeout``) while none is
+    free, which slows new turns down to what Firestore accepts instead of
+    growing memory; its ``submit(..., reserved=True)`` then always has
+    room. An unreserved ``submit`` on a full queue, or any ``submit``
+    after ``close``, drops the document and counts it.
+
+    ``connect`` returns ``(client, collection)`` and is called on the
+    writer thread on first commit, so the Firestore client is only
+    created once there is something to write.
+    """
+
+    def __init__(self, connect: Callable[[], Tuple[Any, Any]], batch_size: int = 100,
+                 flush_interval: float = 0.5, max_queue: int = 10000, put_timeout: float = 2.0,
+                 max_retries: int = 3, retry_backoff: float = 0.2):
+        self.connect = connect
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_WRITES))
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.committed = 0
+        self.commits = 0
+        self.failed = 0
+        self.dropped = 0
+        self.throttled = 0
+        self.max_queue = max_queue
+        self._connection: Optional[Tuple[Any, Any]] = None
+        # Unbounded; the limit is enforced on documents plus reservations under _slots
+        self._queue: "queue.Queue" = queue.Queue()
+        self._reserved = 0
+        self._slots = threading.Lock()
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name="memory-writer", daemon=True)
+        self._writer.start()
+
+    def submit(self, document: Dict, document_id: Optional[str] = None,
+               reserved: bool = False) -> Optional[str]:
+        """
+        Queue ``document`` for the next batch; returns its id, or None if it
+        was dropped. With ``reserved``, it uses the slot taken by ``reserve``.
+        """
+        document_id = document_id or uuid.uuid4().hex
+        with self._slots:
+            if reserved:
+                self._reserved -= 1
+            if self._closed:
+                self.dropped += 1
+                logger.warning(f"Memory writer is closed; dropped document {document_id}")
+                return None
+            if not reserved and self._queue.qsize() + self._reserved >= self.max_queue:
+                self.dropped += 1
+                logger.warning(f"Memory write queue is full; dropped document {document_id}")
+                return None
+            self._queue.put_nowait((document_id, document))
+        return document_id
+
+    def submit_turn(self, session_id: str, message: str, response: str, reserved: bool = False,
+                    **details) -> Optional[str]:
+        return self.submit({
+            'session_id': session_id,
+            'message': message,
+            'response': response,
+            'timestamp': datetime.utcnow().isoformat(),
+            **details
+        }, reserved=reserved)
+
+    def _try_reserve(self) -> bool:
+        with self._slots:
+            if self._closed or self._queue.qsize() + self._reserved >= self.max_queue:
+                return False
+            self._reserved += 1
+            return True
+
+    async def reserve(self) -> bool:
+        """
+        Take a queue slot for a document submitted later, waiting up to
+        ``put_timeout`` for one to free up; False if none did (or the writer
+        is closed). Pass ``reserved=True`` to that ``submit``, or ``release``
+        the slot if nothing will be submitted.
+        """
+        if self._try_reserve():
+            return True
+        if self._closed:
+            return False
+        self.throttled += 1
+        deadline = time.monotonic() + self.put_timeout
+        delay = 0.005
+        while not self._try_reserve():
+            if self._closed or time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.1)
+        return True
+
+    def release(self):
+        """Give back a slot taken by ``reserve`` that will not be used."""
+        with self._slots:
+            self._reserved -= 1
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            batch: List[Tuple[str, Dict]] = []
+            barriers = []
+            # The first document opens a window; it closes when full, after flush_interval or on flush()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                if isinstance(item, threading.Event):
+                    barriers.append(item)
+                    break
+                batch.append(item)
+                remaining = deadline - time.monotonic()
+                if len(batch) >= self.batch_size or remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if batch:
+                self._commit(batch)
+            for barrier in barriers:
+                barrier.set()
+
+    def _commit(self, batch: List[Tuple[str, Dict]]):
+        for attempt in range(self.max_retries + 1):
+            try:
+                if self._connection is None:
+                    self._connection = self.connect()
+                client, collection = self._connection
+                write = client.batch()
+                for document_id, document in batch:
+                    write.set(collection.document(document_id), document)
+                write.commit()
+                self.committed += len(batch)
+                self.commits += 1
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.failed += len(batch)
+                    logger.error(f"Failed to persist {len(batch)} conversation turns: {str(e)}")
+                    return
+                logger.warning(f"Memory batch commit failed (attempt {attempt + 1}): {str(e)}")
+                time.sleep(self.retry_backoff * (2 ** attempt))
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until everything submitted so far has been committed (or given up on)."""
+        barrier = threading.Event()
+        try:
+            self._queue.put(barrier, timeout=timeout)
+        except queue.Full:
+            return False
+        return barrier.wait(timeout)
+
+    def close(self, timeout: float = 10.0) -> bool:
+        """Commit what is queued and stop the writer thread."""
+        with self._slots:
+            if self._closed:
+                return not self._writer.is_alive()
+            self._closed = True
+        try:
+            # Anything submitted before this is committed first
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return False
+        self._writer.join(timeout)
+        return not self._writer.is_alive()
+
+    def stats(self) -> Dict:
+        return {
+            'queued': self._queue.qsize(),
+            'reserved': self._reserved,
+            'committed': self.committed,
+            'commits': self.commits,
+            'failed': self.failed,
+            'dropped': self.dropped,
+            'throttled': self.throttled
+        }
@@ -0,0 +1,269 @@
+import abc
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds; spans a cached TTS hit up to a slow fallback generation
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+class _Metric(abc.ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    @abc.abstractmethod
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """Yield ``(name suffix, rendered labels, value)`` for each sample."""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return lines
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield "", _format_labels(self.label_names, key), value
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts (last is +Inf), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the ``with`` block, including when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return sum(state[0]) if state else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, (list(state[0]), state[1])) for key, state in self._values.items())
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield "_bucket", _format_labels(self.label_names + ('le',), key + (_format_value(bound),)), cumulative
+            labels = _format_labels(self.label_names, key)
+            yield "_count", labels, cumulative
+            yield "_sum", labels, total
+
+class CallbackMetric(_Metric):
+    """A metric whose samples are read from elsewhere (a cache, a store) at scrape time."""
+
+    def __init__(self, name: str, documentation: str, kind: str,
+                 collect: Callable[[], Dict[Tuple[str, ...], float]], labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self.kind = kind
+        self.collect = collect
+
+    def samples(self):
+        for key, value in sorted(self.collect().items()):
+            yield "", _format_labels(self.label_names, key), value
+
+class MetricsRegistry:
+    """Holds metrics and renders them in the Prometheus text exposition format."""
+
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        # Metrics whose last render failed; each failure streak is logged once, not per scrape
+        self._failing: Set[str] = set()
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def callback(self, name: str, documentation: str, kind: str,
+                 collect: Callable[[], Dict[Tuple[str, ...], float]], labels: Sequence[str] = ()) -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, kind, collect, labels))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception:
+                # One broken callback should not take the whole scrape down
+                if metric.name not in self._failing:
+                    self._failing.add(metric.name)
+                    logger.exception(f"Could not render metric {metric.name}; it is left out of scrapes while it fails")
+                continue
+            self._failing.discard(metric.name)
+        return "\n".join(lines) + "\n"
+
+class ServiceMetrics(MetricsRegistry):
+    """
+    The metrics the Sasha service reports on ``/metrics``.
+
+    ``stage`` times a step of a turn (decision_graph, prompt_build, gemini,
+    huggingface, tts); a stage that raises is still timed and also counted
+    in ``sasha_stage_errors_total``.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.stage_seconds = self.histogram(
+            'sasha_stage_seconds', 'Time spent in each stage of a turn.', ['stage']
+        )
+        self.stage_errors = self.counter(
+            'sasha_stage_errors_total', 'Stages that raised.', ['stage']
+        )
+        self.tokens = self.counter(
+            'sasha_tokens_total', 'Estimated prompt and completion tokens.', ['provider', 'kind']
+        )
+        self.responses = self.counter(
+            'sasha_responses_total', 'Replies by the provider that produced them.', ['provider']
+        )
+        self.fallbacks = self.counter(
+            'sasha_fallbacks_total', 'Replies produced by a provider other than the primary.'
+        )
+        self.requests = self.counter(
+            'sasha_http_requests_total', 'HTTP requests by endpoint and status.', ['endpoint', 'status']
+        )
+        self.request_seconds = self.histogram(
+            'sasha_http_request_seconds', 'HTTP request time until the response body is sent.', ['endpoint']
+        )
+        self.graph_node_seconds = self.histogram(
+            'sasha_graph_node_seconds', 'Time spent in each decision graph node, and in the whole invoke.',
+            ['graph', 'node']
+        )
+        self.in_flight = self.gauge(
+            'sasha_http_requests_in_flight', 'HTTP requests being served, including open streams.'
+        )
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.stage_errors.inc(stage=name)
+            raise
+        finally:
+            self.stage_seconds.observe(time.perf_counter() - started, stage=name)
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting requests, their latency and how many are in
+    flight. Streaming responses stay in flight until their last chunk is
+    sent, which a ``call_next`` style middleware would not see.
+    """
+
+    def __init__(self, app, metrics: ServiceMetrics, skip_paths: Sequence[str] = ('/metrics',)):
+        self.app = app
+        self.metrics = metrics
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope.get('path') in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status: Optional[int] = None
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        self.metrics.in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.metrics.in_flight.dec()
+            # The router fills in the endpoint; label by its name to keep path ids out of the series
+            endpoint = getattr(scope.get('endpoint'), '__name__', 'unmatched')
+            self.metrics.request_seconds.observe(time.perf_counter() - started, endpoint=endpoint)
+            self.metrics.requests.inc(endpoint=endpoint, status=status or 500)
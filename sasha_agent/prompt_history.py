@@ -0,0 +1,138 @@
+import threading
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return max(1, (len(text) + 3) // 4)
+
+def render_message(message: Dict) -> str:
+    return f"{'User' if message['role'] == 'user' else 'Sasha'}: {message['content']}"
+
+def _message_key(message: Dict) -> Tuple:
+    return (message['role'], message.get('timestamp'), message['content'])
+
+class HistoryWindow:
+    """
+    Rendered transcript for one session, kept within a token budget.
+
+    Each line is rendered and counted once when it is appended. The
+    joined transcript is kept between turns, so a new turn only
+    concatenates its own line, and trimming slices off the oldest lines
+    instead of re-joining everything. When a later turn has a larger
+    budget, ``restore`` puts trimmed lines back from the stored messages.
+    """
+
+    def __init__(self, max_messages: int, count_tokens: Callable[[str], int] = estimate_tokens):
+        self.max_messages = max_messages
+        self.count_tokens = count_tokens
+        self.lines = deque()  # (message, rendered line, token count)
+        self.text = ""
+        self.tokens = 0
+        self.last_key: Optional[Tuple] = None
+        self.token_budget: Optional[int] = None
+        # Oldest lines that were trimmed before and put back; they are not reported as evicted again
+        self.restored = 0
+
+    def append(self, message: Dict):
+        line = render_message(message)
+        tokens = self.count_tokens(line)
+        self.lines.append((message, line, tokens))
+        self.text = f"{self.text}\n{line}" if self.text else line
+        self.tokens += tokens
+        self.last_key = _message_key(message)
+
+    def fit(self, token_budget: int) -> List[Dict]:
+        """Drop the oldest lines until within budget, returning the newly dropped messages."""
+        self.token_budget = token_budget
+        evicted = []
+        while self.lines and (self.tokens > token_budget or len(self.lines) > self.max_messages):
+            message, line, tokens = self.lines.popleft()
+            self.text = self.text[len(line) + 1:]
+            self.tokens -= tokens
+            if self.restored:
+                self.restored -= 1
+            else:
+                evicted.append(message)
+        return evicted
+
+    def restore(self, messages: List[Dict], token_budget: int):
+        """Put back the trimmed messages preceding the window that fit in ``token_budget``."""
+        if self.lines:
+            first_key = _message_key(self.lines[0][0])
+            end = next((i for i in range(len(messages) - 1, -1, -1) if _message_key(messages[i]) == first_key), None)
+        else:
+            end = next((i + 1 for i in range(len(messages) - 1, -1, -1) if _message_key(messages[i]) == self.last_key), None)
+        if end is None:
+            return
+        for message in reversed(messages[:end]):
+            if len(self.lines) >= self.max_messages:
+                break
+            line = render_message(message)
+            tokens = self.count_tokens(line)
+            if self.tokens + tokens > token_budget:
+                break
+            self.lines.appendleft((message, line, tokens))
+            self.text = f"{line}\n{self.text}" if self.text else line
+            self.tokens += tokens
+            self.restored += 1
+
+class HistoryBuilder:
+    """Keeps a HistoryWindow per session and syncs it incrementally with the stored messages."""
+
+    def __init__(self, max_messages: int = 50, max_windows: int = 10000,
+                 count_tokens: Callable[[str], int] = estimate_tokens):
+        self.max_messages = max_messages
+        self.max_windows = max_windows
+        self.count_tokens = count_tokens
+        self._windows: "OrderedDict[str, HistoryWindow]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _new_messages(self, window: HistoryWindow, messages: List[Dict]) -> Optional[List[Dict]]:
+        if window.last_key is None:
+            return messages
+        # The last seen message is normally at or near the end of the stored list
+        for index in range(len(messages) - 1, -1, -1):
+            if _message_key(messages[index]) == window.last_key:
+                return messages[index + 1:]
+        return None
+
+    def build(self, session_id: str, messages: List[Dict], token_budget: int) -> Tuple[str, List[Dict]]:
+        """
+        Return the transcript for ``messages`` within ``token_budget`` and
+        the messages trimmed from it since the last call.
+        """
+        with self._lock:
+            window = self._windows.get(session_id)
+            if window is None:
+                window = HistoryWindow(self.max_messages, self.count_tokens)
+                self._windows[session_id] = window
+                while len(self._windows) > self.max_windows:
+                    self._windows.popitem(last=False)
+            self._windows.move_to_end(session_id)
+
+            new_messages = self._new_messages(window, messages)
+            if new_messages is None:
+                # The stored history changed under us (cleared or another worker); start over
+                window = HistoryWindow(self.max_messages, self.count_tokens)
+                self._windows[session_id] = window
+                new_messages = messages
+
+            previous_budget = window.token_budget
+            for message in new_messages:
+                window.append(message)
+            evicted = window.fit(token_budget)
+            if previous_budget is not None and token_budget > previous_budget:
+                # A roomier turn (e.g. a short message after a long one) gets trimmed history back
+                window.restore(messages, token_budget)
+            return window.text, evicted
+
+    def window_messages(self, session_id: str) -> List[Dict]:
+        """Messages currently in the session's window, oldest first."""
+        with self._lock:
+            window = self._windows.get(session_id)
+            return [message for message, _, _ in window.lines] if window else []
+
+    def discard(self, session_id: str):
+        with self._lock:
+            self._windows.pop(session_id, None)
@@ -0,0 +1,50 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class ProviderExecutor:
+    """
+    Runs blocking provider calls off the event loop.
+
+    Calls share one thread pool, and each provider (gemini, huggingface,
+    langgraph, tts, ...) has its own concurrency limit so a slow backend
+    cannot take every thread and starve the others.
+    """
+
+    def __init__(self, max_workers: int = 16, limits: Optional[Dict[str, int]] = None,
+                 default_limit: int = 4):
+        self.max_workers = max_workers
+        self.limits = dict(limits or {})
+        self.default_limit = default_limit
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="provider")
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.in_flight: Dict[str, int] = {}
+
+    def _semaphore(self, provider: str) -> asyncio.Semaphore:
+        if provider not in self._semaphores:
+            self._semaphores[provider] = asyncio.Semaphore(self.limits.get(provider, self.default_limit))
+        return self._semaphores[provider]
+
+    @asynccontextmanager
+    async def limit(self, provider: str):
+        """Hold one of ``provider``'s slots, e.g. around a native async SDK call."""
+        async with self._semaphore(provider):
+            self.in_flight[provider] = self.in_flight.get(provider, 0) + 1
+            try:
+                yield
+            finally:
+                self.in_flight[provider] -= 1
+
+    async def run(self, provider: str, fn: Callable, *args, **kwargs) -> Any:
+        """Run the blocking ``fn`` in the pool within ``provider``'s concurrency limit."""
+        async with self.limit(provider):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, functools.partial(fn, *args, **kwargs))
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class ProviderUnavailable(Exception):
+    """Raised when every provider failed, timed out or had its circuit open."""
+
+class CircuitBreaker:
+    """
+    Error-rate and latency based circuit breaker over a rolling window of calls.
+
+    The circuit opens when, over the last ``window`` calls (and at least
+    ``min_calls``), the share of failures reaches ``error_rate`` or the
+    share of calls slower than ``slow_call_seconds`` reaches ``slow_rate``.
+    After ``cooldown_seconds`` one trial call is let through; its outcome
+    closes or re-opens the circuit.
+    """
+
+    def __init__(self, name: str, window: int = 20, min_calls: int = 5, error_rate: float = 0.5,
+                 slow_call_seconds: Optional[float] = None, slow_rate: float = 0.5,
+                 cooldown_seconds: float = 30):
+        self.name = name
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate = slow_rate
+        self.cooldown_seconds = cooldown_seconds
+        self.calls = deque(maxlen=window)  # (succeeded, latency)
+        self.state = 'closed'
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == 'closed':
+            return True
+        if self.state == 'open' and time.monotonic() - self.opened_at >= self.cooldown_seconds:
+            self.state = 'half_open'
+        if self.state == 'half_open' and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record(self, succeeded: bool, latency: float):
+        slow = self.slow_call_seconds is not None and latency > self.slow_call_seconds
+        if self.state == 'half_open':
+            self._trial_in_flight = False
+            if succeeded and not slow:
+                logger.info(f"Circuit for {self.name} closed")
+                self.state = 'closed'
+                self.calls.clear()
+            else:
+                self._open()
+            return
+
+        self.calls.append((succeeded, latency))
+        if self.state != 'closed' or len(self.calls) < self.min_calls:
+            return
+        failures = sum(1 for ok, _ in self.calls if not ok)
+        slow_calls = 0
+        if self.slow_call_seconds is not None:
+            slow_calls = sum(1 for _, seconds in self.calls if seconds > self.slow_call_seconds)
+        if failures / len(self.calls) >= self.error_rate or slow_calls / len(self.calls) >= self.slow_rate:
+            self._open()
+
+    def release(self):
+        """Give back a half-open trial that was cancelled before it finished."""
+        self._trial_in_flight = False
+
+    def _open(self):
+        logger.warning(f"Circuit for {self.name} opened")
+        self.state = 'open'
+        self.opened_at = time.monotonic()
+
+    def p95(self) -> Optional[float]:
+        latencies = sorted(seconds for ok, seconds in self.calls if ok)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+class ProviderRouter:
+    """
+    Routes a model call across providers in priority order.
+
+    Each provider has a timeout and a circuit breaker, so a provider that is
+    down is skipped instead of costing a full timeout per request. With
+    ``hedge`` enabled, the next provider is started once the primary has
+    run for ``hedge_delay`` seconds (by default its observed p95 latency)
+    and whichever answers first wins.
+    """
+
+    def __init__(self, order: List[str], breakers: Dict[str, CircuitBreaker],
+                 timeouts: Dict[str, float], hedge: bool = False,
+                 hedge_delay: Optional[float] = None, default_hedge_delay: float = 2.0):
+        self.order = order
+        self.breakers = breakers
+        self.timeouts = timeouts
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.default_hedge_delay = default_hedge_delay
+
+    def available(self, provider: str) -> bool:
+        return self.breakers[provider].allow()
+
+    def record(self, provider: str, succeeded: bool, latency: float):
+        self.breakers[provider].record(succeeded, latency)
+
+    def release(self, provider: str):
+        self.breakers[provider].release()
+
+    async def _attempt(self, provider: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(call(), timeout=self.timeouts.get(provider))
+        except asyncio.CancelledError:
+            # Lost a hedge race; says nothing about the provider's health
+            self.release(provider)
+            raise
+        except Exception as e:
+            self.record(provider, False, time.monotonic() - started)
+            logger.warning(f"Provider {provider} failed: {type(e).__name__}: {str(e)}")
+            raise
+        self.record(provider, True, time.monotonic() - started)
+        return result
+
+    def _hedge_delay(self, provider: str) -> float:
+        if self.hedge_delay is not None:
+            return self.hedge_delay
+        p95 = self.breakers[provider].p95()
+        return p95 if p95 is not None else self.default_hedge_delay
+
+    def _next_available(self, pending: List[str]) -> Optional[str]:
+        # Breakers are only asked when a provider is about to be tried, so an
+        # unused provider never takes a half-open trial slot
+        while pending:
+            provider = pending.pop(0)
+            if self.available(provider):
+                return provider
+        return None
+
+    async def call(self, calls: Dict[str, Callable[[], Awaitable[Any]]]) -> Tuple[str, Any]:
+        """Run ``calls`` (provider name -> coroutine factory) and return (provider, result)."""
+        pending = [name for name in self.order if name in calls]
+        if self.hedge:
+            return await self._hedged(pending, calls)
+
+        last_error: Optional[Exception] = None
+        provider = self._next_available(pending)
+        while provider is not None:
+            try:
+                return provider, await self._attempt(provider, calls[provider])
+            except Exception as e:
+                last_error = e
+            provider = self._next_available(pending)
+        raise self._unavailable(last_error)
+
+    async def _hedged(self, pending: List[str], calls: Dict[str, Callable[[], Awaitable[Any]]]) -> Tuple[str, Any]:
+        primary = self._next_available(pending)
+        if primary is None:
+            raise self._unavailable(None)
+        running = {asyncio.create_task(self._attempt(primary, calls[primary])): primary}
+        last_error: Optional[Exception] = None
+        try:
+            while running:
+                timeout = self._hedge_delay(primary) if pending else None
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    provider = running.pop(task)
+                    if task.exception() is None:
+                        return provider, task.result()
+                    last_error = task.exception()
+
+                # Start the next provider on a hedge timeout or when everything running failed
+                if not done or not running:
+                    provider = self._next_available(pending)
+                    if provider is not None:
+                        logger.info(f"Hedging request to {provider}")
+                        running[asyncio.create_task(self._attempt(provider, calls[provider]))] = provider
+        finally:
+            for task in running:
+                task.cancel()
+        raise self._unavailable(last_error)
+
+    @staticmethod
+    def _unavailable(last_error: Optional[Exception]) -> ProviderUnavailable:
+        if last_error is None:
+            return ProviderUnavailable("All provider circuits are open")
+        error = ProviderUnavailable(f"All providers failed: {str(last_error)}")
+        error.__cause__ = last_error
+        return error
+
+def create_provider_router(routing_config: Dict) -> ProviderRouter:
+    order = routing_config.get('order', ['gemini', 'huggingface'])
+    provider_configs = routing_config.get('providers', {})
+    breakers = {}
+    timeouts = {}
+    for name in order:
+        settings = dict(provider_configs.get(name, {}))
+        timeouts[name] = settings.pop('timeout_seconds', None)
+        breakers[name] = CircuitBreaker(name, **settings)
+    return ProviderRouter(
+        order,
+        breakers,
+        timeouts,
+        hedge=routing_config.get('hedge', False),
+        hedge_delay=routing_config.get('hedge_delay_seconds'),
+        default_hedge_delay=routing_config.get('default_hedge_delay_seconds', 2.0)
+    )
@@ -0,0 +1,84 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_text(text: str) -> str:
+    """Case and whitespace differences do not change the answer to a question."""
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+class ResponseCache:
+    """
+    In-memory cache of model replies for repeated prompts.
+
+    Keys cover everything that shapes the reply: the mode, a hash of the
+    system prompt, the last ``history_tail`` messages and the message,
+    with case and whitespace normalized. Entries expire after
+    ``ttl_seconds`` and are evicted least-recently-used past
+    ``max_entries``.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 600, history_tail: int = 4):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.history_tail = history_tail
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def make_key(self, mode: str, system_prompt: str, history: List[Dict], message: str) -> str:
+        tail = history[-self.history_tail:] if self.history_tail > 0 else []
+        payload = json.dumps([
+            mode,
+            hashlib.sha256(system_prompt.encode('utf-8')).hexdigest(),
+            [[m['role'], normalize_text(m['content'])] for m in tail],
+            normalize_text(message)
+        ])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry['stored'] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry['response']
+
+    def put(self, key: str, response: str):
+        with self._lock:
+            self._entries[key] = {'response': response, 'stored': time.monotonic()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_bypass(self):
+        with self._lock:
+            self.bypasses += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'bypasses': self.bypasses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries
+            }
@@ -1,12 +1,33 @@
-def decide_action(state):
-    if "delete" in state.get("text", "").lower():
-        return "unsafe"
-    return "safe"
+import os
 
-def execute_action(state):
+import yaml
+
+from agent.safety_policy import SafetyPolicy
+
+CONFIG_PATH = os.getenv(
+    "SASHA_CONFIG",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "environment.yaml")
+)
+
+def load_policy(path: str = CONFIG_PATH) -> SafetyPolicy:
+    """The safety policy from the ``safety`` section of the app config."""
+    with open(path) as f:
+        config = yaml.safe_load(f) or {}
+    return SafetyPolicy.from_config(config.get('safety'))
+
+# Compiled once at import; classifying is a single pass over the text
+policy = load_policy()
+
+async def decide_action(state):
+    # Classifies the raw input, so it runs alongside retrieve_context rather than after it
+    classification = policy.classify(state.get("input", ""))
+    return {"decision": classification.label, "safety": classification.to_dict()}
+
+async def execute_action(state):
     print("Executing safe action:", state)
-    return state
+    return {"escalated": False}
 
-def escalate_to_king(state):
+async def escalate_to_king(state):
     print("Escalating to King:", state)
-    return state
+    # Which rules matched is already in state["safety"]
+    return {"escalated": True}
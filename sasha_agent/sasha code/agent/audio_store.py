@@ -0,0 +1,231 @@
+# Vendored from sasha_agent/audio_store.py; do not edit this copy.
+# Change the original and run `python vendor_shared.py` in sasha_agent.
+import logging
+import os
+import re
+import secrets
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 300
+DEFAULT_MAX_MEMORY_BYTES = 64 * 1024 * 1024
+ARTIFACT_SUFFIX = '.audio'
+SPILL_SUFFIX = '.tmp'
+_ARTIFACT_ID = re.compile(r'[A-Za-z0-9_-]{16,64}')
+
+class AudioArtifact:
+    """Synthesized audio handed to one client, reachable at ``url`` until ``expires_at``."""
+
+    __slots__ = ('id', 'data', 'content_type', 'expires_at', 'url')
+
+    def __init__(self, artifact_id: str, data: bytes, content_type: str, expires_at: float, url: str):
+        self.id = artifact_id
+        self.data = data
+        self.content_type = content_type
+        self.expires_at = expires_at
+        self.url = url
+
+    @property
+    def view(self) -> memoryview:
+        """Zero-copy view of the audio, for slicing into chunks or ranges."""
+        return memoryview(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def to_dict(self) -> Dict:
+        return {'id': self.id, 'url': self.url, 'bytes': len(self.data), 'expires_at': self.expires_at}
+
+class AudioStore:
+    """
+    Short-lived audio artifacts behind unguessable ids, instead of files
+    in the working directory.
+
+    Artifacts are kept in memory up to ``max_memory_bytes``. Past that the
+    least recently stored ones move to ``spill_directory`` when one is
+    configured, or are dropped when not. Every artifact expires
+    ``ttl_seconds`` after it was stored; expired ones are removed on access
+    and by a sweep that runs at most every ``gc_interval`` seconds from
+    ``put``. Spilled files carry their expiry as their mtime, so the sweep
+    also removes files left behind by a previous process, and processes
+    sharing the directory can serve each other's spilled artifacts. The
+    sweep also removes partial spill files a crashed process left behind,
+    once they are ``ttl_seconds`` old.
+
+    Spill files are written outside the lock; an artifact stays readable
+    from memory until its file is in place.
+    """
+
+    def __init__(self, max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES, spill_directory: Optional[str] = None,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS, gc_interval: float = 60,
+                 url_prefix: str = '/audio', content_type: str = 'audio/mpeg'):
+        self.max_memory_bytes = max_memory_bytes
+        self.spill_directory = spill_directory
+        self.ttl_seconds = ttl_seconds
+        self.gc_interval = gc_interval
+        self.url_prefix = url_prefix.rstrip('/')
+        self.content_type = content_type
+        self.spilled = 0
+        self.dropped = 0
+        self.expired = 0
+        # id -> (audio or None once spilled, expires_at)
+        self._entries: "OrderedDict[str, Tuple[Optional[bytes], float]]" = OrderedDict()
+        self._spilling: Dict[str, bytes] = {}
+        self._memory_bytes = 0
+        self._next_gc = 0.0
+        self._lock = threading.Lock()
+        if spill_directory:
+            os.makedirs(spill_directory, exist_ok=True)
+
+    def _path(self, artifact_id: str) -> str:
+        return os.path.join(self.spill_directory, artifact_id + ARTIFACT_SUFFIX)
+
+    def _url(self, artifact_id: str) -> str:
+        return f"{self.url_prefix}/{artifact_id}"
+
+    def put(self, audio: bytes, ttl_seconds: Optional[float] = None) -> AudioArtifact:
+        audio = bytes(audio)
+        artifact_id = secrets.token_urlsafe(16)
+        expires_at = time.time() + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        with self._lock:
+            self._entries[artifact_id] = (audio, expires_at)
+            self._memory_bytes += len(audio)
+            victims = self._select_victims()
+            collect = time.monotonic() >= self._next_gc
+            if collect:
+                self._next_gc = time.monotonic() + self.gc_interval
+        self._spill(victims)
+        if collect:
+            self.collect()
+        return AudioArtifact(artifact_id, audio, self.content_type, expires_at, self._url(artifact_id))
+
+    def _select_victims(self) -> List[Tuple[str, bytes, float]]:
+        # Oldest in-memory entries beyond the budget; they stay in memory until _spill replaces them
+        victims = []
+        over = self._memory_bytes - self.max_memory_bytes
+        for artifact_id, (audio, expires_at) in self._entries.items():
+            if over <= 0:
+                break
+            if audio is None:
+                continue
+            victims.append((artifact_id, audio, expires_at))
+            over -= len(audio)
+        for artifact_id, audio, _ in victims:
+            if self.spill_directory:
+                self._entries[artifact_id] = (None, self._entries[artifact_id][1])
+                # Still served from memory until the spill file is in place
+                self._spilling[artifact_id] = audio
+            else:
+                del self._entries[artifact_id]
+                self.dropped += 1
+            self._memory_bytes -= len(audio)
+        return victims if self.spill_directory else []
+
+    def _spill(self, victims: List[Tuple[str, bytes, float]]):
+        for artifact_id, audio, expires_at in victims:
+            try:
+                fd, tmp_path = tempfile.mkstemp(dir=self.spill_directory, suffix=SPILL_SUFFIX)
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(audio)
+                os.utime(tmp_path, (expires_at, expires_at))
+                os.replace(tmp_path, self._path(artifact_id))
+                with self._lock:
+                    self.spilled += 1
+            except OSError as e:
+                logger.warning(f"Could not spill audio artifact {artifact_id}: {str(e)}")
+                with self._lock:
+                    self._entries.pop(artifact_id, None)
+                    self.dropped += 1
+            finally:
+                with self._lock:
+                    self._spilling.pop(artifact_id, None)
+
+    def get(self, artifact_id: str) -> Optional[AudioArtifact]:
+        if not _ARTIFACT_ID.fullmatch(artifact_id):
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(artifact_id)
+            if entry is not None:
+                audio, expires_at = entry
+                if expires_at <= now:
+                    self._remove(artifact_id)
+                    self.expired += 1
+                    return None
+                if audio is None:
+                    audio = self._spilling.get(artifact_id)
+                if audio is not None:
+                    return AudioArtifact(artifact_id, audio, self.content_type, expires_at, self._url(artifact_id))
+        if not self.spill_directory:
+            return None
+        # Spilled here, or by another process sharing the directory
+        path = self._path(artifact_id)
+        try:
+            with open(path, 'rb') as f:
+                expires_at = os.fstat(f.fileno()).st_mtime
+                if expires_at <= now:
+                    return None
+                audio = f.read()
+        except FileNotFoundError:
+            return None
+        return AudioArtifact(artifact_id, audio, self.content_type, expires_at, self._url(artifact_id))
+
+    def _remove(self, artifact_id: str):
+        audio, _ = self._entries.pop(artifact_id)
+        if audio is not None:
+            self._memory_bytes -= len(audio)
+        elif self.spill_directory:
+            try:
+                os.remove(self._path(artifact_id))
+            except FileNotFoundError:
+                pass
+
+    def delete(self, artifact_id: str) -> bool:
+        with self._lock:
+            if artifact_id not in self._entries:
+                return False
+            self._remove(artifact_id)
+            return True
+
+    def collect(self) -> int:
+        """Remove expired artifacts from memory and the spill directory; returns how many were removed."""
+        now = time.time()
+        with self._lock:
+            stale = [artifact_id for artifact_id, (_, expires_at) in self._entries.items() if expires_at <= now]
+            for artifact_id in stale:
+                self._remove(artifact_id)
+            self.expired += len(stale)
+        removed = len(stale)
+        if self.spill_directory:
+            for name in os.listdir(self.spill_directory):
+                path = os.path.join(self.spill_directory, name)
+                try:
+                    if name.endswith(ARTIFACT_SUFFIX):
+                        expired = os.stat(path).st_mtime <= now
+                    elif name.endswith(SPILL_SUFFIX):
+                        # Written moments ago, or stamped with a future expiry just before its rename
+                        expired = os.stat(path).st_mtime <= now - self.ttl_seconds
+                    else:
+                        continue
+                    if expired:
+                        os.remove(path)
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'artifacts': len(self._entries),
+                'memory_bytes': self._memory_bytes,
+                'max_memory_bytes': self.max_memory_bytes,
+                'spilled': self.spilled,
+                'dropped': self.dropped,
+                'expired': self.expired
+            }
@@ -1,17 +1,32 @@
-from langgraph.graph import StateGraph, END
+from typing import Any, Dict, List, TypedDict
+from langgraph.graph import StateGraph, START, END
 from agent.memory import retrieve_memory
 from agent.actions import decide_action, execute_action, escalate_to_king
+from agent.graph_registry import get_graph, traced_node
 
-def build_graph():
-    graph = StateGraph()
-    graph.add_node("retrieve_context", retrieve_memory)
-    graph.add_node("decide_action", decide_action)
-    graph.add_node("execute_action", execute_action)
-    graph.add_node("escalate", escalate_to_king)
+class SashaState(TypedDict, total=False):
+    input: str
+    user_id: str
+    text: str
+    embedding: Any
+    memories: List[Dict]
+    decision: str
+    escalated: bool
+    safety: Dict
+
+def _compile():
+    graph = StateGraph(SashaState)
+    graph.add_node("retrieve_context", traced_node("retrieve_context", retrieve_memory))
+    graph.add_node("decide_action", traced_node("decide_action", decide_action))
+    graph.add_node("execute_action", traced_node("execute_action", execute_action))
+    graph.add_node("escalate", traced_node("escalate", escalate_to_king))
 
-    graph.set_entry_point("retrieve_context")
-    graph.add_edge("retrieve_context", "decide_action")
-    graph.add_conditional_edges("decide_action", {
+    # Memory lookup and the safety check both only need the input, so they run in parallel;
+    # the chosen action starts once both have finished
+    graph.add_edge(START, "retrieve_context")
+    graph.add_edge(START, "decide_action")
+    graph.add_edge("retrieve_context", END)
+    graph.add_conditional_edges("decide_action", lambda state: state["decision"], {
         "safe": "execute_action",
         "unsafe": "escalate"
     })
@@ -19,3 +34,7 @@ def build_graph():
     graph.add_edge("escalate", END)
 
     return graph.compile()
+
+def build_graph():
+    # Compiled once per process; invoke() and ainvoke() record a span per node
+    return get_graph("decision_graph", _compile)
@@ -0,0 +1,203 @@
+import asyncio
+import hashlib
+import os
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional
+
+import numpy as np
+
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+BACKENDS = ("torch", "int8", "onnx")
+
+def load_sentence_transformer(model_name: str, backend: str = "torch"):
+    """
+    Load a SentenceTransformer for CPU inference.
+
+    ``int8`` applies PyTorch dynamic quantization to the Linear layers,
+    which roughly halves CPU latency for MiniLM-sized models at a small
+    accuracy cost. ``onnx`` uses the ONNX Runtime backend of
+    sentence-transformers (3.2+, with ``optimum[onnxruntime]`` installed).
+    """
+    from sentence_transformers import SentenceTransformer
+    if backend == "onnx":
+        return SentenceTransformer(model_name, device="cpu", backend="onnx")
+    model = SentenceTransformer(model_name, device="cpu")
+    if backend == "int8":
+        import torch
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+class EmbeddingService:
+    """
+    Shared text embedder: lazy model load, LRU cache and micro-batching.
+
+    The model is loaded on first use. Texts are looked up in an LRU cache
+    keyed by their SHA-1 first; the rest go to a queue drained by one
+    worker thread, which waits up to ``batch_window`` seconds for more
+    requests and encodes up to ``max_batch_size`` texts in a single
+    ``encode`` call, so concurrent requests share one forward pass.
+    Vectors are L2-normalized float32.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_MODEL, backend: str = "torch", max_batch_size: int = 32,
+                 batch_window: float = 0.005, cache_size: int = 10000,
+                 loader: Optional[Callable[[], Any]] = None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown embedding backend {backend!r}; use one of {', '.join(BACKENDS)}")
+        self.model_name = model_name
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self.cache_size = cache_size
+        self.loader = loader or (lambda: load_sentence_transformer(model_name, backend))
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self.loader()
+        return self._model
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def _cached(self, key: str) -> Optional[np.ndarray]:
+        with self._cache_lock:
+            vector = self._cache.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def _store(self, key: str, vector: np.ndarray):
+        # Cached vectors are handed to every caller of the same text
+        vector.flags.writeable = False
+        with self._cache_lock:
+            self._cache[key] = vector
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            with self._worker_lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                    self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < self.max_batch_size:
+                    batch.append(self._queue.get(timeout=self.batch_window))
+            except queue.Empty:
+                pass
+            # A cancelled aembed() cancels its future; those texts are not encoded, and the
+            # rest can no longer be cancelled, so completing them below cannot fail
+            batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+            if batch:
+                self._complete(batch)
+
+    def _complete(self, batch):
+        try:
+            vectors = self._encode([text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (text, future), vector in zip(batch, vectors):
+            try:
+                self._store(self._key(text), vector)
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            future.set_result(vector)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        self.batches += 1
+        vectors = self.model.encode(texts, batch_size=len(texts), normalize_embeddings=True,
+                                    convert_to_numpy=True, show_progress_bar=False)
+        return np.asarray(vectors, dtype=np.float32)
+
+    def submit(self, text: str) -> Future:
+        """Queue ``text`` for the next batch; the future resolves to its vector."""
+        cached = self._cached(self._key(text))
+        if cached is not None:
+            future: Future = Future()
+            future.set_result(cached)
+            return future
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def embed(self, text: str) -> np.ndarray:
+        return self.submit(text).result()
+
+    async def aembed(self, text: str) -> np.ndarray:
+        return await asyncio.wrap_future(self.submit(text))
+
+    def embed_many(self, texts: List[str]) -> np.ndarray:
+        """Embed a list the caller already has in hand, as one encode call for the uncached texts."""
+        keys = [self._key(text) for text in texts]
+        vectors: List[Optional[np.ndarray]] = [self._cached(key) for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            encoded = self._encode([texts[i] for i in missing])
+            for i, vector in zip(missing, encoded):
+                self._store(keys[i], vector)
+                vectors[i] = vector
+        return np.stack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+
+    def stats(self) -> dict:
+        with self._cache_lock:
+            lookups = self.hits + self.misses
+            return {
+                'model': self.model_name,
+                'backend': self.backend,
+                'loaded': self._model is not None,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'batches': self.batches,
+                'cached': len(self._cache)
+            }
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def get_embedding_service() -> EmbeddingService:
+    """The process-wide service, configured from SASHA_EMBEDDING_* environment variables."""
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = EmbeddingService(
+                    model_name=os.getenv("SASHA_EMBEDDING_MODEL", DEFAULT_MODEL),
+                    backend=os.getenv("SASHA_EMBEDDING_BACKEND", "torch"),
+                    max_batch_size=int(os.getenv("SASHA_EMBEDDING_BATCH_SIZE", "32")),
+                    cache_size=int(os.getenv("SASHA_EMBEDDING_CACHE_SIZE", "10000"))
+                )
+    return _shared
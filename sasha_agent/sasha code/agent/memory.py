@@ -1,11 +1,48 @@
+import asyncio
 import os
-from google.cloud import firestore
-from sentence_transformers import SentenceTransformer
+import threading
+import uuid
+from agent.embeddings import get_embedding_service
+from agent.vector_store import VectorStore
 
-db = firestore.Client()
-embedder = SentenceTransformer("all-MiniLM-L6-v2")
+MEMORY_DIR = os.getenv("SASHA_MEMORY_DIR", os.path.join("data", "memory"))
+MEMORY_TOP_K = int(os.getenv("SASHA_MEMORY_TOP_K", "5"))
+MEMORY_MIN_SCORE = float(os.getenv("SASHA_MEMORY_MIN_SCORE", "0.3"))
 
-def retrieve_memory(state):
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    # Opened on first use; its dimension comes from the embedding model, which loads lazily too
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = VectorStore(MEMORY_DIR, dim=get_embedding_service().dimension)
+    return _store
+
+def remember(user_id, text, memory_id=None, metadata=None):
+    """Store a fact for the user; reusing a memory_id replaces that fact."""
+    memory_id = memory_id or str(uuid.uuid4())
+    embedding = get_embedding_service().embed(text)
+    get_store().upsert(user_id, memory_id, text, embedding, metadata)
+    return memory_id
+
+async def aremember(user_id, text, memory_id=None, metadata=None):
+    """remember() for async callers."""
+    memory_id = memory_id or str(uuid.uuid4())
+    embedding = await get_embedding_service().aembed(text)
+    store = await asyncio.to_thread(get_store)
+    await asyncio.to_thread(store.upsert, user_id, memory_id, text, embedding, metadata)
+    return memory_id
+
+async def retrieve_memory(state):
     text = state.get("input", "")
-    embedding = embedder.encode([text])[0]
-    return {"embedding": embedding, "text": text}
+    user_id = state.get("user_id", "default")
+    # Concurrent turns share one encode batch; the store search runs off the event loop
+    embedding = await get_embedding_service().aembed(text)
+    store = await asyncio.to_thread(get_store)
+    memories = await asyncio.to_thread(
+        store.search, user_id, embedding, k=MEMORY_TOP_K, min_score=MEMORY_MIN_SCORE
+    )
+    return {"embedding": embedding, "text": text, "memories": memories}
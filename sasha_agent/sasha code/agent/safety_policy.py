@@ -0,0 +1,117 @@
+# Vendored from sasha_agent/safety_policy.py; do not edit this copy.
+# Change the original and run `python vendor_shared.py` in sasha_agent.
+import re
+from typing import Dict, Iterable, List, Optional
+
+SEVERITIES = {'low': 1, 'medium': 2, 'high': 3, 'critical': 4}
+
+DEFAULT_RULES = [
+    {'pattern': 'delete', 'severity': 'high'},
+    {'pattern': 'remove', 'severity': 'high'},
+    {'pattern': 'drop', 'severity': 'high'},
+    {'pattern': 'destroy', 'severity': 'high'}
+]
+
+class SafetyRule:
+    def __init__(self, pattern: str, severity: str = 'high', whole_word: bool = True,
+                 category: Optional[str] = None):
+        if not pattern:
+            raise ValueError("Safety rules need a non-empty pattern")
+        if severity not in SEVERITIES:
+            raise ValueError(f"Unknown severity {severity!r} for rule {pattern!r}")
+        self.pattern = pattern.lower()
+        self.severity = severity
+        self.whole_word = whole_word
+        self.category = category
+
+    def to_dict(self) -> Dict:
+        return {'pattern': self.pattern, 'severity': self.severity, 'category': self.category}
+
+class Classification:
+    def __init__(self, matches: List[SafetyRule], escalate_at: int):
+        self.matches = matches
+        self.severity = max((r.severity for r in matches), key=SEVERITIES.get, default=None)
+        self.escalate = self.severity is not None and SEVERITIES[self.severity] >= escalate_at
+
+    @property
+    def label(self) -> str:
+        return "unsafe" if self.escalate else "safe"
+
+    def to_dict(self) -> Dict:
+        return {
+            'label': self.label,
+            'severity': self.severity,
+            'matches': [rule.to_dict() for rule in self.matches]
+        }
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """
+    Compile literals into one regex shaped like a trie, e.g. ``de(?:lete|stroy)``.
+
+    The regex engine then tries at most one branch per character at each
+    position, so matching costs O(len(text) * longest rule) rather than
+    O(len(text) * number of rules) for a flat alternation.
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def emit(node: Dict) -> str:
+        ends = '' in node
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if ends:
+            # Longer rules first; the shorter one is still found when they do not match
+            body = (body if len(branches) > 1 else '(?:' + body + ')') + '?'
+        return body
+
+    return emit(trie)
+
+class SafetyPolicy:
+    """
+    Classifies text against a rule set compiled once into a single regex.
+
+    Rules are literals, matched case-insensitively either as whole words
+    (the default) or anywhere in the text. A text is escalated when its
+    most severe match reaches ``escalate_severity``.
+    """
+
+    def __init__(self, rules: Iterable[SafetyRule], escalate_severity: str = 'high'):
+        self.rules: Dict[str, SafetyRule] = {}
+        for rule in rules:
+            existing = self.rules.get(rule.pattern)
+            # Duplicate patterns keep their most severe definition
+            if existing is None or SEVERITIES[rule.severity] > SEVERITIES[existing.severity]:
+                self.rules[rule.pattern] = rule
+        self.escalate_at = SEVERITIES[escalate_severity]
+
+        alternatives = []
+        words = [p for p, r in self.rules.items() if r.whole_word]
+        fragments = [p for p, r in self.rules.items() if not r.whole_word]
+        if words:
+            alternatives.append(r'(?<!\w)(?:' + _trie_pattern(words) + r')(?!\w)')
+        if fragments:
+            alternatives.append('(?:' + _trie_pattern(fragments) + ')')
+        self._matcher = re.compile('|'.join(alternatives), re.IGNORECASE) if alternatives else None
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict]) -> 'SafetyPolicy':
+        config = config or {}
+        rules = [SafetyRule(**rule) for rule in config.get('rules') or DEFAULT_RULES]
+        return cls(rules, escalate_severity=config.get('escalate_severity', 'high'))
+
+    def classify(self, text: str) -> Classification:
+        matches: List[SafetyRule] = []
+        if self._matcher is not None and text:
+            seen = set()
+            for match in self._matcher.finditer(text):
+                pattern = match.group(0).lower()
+                if pattern not in seen and pattern in self.rules:
+                    seen.add(pattern)
+                    matches.append(self.rules[pattern])
+        return Classification(matches, self.escalate_at)
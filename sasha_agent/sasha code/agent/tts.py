@@ -1,21 +1,54 @@
+import asyncio
+import os
+import threading
 from google.cloud import texttospeech
+from agent.audio_store import AudioStore
+from agent.tts_stream import split_sentences, synthesize_stream
 
-def speak(text, output_path="static/voice/sasha_output.mp3"):
-    client = texttospeech.TextToSpeechClient()
-    synthesis_input = texttospeech.SynthesisInput(text=text)
-    voice = texttospeech.VoiceSelectionParams(
-        language_code="en-US",
-        name="en-US-Wavenet-F",
-        ssml_gender=texttospeech.SsmlVoiceGender.FEMALE
-    )
-    audio_config = texttospeech.AudioConfig(
-        audio_encoding=texttospeech.AudioEncoding.MP3
-    )
-    response = client.synthesize_speech(
-        input=synthesis_input,
-        voice=voice,
-        audio_config=audio_config
+VOICE = texttospeech.VoiceSelectionParams(
+    language_code="en-US",
+    name="en-US-Wavenet-F",
+    ssml_gender=texttospeech.SsmlVoiceGender.FEMALE
+)
+AUDIO_CONFIG = texttospeech.AudioConfig(
+    audio_encoding=texttospeech.AudioEncoding.MP3
+)
+
+# Replies are served from /audio/{id} for a few minutes instead of one shared file on disk
+audio_store = AudioStore(
+    max_memory_bytes=int(os.getenv("SASHA_AUDIO_MEMORY_BYTES", str(64 * 1024 * 1024))),
+    spill_directory=os.getenv("SASHA_AUDIO_SPILL_DIR") or None,
+    ttl_seconds=float(os.getenv("SASHA_AUDIO_TTL_SECONDS", "300"))
+)
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    # One client for the process; it is thread-safe and opening its channel is the slow part
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = texttospeech.TextToSpeechClient()
+    return _client
+
+def synthesize(text):
+    response = get_client().synthesize_speech(
+        input=texttospeech.SynthesisInput(text=text),
+        voice=VOICE,
+        audio_config=AUDIO_CONFIG
     )
-    with open(output_path, "wb") as out:
-        out.write(response.audio_content)
-    return output_path
+    return response.audio_content
+
+def speak(text):
+    """Synthesize text and return the stored AudioArtifact; its url is valid until it expires."""
+    return audio_store.put(synthesize(text))
+
+async def speak_stream(text, lookahead=3):
+    """Yield MP3 audio for text one sentence at a time, synthesizing up to lookahead sentences at once."""
+    async def synthesize_chunk(chunk):
+        return await asyncio.to_thread(synthesize, chunk)
+
+    async for audio in synthesize_stream(split_sentences(text), synthesize_chunk, lookahead=lookahead):
+        yield audio
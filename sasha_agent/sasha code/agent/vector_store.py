@@ -0,0 +1,195 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+VECTORS_FILE = "vectors.f32"
+RECORDS_FILE = "records.jsonl"
+
+class VectorStore:
+    """
+    Long-term memory index: one vector per (user, memory id), searched per user.
+
+    Vectors live in a float32 file opened with ``np.memmap``, so they are
+    paged in by the OS instead of loaded up front and a write only touches
+    its own row. Records (user, id, text, metadata, row) are appended to a
+    JSONL log; replaying it on open rebuilds the per-user row lists. An
+    upsert writes the vector row first and the record line second, so a
+    crash in between leaves an unreferenced row rather than a record
+    pointing at garbage. ``compact`` rewrites the log without superseded
+    and deleted records.
+
+    Vectors are L2-normalized on write, so search scores are cosine
+    similarities.
+    """
+
+    def __init__(self, directory: str, dim: int = 384, initial_capacity: int = 1024):
+        self.directory = directory
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._records: Dict[Tuple[str, str], Dict] = {}
+        self._user_rows: Dict[str, Dict[str, int]] = {}
+        # user -> (memory ids, row numbers) for search, rebuilt after the user's next write
+        self._user_index: Dict[str, Tuple[List[str], np.ndarray]] = {}
+        self._free_rows: List[int] = []
+        self._size = 0
+        os.makedirs(directory, exist_ok=True)
+        self._vectors_path = os.path.join(directory, VECTORS_FILE)
+        self._records_path = os.path.join(directory, RECORDS_FILE)
+
+        capacity = initial_capacity
+        if os.path.exists(self._vectors_path):
+            capacity = max(capacity, os.path.getsize(self._vectors_path) // (4 * dim))
+        self._open_vectors(capacity)
+        self._replay()
+        self._log = open(self._records_path, 'a', encoding='utf-8')
+
+    def _open_vectors(self, capacity: int):
+        # Grow the file first; memmap cannot extend a file opened in r+ mode
+        with open(self._vectors_path, 'ab') as f:
+            f.truncate(max(os.path.getsize(self._vectors_path), capacity * self.dim * 4))
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode='r+', shape=(capacity, self.dim))
+        self.capacity = capacity
+
+    def _replay(self):
+        if not os.path.exists(self._records_path):
+            return
+        with open(self._records_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash; everything before it is intact
+                    continue
+                self._apply(record)
+        used = {row for rows in self._user_rows.values() for row in rows.values()}
+        self._size = max(used) + 1 if used else 0
+        self._free_rows = sorted(set(range(self._size)) - used, reverse=True)
+
+    def _apply(self, record: Dict):
+        key = (record['user_id'], record['id'])
+        rows = self._user_rows.setdefault(record['user_id'], {})
+        self._user_index.pop(record['user_id'], None)
+        if record.get('deleted'):
+            self._records.pop(key, None)
+            rows.pop(record['id'], None)
+            return
+        self._records[key] = record
+        rows[record['id']] = record['row']
+
+    def _append(self, record: Dict):
+        self._log.write(json.dumps(record) + "\n")
+        self._log.flush()
+
+    def _allocate_row(self) -> int:
+        if self._free_rows:
+            return self._free_rows.pop()
+        if self._size == self.capacity:
+            self._vectors.flush()
+            self._open_vectors(self.capacity * 2)
+        row = self._size
+        self._size += 1
+        return row
+
+    def upsert(self, user_id: str, memory_id: str, text: str, vector, metadata: Optional[Dict] = None):
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if vector.shape[0] != self.dim:
+            raise ValueError(f"Expected a {self.dim}-dimensional vector, got {vector.shape[0]}")
+        norm = np.linalg.norm(vector)
+        with self._lock:
+            existing = self._records.get((user_id, memory_id))
+            # Overwrite a new row and retire the old one, so the old record stays valid until replaced
+            row = self._allocate_row()
+            self._vectors[row] = vector / norm if norm > 0 else vector
+            record = {
+                'user_id': user_id,
+                'id': memory_id,
+                'row': row,
+                'text': text,
+                'metadata': metadata or {},
+                'updated_at': time.time()
+            }
+            self._append(record)
+            self._apply(record)
+            if existing is not None:
+                self._free_rows.append(existing['row'])
+
+    def delete(self, user_id: str, memory_id: str) -> bool:
+        with self._lock:
+            existing = self._records.get((user_id, memory_id))
+            if existing is None:
+                return False
+            record = {'user_id': user_id, 'id': memory_id, 'deleted': True}
+            self._append(record)
+            self._apply(record)
+            self._free_rows.append(existing['row'])
+            return True
+
+    def search(self, user_id: str, vector, k: int = 5, min_score: Optional[float] = None) -> List[Dict]:
+        """The user's ``k`` memories most similar to ``vector``, best first."""
+        query = np.asarray(vector, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+        with self._lock:
+            rows = self._user_rows.get(user_id)
+            if not rows or k <= 0:
+                return []
+            index = self._user_index.get(user_id)
+            if index is None:
+                index = (list(rows.keys()), np.fromiter(rows.values(), dtype=np.int64, count=len(rows)))
+                self._user_index[user_id] = index
+            ids, row_numbers = index
+            if len(ids) * 4 > self._size:
+                # Scoring every row in place is cheaper than gathering most of them first
+                scores = (self._vectors[:self._size] @ query)[row_numbers]
+            else:
+                scores = self._vectors[row_numbers] @ query
+            top = np.argpartition(-scores, k - 1)[:k] if len(ids) > k else np.arange(len(ids))
+            top = top[np.argsort(-scores[top])]
+            results = []
+            for position in top:
+                score = float(scores[position])
+                if min_score is not None and score < min_score:
+                    break
+                record = self._records[(user_id, ids[position])]
+                results.append({
+                    'id': record['id'],
+                    'text': record['text'],
+                    'metadata': record['metadata'],
+                    'score': score
+                })
+            return results
+
+    def count(self, user_id: Optional[str] = None) -> int:
+        with self._lock:
+            if user_id is None:
+                return len(self._records)
+            return len(self._user_rows.get(user_id, {}))
+
+    def compact(self):
+        """Rewrite the record log with only live records."""
+        with self._lock:
+            self._vectors.flush()
+            temp_path = self._records_path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                for record in self._records.values():
+                    f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._log.close()
+            os.replace(temp_path, self._records_path)
+            self._log = open(self._records_path, 'a', encoding='utf-8')
+
+    def flush(self):
+        with self._lock:
+            self._vectors.flush()
+            self._log.flush()
+
+    def close(self):
+        with self._lock:
+            self._vectors.flush()
+            self._log.close()
@@ -0,0 +1,80 @@
+"""
+CPU throughput of the memory embedder, in embeddings per second.
+
+For each backend it loads the model once, warms it up and then encodes
+``--texts`` distinct sentences in batches of each ``--batch-sizes`` value
+(batch size 1 is what ``memory.py`` did before the embedding service).
+With ``--concurrency`` it also sends the same sentences one at a time from
+that many threads through ``EmbeddingService``, showing what the
+micro-batching queue recovers for callers that cannot batch themselves.
+The service cache is not exercised; every sentence is unique.
+
+Run from the "sasha code" directory:
+
+    python benchmarks/embedding_benchmark.py --backends torch int8 onnx
+
+Measured on 2026-10-18 on one CPU core (torch 2.14, sentence-transformers
+6.1, 512 texts, embeddings/sec, two runs). The weights could not be
+downloaded there, so ``--model`` pointed at a randomly initialised model
+of the same shape (6 layers, 384 hidden, 22.7M parameters). That shape
+sets the cost, not the weights:
+
+    batch          1        8       32      128   queue (32 threads)
+    torch      43-49  137-138  148-150  148-153  161-172
+    int8       73-89  226-305  278-342  220-230  244-283
+
+Batching gives about 3x over one text per call, and int8 roughly doubles
+that up to batch 32 (about 1.5x at 128). ONNX Runtime was not installed.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.embeddings import BACKENDS, DEFAULT_MODEL, EmbeddingService, load_sentence_transformer
+
+def sentences(count: int):
+    return [f"Memory {i}: the user mentioned item number {i * 7919 % 10007} on day {i % 365}." for i in range(count)]
+
+def encode_rate(model, texts, batch_size: int) -> float:
+    started = time.perf_counter()
+    for start in range(0, len(texts), batch_size):
+        model.encode(texts[start:start + batch_size], batch_size=batch_size,
+                     normalize_embeddings=True, convert_to_numpy=True, show_progress_bar=False)
+    return len(texts) / (time.perf_counter() - started)
+
+def service_rate(model, texts, concurrency: int, max_batch_size: int) -> float:
+    service = EmbeddingService(max_batch_size=max_batch_size, cache_size=0, loader=lambda: model)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        started = time.perf_counter()
+        list(pool.map(service.embed, texts))
+        return len(texts) / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=["torch", "int8"])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--concurrency", type=int, default=32, help="Threads for the service run; 0 skips it")
+    args = parser.parse_args()
+
+    texts = sentences(args.texts)
+    print(f"{'backend':>8} {'batch':>6} {'emb/s':>9}")
+    for backend in args.backends:
+        started = time.perf_counter()
+        model = load_sentence_transformer(args.model, backend)
+        load_seconds = time.perf_counter() - started
+        model.encode(texts[:8], show_progress_bar=False)
+        for batch_size in args.batch_sizes:
+            print(f"{backend:>8} {batch_size:>6} {encode_rate(model, texts, batch_size):>9.1f}")
+        if args.concurrency:
+            rate = service_rate(model, texts, args.concurrency, max(args.batch_sizes))
+            print(f"{backend:>8} {'queue':>6} {rate:>9.1f}  ({args.concurrency} threads, one text each)")
+        print(f"{backend:>8} loaded in {load_seconds:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
-from fastapi import FastAPI, Request
+import asyncio
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
 from agent.sasha_prompt import system_prompt
-from agent.tts import speak
+from agent.tts import audio_store, speak, speak_stream
 from agent.decision_graph import build_graph
+from agent.graph_registry import tracer
+from agent.memory import aremember
 
 app = FastAPI()
 graph = build_graph()
@@ -14,6 +18,30 @@ def welcome():
 async def chat(request: Request):
     data = await request.json()
     message = data.get("message", "")
-    result = graph.invoke({"input": message})
-    voice_path = speak(message)
-    return {"response": "Action processed.", "voice": voice_path}
+    user_id = data.get("user_id", "default")
+    result = await graph.ainvoke({"input": message, "user_id": user_id})
+    # Later turns can recall this one through retrieve_context
+    await aremember(user_id, message, metadata={"source": "chat"})
+    audio = await asyncio.to_thread(speak, message)
+    return {"response": "Action processed.", "voice": audio.url}
+
+@app.get("/audio/{artifact_id}")
+def get_audio(artifact_id: str):
+    artifact = audio_store.get(artifact_id)
+    if artifact is None:
+        raise HTTPException(status_code=404, detail="Audio not found or expired")
+    return Response(content=artifact.data, media_type=artifact.content_type)
+
+@app.post("/speak/stream")
+async def speak_streaming(request: Request):
+    data = await request.json()
+    text = data.get("text", "")
+    if not text.strip():
+        raise HTTPException(status_code=422, detail="text must not be empty")
+    # Audio starts after the first sentence instead of after the whole reply
+    return StreamingResponse(speak_stream(text), media_type="audio/mpeg")
+
+@app.get("/graph/traces")
+def graph_traces(limit: int = 20):
+    # Per-node spans show whether retrieve_context (embedding) or the action nodes dominate
+    return {"spans": tracer.export(limit), "summary": tracer.summary()}
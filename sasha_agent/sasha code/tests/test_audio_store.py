@@ -0,0 +1,34 @@
+import os
+import time
+
+from agent.audio_store import AudioStore
+
+def test_put_returns_artifact_served_by_url():
+    store = AudioStore()
+    artifact = store.put(b"mp3 bytes")
+    assert artifact.url == f"/audio/{artifact.id}"
+    assert store.get(artifact.id).data == b"mp3 bytes"
+    assert store.get("../../etc/passwd") is None
+
+def test_expired_artifacts_are_not_served():
+    store = AudioStore()
+    artifact = store.put(b"short lived", ttl_seconds=-1)
+    assert store.get(artifact.id) is None
+    assert store.stats()["expired"] == 1
+
+def test_overflow_spills_to_disk_and_is_shared(tmp_path):
+    store = AudioStore(max_memory_bytes=10, spill_directory=str(tmp_path))
+    first = store.put(b"aaaaaa")
+    store.put(b"bbbbbb")
+    assert os.path.exists(tmp_path / f"{first.id}.audio")
+    assert store.get(first.id).data == b"aaaaaa"
+    # Another worker of the deployable sharing the directory can serve it too
+    assert AudioStore(spill_directory=str(tmp_path)).get(first.id).data == b"aaaaaa"
+
+def test_collect_removes_expired_spill_files(tmp_path):
+    leftover = tmp_path / "leftover-from-a-crashed-process.audio"
+    leftover.write_bytes(b"old")
+    os.utime(leftover, (time.time() - 1, time.time() - 1))
+
+    assert AudioStore(spill_directory=str(tmp_path)).collect() == 1
+    assert os.listdir(tmp_path) == []
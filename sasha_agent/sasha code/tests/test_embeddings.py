@@ -0,0 +1,149 @@
+import asyncio
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from agent.embeddings import EmbeddingService
+
+class FakeModel:
+    def __init__(self, dim=8, fail=False):
+        self.dim = dim
+        self.fail = fail
+        self.calls = []
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        if self.fail:
+            raise RuntimeError("model exploded")
+        vectors = np.array([[len(t)] + [hash(t) % 97] * (self.dim - 1) for t in texts], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def _service(model, **kwargs):
+    loads = []
+    def loader():
+        loads.append(1)
+        return model
+    return EmbeddingService(loader=loader, **kwargs), loads
+
+def test_model_loads_lazily_once():
+    model = FakeModel(dim=12)
+    service, loads = _service(model)
+    assert loads == []
+    assert service.dimension == 12
+    service.embed("hello")
+    assert loads == [1]
+
+def test_concurrent_requests_share_one_encode_call():
+    model = FakeModel()
+    service, _ = _service(model, batch_window=0.2, max_batch_size=64)
+    service.model
+    barrier = threading.Barrier(16)
+    results = {}
+
+    def worker(i):
+        barrier.wait()
+        results[i] = service.embed(f"text {i}")
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(model.calls) == 1
+    assert sorted(model.calls[0]) == sorted(f"text {i}" for i in range(16))
+    assert all(results[i].shape == (8,) for i in range(16))
+
+def test_batches_are_capped_at_max_batch_size():
+    model = FakeModel()
+    service, _ = _service(model, batch_window=0.2, max_batch_size=4)
+    futures = [service.submit(f"text {i}") for i in range(10)]
+    for future in futures:
+        future.result()
+    assert [len(call) for call in model.calls] == [4, 4, 2]
+
+def test_cache_hits_skip_the_model_and_evict_lru():
+    model = FakeModel()
+    service, _ = _service(model, cache_size=2)
+    first = service.embed("a")
+    assert service.embed("a") is first
+    assert len(model.calls) == 1
+    assert not first.flags.writeable
+
+    service.embed("b")
+    service.embed("a")
+    service.embed("c")
+    service.embed("b")
+    assert model.calls[-1] == ["b"]
+    stats = service.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 4 and stats["cached"] == 2
+
+def test_embed_many_encodes_only_uncached_texts():
+    model = FakeModel()
+    service, _ = _service(model)
+    service.embed("a")
+    vectors = service.embed_many(["a", "b", "c"])
+    assert vectors.shape == (3, 8)
+    assert model.calls[-1] == ["b", "c"]
+
+def test_encode_errors_reach_every_caller():
+    service, _ = _service(FakeModel(fail=True), batch_window=0.1)
+    futures = [service.submit(f"text {i}") for i in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="exploded"):
+            future.result()
+    assert service.stats()["cached"] == 0
+
+class GatedModel(FakeModel):
+    """Holds the first encode call until ``release`` is set."""
+
+    def __init__(self):
+        super().__init__()
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def encode(self, texts, **kwargs):
+        self.started.set()
+        self.release.wait(5)
+        return super().encode(texts, **kwargs)
+
+def test_cancelled_callers_do_not_stop_the_worker():
+    model = GatedModel()
+    service, _ = _service(model)
+
+    async def run():
+        running = asyncio.create_task(service.aembed("running"))
+        await asyncio.to_thread(model.started.wait, 5)
+        queued = asyncio.create_task(service.aembed("queued"))
+        await asyncio.sleep(0)
+        # Cancelled while its text is being encoded, and while its text is still queued
+        running.cancel()
+        queued.cancel()
+        model.release.set()
+        later = await asyncio.wait_for(service.aembed("later"), timeout=5)
+        return running.cancelled(), queued.cancelled(), later
+
+    running_cancelled, queued_cancelled, later = asyncio.run(run())
+    assert running_cancelled and queued_cancelled
+    assert later.shape == (8,)
+    assert service.embed("another").shape == (8,)
+    assert ["queued"] not in model.calls
+    assert service._worker.is_alive()
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_a_dead_worker_is_restarted():
+    service, _ = _service(FakeModel())
+    service.embed("a")
+    service._queue.put(None)  # Not a (text, future) pair: the worker thread dies on it
+    service._worker.join(5)
+    assert not service._worker.is_alive()
+    assert service.embed("b").shape == (8,)
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        EmbeddingService(backend="tpu")
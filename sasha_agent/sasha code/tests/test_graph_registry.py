@@ -0,0 +1,71 @@
+import asyncio
+from typing import TypedDict
+
+import pytest
+
+from agent.graph_registry import GraphRegistry, GraphTracer
+
+class _State(TypedDict, total=False):
+    input: str
+    text: str
+    decision: str
+
+def _compile(tracer):
+    graph_module = pytest.importorskip("langgraph.graph")
+    graph = graph_module.StateGraph(_State)
+
+    async def retrieve_context(state):
+        await asyncio.sleep(0)
+        return {"text": state["input"].upper()}
+
+    async def decide_action(state):
+        return {"decision": "safe"}
+
+    graph.add_node("retrieve_context", tracer.node("retrieve_context", retrieve_context))
+    graph.add_node("decide_action", tracer.node("decide_action", decide_action))
+    graph.add_edge(graph_module.START, "retrieve_context")
+    graph.add_edge(graph_module.START, "decide_action")
+    graph.add_edge("retrieve_context", graph_module.END)
+    graph.add_edge("decide_action", graph_module.END)
+    return graph.compile()
+
+def test_compiled_once_and_traced_per_node():
+    tracer = GraphTracer()
+    registry = GraphRegistry(tracer)
+    builds = []
+
+    def builder():
+        builds.append(1)
+        return _compile(tracer)
+
+    graph = registry.get("decision_graph", builder)
+    assert registry.get("decision_graph", builder) is graph
+    assert len(builds) == 1
+
+    result = asyncio.run(graph.ainvoke({"input": "hi"}))
+    assert result == {"input": "hi", "text": "HI", "decision": "safe"}
+
+    spans = tracer.export()
+    assert spans[0]["name"] == "invoke"
+    assert sorted(span["name"] for span in spans[1:]) == ["decide_action", "retrieve_context"]
+    assert {span["trace_id"] for span in spans} == {spans[0]["trace_id"]}
+    assert all(span["parent_id"] == spans[0]["span_id"] for span in spans[1:])
+    assert tracer.summary()["decision_graph.retrieve_context"]["count"] == 1
+
+def test_failing_node_is_recorded_and_reraised():
+    tracer = GraphTracer()
+    seen = []
+    tracer.add_listener(seen.append)
+
+    async def broken(state):
+        raise ValueError("no memory store")
+
+    class Graph:
+        async def ainvoke(self, state):
+            return await tracer.node("retrieve_context", broken)(state)
+
+    graph = GraphRegistry(tracer).get("g", Graph)
+    with pytest.raises(ValueError):
+        asyncio.run(graph.ainvoke({"input": "hi"}))
+
+    assert [(span["name"], span["status"]) for span in seen] == [("retrieve_context", "error"), ("invoke", "error")]
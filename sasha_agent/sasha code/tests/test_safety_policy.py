@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from agent.actions import CONFIG_PATH, decide_action, escalate_to_king, load_policy, policy
+from agent.safety_policy import SafetyPolicy, SafetyRule
+
+def test_whole_words_and_fragments():
+    policy = SafetyPolicy([
+        SafetyRule('drop', 'high'),
+        SafetyRule('rm -rf', 'critical'),
+        SafetyRule('passw', 'medium', whole_word=False)
+    ])
+
+    assert policy.classify("Please DROP the staging table").label == "unsafe"
+    assert policy.classify("Open the dropdown menu").label == "safe"
+    assert policy.classify("run rm -rf / now").severity == "critical"
+    assert [r.pattern for r in policy.classify("my Passwords file").matches] == ['passw']
+
+def test_escalation_threshold_and_validation():
+    policy = SafetyPolicy(
+        [SafetyRule('shutdown', 'medium'), SafetyRule('wipe', 'critical')],
+        escalate_severity='critical'
+    )
+
+    assert policy.classify("shutdown the laptop").label == "safe"
+    assert policy.classify("shutdown and wipe it").label == "unsafe"
+    with pytest.raises(ValueError):
+        SafetyRule('wipe', 'severe')
+
+def test_actions_classify_once_and_escalate_with_the_matches():
+    state = {"input": "delete my account"}
+    decision = asyncio.run(decide_action(state))
+    assert decision["decision"] == "unsafe"
+    assert [match["pattern"] for match in decision["safety"]["matches"]] == ["delete"]
+
+    assert asyncio.run(escalate_to_king({**state, **decision})) == {"escalated": True}
+    assert asyncio.run(decide_action({"input": "tell me a joke"}))["decision"] == "safe"
+
+def test_rules_come_from_the_app_config(tmp_path):
+    config = tmp_path / "environment.yaml"
+    config.write_text(
+        "safety:\n"
+        "  escalate_severity: medium\n"
+        "  rules:\n"
+        "    - {pattern: deploy, severity: medium, category: release}\n"
+    )
+
+    custom = load_policy(str(config))
+    assert custom.classify("deploy to production").label == "unsafe"
+    assert custom.classify("delete the draft").label == "safe"
+
+    # The shipped config goes beyond the built-in defaults
+    shipped = load_policy(CONFIG_PATH)
+    assert shipped.classify("rm -rf the cache").severity == "critical"
+    assert policy.classify("shutdown the laptop").severity == "medium"
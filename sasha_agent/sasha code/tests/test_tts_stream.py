@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from agent.tts_stream import split_sentences, synthesize_stream
+
+def test_split_at_sentence_boundaries():
+    text = 'Hello King, how was your day? Use a cache, e.g. the audio cache. She said "done." Then it shipped.'
+    assert split_sentences(text, min_chars=1) == [
+        "Hello King, how was your day?",
+        "Use a cache, e.g. the audio cache.",
+        'She said "done."',
+        "Then it shipped."
+    ]
+    assert split_sentences("Okay. Sure. Here is the full plan for today.", min_chars=20) == [
+        "Okay. Sure. Here is the full plan for today."
+    ]
+
+async def _settle():
+    # Let the scheduled synthesis tasks run up to their next wait
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_stream_keeps_order_and_only_requests_the_lookahead():
+    requested = []
+    release = {}
+
+    async def synthesize(chunk):
+        requested.append(chunk)
+        release[chunk] = asyncio.Event()
+        await release[chunk].wait()
+        return chunk.encode()
+
+    async def run():
+        stream = synthesize_stream(["one", "two", "three"], synthesize, lookahead=2)
+        first = asyncio.ensure_future(stream.__anext__())
+        await _settle()
+        assert requested == ["one", "two"]
+        # A later chunk finishing first still waits for the earlier one
+        release["two"].set()
+        await _settle()
+        assert not first.done()
+        release["one"].set()
+        received = [await first]
+        await _settle()
+        release["three"].set()
+        received += [audio async for audio in stream]
+        return received
+
+    assert asyncio.run(run()) == [b"one", b"two", b"three"]
+
+def test_closing_the_stream_cancels_pending_chunks():
+    cancelled = []
+
+    async def synthesize(chunk):
+        try:
+            await asyncio.sleep(0 if chunk == "a" else 1)
+        except asyncio.CancelledError:
+            cancelled.append(chunk)
+            raise
+        return chunk.encode()
+
+    async def run():
+        stream = synthesize_stream(["a", "b", "c"], synthesize, lookahead=3)
+        assert await stream.__anext__() == b"a"
+        await stream.aclose()
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert sorted(cancelled) == ["b", "c"]
+
+def test_speak_stream_synthesizes_sentence_by_sentence(monkeypatch):
+    pytest.importorskip("google.cloud.texttospeech")
+    from agent import tts
+
+    monkeypatch.setattr(tts, "synthesize", lambda text: text.encode())
+
+    async def run():
+        return [audio async for audio in tts.speak_stream("Good morning, my King. The deploy is green.")]
+
+    # Each sentence is long enough to be synthesized on its own
+    assert asyncio.run(run()) == [b"Good morning, my King.", b"The deploy is green."]
@@ -0,0 +1,72 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from agent.vector_store import VectorStore
+
+def _vector(seed, dim=16):
+    return np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+
+def test_search_is_per_user_and_ranked(tmp_path):
+    store = VectorStore(str(tmp_path), dim=16)
+    store.upsert("king", "coffee", "Takes his coffee black", _vector(1))
+    store.upsert("king", "city", "Lives in Atlanta", _vector(2))
+    store.upsert("guest", "coffee", "Prefers tea", _vector(1))
+
+    results = store.search("king", _vector(1) + 0.1 * _vector(3), k=2)
+    assert [r["id"] for r in results] == ["coffee", "city"]
+    assert results[0]["score"] > 0.9
+    assert [r["text"] for r in store.search("guest", _vector(1), k=5)] == ["Prefers tea"]
+    assert store.search("nobody", _vector(1)) == []
+
+def test_upsert_replaces_and_delete_removes(tmp_path):
+    store = VectorStore(str(tmp_path), dim=16)
+    store.upsert("king", "city", "Lives in Atlanta", _vector(2))
+    store.upsert("king", "city", "Moved to Miami", _vector(4))
+
+    assert store.count("king") == 1
+    assert store.search("king", _vector(4), k=1)[0]["text"] == "Moved to Miami"
+    assert store.delete("king", "city")
+    assert not store.delete("king", "city")
+    assert store.search("king", _vector(4)) == []
+
+def test_reopen_replays_incremental_writes(tmp_path):
+    store = VectorStore(str(tmp_path), dim=16, initial_capacity=2)
+    for i in range(10):
+        store.upsert("king", f"fact-{i}", f"fact {i}", _vector(i), {"turn": i})
+    store.upsert("king", "fact-3", "fact 3, corrected", _vector(3))
+    store.delete("king", "fact-7")
+    store.close()
+
+    reopened = VectorStore(str(tmp_path), dim=16)
+    assert reopened.count("king") == 9
+    assert reopened.capacity >= 10
+    best = reopened.search("king", _vector(3), k=1)[0]
+    assert (best["text"], best["metadata"]) == ("fact 3, corrected", {})
+    assert reopened.search("king", _vector(5), k=1)[0]["metadata"] == {"turn": 5}
+
+    reopened.compact()
+    reopened.close()
+    assert VectorStore(str(tmp_path), dim=16).count("king") == 9
+
+def test_search_over_many_vectors_matches_brute_force(tmp_path):
+    store = VectorStore(str(tmp_path), dim=384, initial_capacity=20000)
+    vectors = np.random.default_rng(0).standard_normal((10000, 384)).astype(np.float32)
+    for i, vector in enumerate(vectors):
+        store.upsert("king" if i % 2 == 0 else "guest", str(i), f"fact {i}", vector)
+
+    query = vectors[42] + 0.5 * vectors[7]
+    results = store.search("king", query, k=5)
+
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = normalized[0::2] @ (query / np.linalg.norm(query))
+    expected = [str(2 * i) for i in np.argsort(-scores)[:5]]
+    assert [r["id"] for r in results] == expected
+    assert results[0]["id"] == "42"
+
+    # The per-user index is built once and reused until the user's next write
+    index = store._user_index["king"]
+    store.search("king", vectors[0], k=5)
+    assert store._user_index["king"] is index
+    store.upsert("king", "new", "a new fact", vectors[1])
+    assert "king" not in store._user_index
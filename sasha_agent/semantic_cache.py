@@ -0,0 +1,135 @@
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from typing import Dict, Optional
+
+import numpy as np
+
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+class SemanticCache:
+    """
+    Replies to earlier questions, found by embedding similarity.
+
+    Vectors are kept L2-normalized in one preallocated matrix, so a lookup
+    is a single matrix-vector product over the filled slots. Entries live
+    in a partition (mode, system prompt and recent history) and only match
+    questions from the same partition; the best match at or above
+    ``threshold`` cosine similarity is a hit. Past ``max_entries`` the
+    least recently used slot is reused, and entries expire after
+    ``ttl_seconds``.
+
+    The last ``sample_size`` hits are kept with their similarity so the
+    threshold can be checked against what was actually served.
+    """
+
+    def __init__(self, dim: int, max_entries: int = 5000, threshold: float = 0.92,
+                 ttl_seconds: float = 3600, sample_size: int = 200):
+        self.dim = dim
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.recent_hits = deque(maxlen=sample_size)
+        self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self._partitions = np.zeros(max_entries, dtype=np.int64)
+        self._live = np.zeros(max_entries, dtype=bool)
+        self._entries: Dict[int, Dict] = {}
+        self._lru: "OrderedDict[int, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _partition_id(partition: str) -> int:
+        return zlib.crc32(partition.encode('utf-8'))
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _release(self, slot: int):
+        self._live[slot] = False
+        self._entries.pop(slot, None)
+        self._lru.pop(slot, None)
+
+    def lookup(self, partition: str, question: str, vector) -> Optional[str]:
+        vector = self._normalize(vector)
+        partition_id = self._partition_id(partition)
+        with self._lock:
+            candidates = np.flatnonzero(self._live & (self._partitions == partition_id))
+            best = None
+            if candidates.size:
+                scores = self._vectors[candidates] @ vector
+                order = np.argsort(scores)[::-1]
+                now = time.monotonic()
+                for index in order:
+                    if scores[index] < self.threshold:
+                        break
+                    slot = int(candidates[index])
+                    entry = self._entries[slot]
+                    if now - entry['stored'] > self.ttl_seconds:
+                        self._release(slot)
+                        continue
+                    # Partition ids are CRCs; compare the full partition to rule out collisions
+                    if entry['partition'] == partition:
+                        best = (slot, float(scores[index]))
+                        break
+
+            if best is None:
+                self.misses += 1
+                return None
+            slot, similarity = best
+            entry = self._entries[slot]
+            self._lru.move_to_end(slot)
+            self.hits += 1
+            self.recent_hits.append({
+                'question': question,
+                'matched': entry['question'],
+                'similarity': similarity
+            })
+            return entry['response']
+
+    def add(self, partition: str, question: str, vector, response: str):
+        vector = self._normalize(vector)
+        with self._lock:
+            if len(self._lru) < self.max_entries:
+                slot = int(np.flatnonzero(~self._live)[0])
+            else:
+                slot, _ = self._lru.popitem(last=False)
+                self.evictions += 1
+            self._vectors[slot] = vector
+            self._partitions[slot] = self._partition_id(partition)
+            self._live[slot] = True
+            self._entries[slot] = {
+                'partition': partition,
+                'question': question,
+                'response': response,
+                'stored': time.monotonic()
+            }
+            self._lru[slot] = None
+            self._lru.move_to_end(slot)
+
+    def clear(self):
+        with self._lock:
+            self._live[:] = False
+            self._entries.clear()
+            self._lru.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            similarities = [hit['similarity'] for hit in self.recent_hits]
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._lru),
+                'max_entries': self.max_entries,
+                'threshold': self.threshold,
+                'min_recent_similarity': min(similarities) if similarities else None
+            }
@@ -0,0 +1,321 @@
+import abc
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+class SessionStore(abc.ABC):
+    """
+    Conversation messages and user preferences, keyed by session id.
+
+    ``append_message`` caps each session at ``max_messages`` on write and
+    returns the messages it dropped, oldest first. A running summary of
+    older turns can be kept alongside the messages.
+    """
+
+    def __init__(self, max_messages: int = 50, ttl_seconds: float = 3600):
+        self.max_messages = max_messages
+        self.ttl_seconds = ttl_seconds
+
+    @abc.abstractmethod
+    def get_messages(self, session_id: str) -> List[Dict]:
+        ...
+
+    @abc.abstractmethod
+    def append_message(self, session_id: str, role: str, content: str) -> List[Dict]:
+        ...
+
+    @abc.abstractmethod
+    def get_preferences(self, session_id: str) -> Dict:
+        ...
+
+    @abc.abstractmethod
+    def set_preferences(self, session_id: str, preferences: Dict):
+        ...
+
+    @abc.abstractmethod
+    def get_summary(self, session_id: str) -> Dict:
+        ...
+
+    @abc.abstractmethod
+    def set_summary(self, session_id: str, summary: Dict):
+        ...
+
+    @abc.abstractmethod
+    def delete(self, session_id: str):
+        ...
+
+    @abc.abstractmethod
+    def session_count(self) -> int:
+        ...
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def _new_message(role: str, content: str) -> Dict:
+        return {
+            'role': role,
+            'content': content,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+
+class MemorySessionStore(SessionStore):
+    """In-process store with LRU eviction past ``max_sessions`` and idle expiry after ``ttl_seconds``."""
+
+    def __init__(self, max_messages: int = 50, ttl_seconds: float = 3600, max_sessions: int = 10000):
+        super().__init__(max_messages, ttl_seconds)
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, session_id: str, create: bool = False):
+        now = time.monotonic()
+        session = self._sessions.get(session_id)
+        if session is not None and now - session['touched'] > self.ttl_seconds:
+            del self._sessions[session_id]
+            session = None
+        if session is None:
+            if not create:
+                return None
+            session = {'messages': [], 'preferences': {}, 'summary': {}, 'touched': now}
+            self._sessions[session_id] = session
+            self._evict()
+        session['touched'] = now
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def _evict(self):
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        # Idle sessions sit at the front, so expiry stops at the first live one
+        now = time.monotonic()
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session['touched'] <= self.ttl_seconds:
+                break
+            del self._sessions[session_id]
+
+    def get_messages(self, session_id: str) -> List[Dict]:
+        with self._lock:
+            session = self._get(session_id)
+            return list(session['messages']) if session else []
+
+    def append_message(self, session_id: str, role: str, content: str) -> List[Dict]:
+        with self._lock:
+            messages = self._get(session_id, create=True)['messages']
+            messages.append(self._new_message(role, content))
+            overflow = len(messages) - self.max_messages
+            if overflow <= 0:
+                return []
+            evicted = messages[:overflow]
+            del messages[:overflow]
+            return evicted
+
+    def get_preferences(self, session_id: str) -> Dict:
+        with self._lock:
+            session = self._get(session_id)
+            return dict(session['preferences']) if session else {}
+
+    def set_preferences(self, session_id: str, preferences: Dict):
+        with self._lock:
+            self._get(session_id, create=True)['preferences'] = dict(preferences)
+
+    def get_summary(self, session_id: str) -> Dict:
+        with self._lock:
+            session = self._get(session_id)
+            return dict(session['summary']) if session else {}
+
+    def set_summary(self, session_id: str, summary: Dict):
+        with self._lock:
+            self._get(session_id, create=True)['summary'] = dict(summary)
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def session_count(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Local SQLite store shared by every worker process on the host.
+
+    Runs in WAL mode so readers do not block the writer, which lets any
+    uvicorn worker serve any session id.
+    """
+
+    def __init__(self, path: str = "sasha_sessions.db", max_messages: int = 50, ttl_seconds: float = 3600):
+        super().__init__(max_messages, ttl_seconds)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                preferences TEXT NOT NULL DEFAULT '{}',
+                summary TEXT NOT NULL DEFAULT '{}',
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                timestamp TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS messages_by_session ON messages (session_id, id);
+            CREATE INDEX IF NOT EXISTS sessions_by_age ON sessions (updated_at);
+        """)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(sessions)")]
+        if 'summary' not in columns:
+            self._conn.execute("ALTER TABLE sessions ADD COLUMN summary TEXT NOT NULL DEFAULT '{}'")
+        self.expire_sessions()
+
+    def _touch(self, session_id: str):
+        self._conn.execute(
+            "INSERT INTO sessions (session_id, updated_at) VALUES (?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET updated_at = excluded.updated_at",
+            (session_id, time.time())
+        )
+
+    def _is_live(self, session_id: str) -> bool:
+        row = self._conn.execute(
+            "SELECT updated_at FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            return False
+        if time.time() - row[0] > self.ttl_seconds:
+            self._delete(session_id)
+            return False
+        return True
+
+    def get_messages(self, session_id: str) -> List[Dict]:
+        with self._lock:
+            if not self._is_live(session_id):
+                return []
+            rows = self._conn.execute(
+                "SELECT role, content, timestamp FROM messages WHERE session_id = ? ORDER BY id",
+                (session_id,)
+            ).fetchall()
+            return [{'role': role, 'content': content, 'timestamp': ts} for role, content, ts in rows]
+
+    def append_message(self, session_id: str, role: str, content: str) -> List[Dict]:
+        message = self._new_message(role, content)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._touch(session_id)
+                self._conn.execute(
+                    "INSERT INTO messages (session_id, role, content, timestamp) VALUES (?, ?, ?, ?)",
+                    (session_id, message['role'], message['content'], message['timestamp'])
+                )
+                # Rows older than the newest max_messages are dropped on write
+                evicted = self._conn.execute(
+                    "SELECT id, role, content, timestamp FROM messages WHERE session_id = ? "
+                    "ORDER BY id DESC LIMIT -1 OFFSET ?",
+                    (session_id, self.max_messages)
+                ).fetchall()
+                if evicted:
+                    self._conn.execute(
+                        "DELETE FROM messages WHERE session_id = ? AND id <= ?",
+                        (session_id, evicted[0][0])
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [{'role': r, 'content': c, 'timestamp': ts} for _, r, c, ts in reversed(evicted)]
+
+    def get_preferences(self, session_id: str) -> Dict:
+        with self._lock:
+            if not self._is_live(session_id):
+                return {}
+            row = self._conn.execute(
+                "SELECT preferences FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            return json.loads(row[0]) if row else {}
+
+    def set_preferences(self, session_id: str, preferences: Dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sessions (session_id, preferences, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET preferences = excluded.preferences, "
+                "updated_at = excluded.updated_at",
+                (session_id, json.dumps(preferences), time.time())
+            )
+
+    def get_summary(self, session_id: str) -> Dict:
+        with self._lock:
+            if not self._is_live(session_id):
+                return {}
+            row = self._conn.execute(
+                "SELECT summary FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            return json.loads(row[0]) if row else {}
+
+    def set_summary(self, session_id: str, summary: Dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sessions (session_id, summary, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET summary = excluded.summary, "
+                "updated_at = excluded.updated_at",
+                (session_id, json.dumps(summary), time.time())
+            )
+
+    def _delete(self, session_id: str):
+        self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+        self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._delete(session_id)
+
+    def expire_sessions(self) -> int:
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [row[0] for row in self._conn.execute(
+                "SELECT session_id FROM sessions WHERE updated_at < ?", (cutoff,)
+            ).fetchall()]
+            for session_id in expired:
+                self._delete(session_id)
+        if expired:
+            logger.info(f"Expired {len(expired)} idle sessions")
+        return len(expired)
+
+    def session_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def create_session_store(conversation_config: Dict, base_dir: str = ".") -> SessionStore:
+    store_config = conversation_config.get('store', {})
+    backend = store_config.get('backend', 'memory')
+    max_messages = conversation_config.get('max_history', 50)
+    ttl_seconds = store_config.get('ttl_seconds', 3600)
+
+    if backend == 'sqlite':
+        path = store_config.get('path', 'sasha_sessions.db')
+        if not os.path.isabs(path):
+            path = os.path.join(base_dir, path)
+        return SQLiteSessionStore(path, max_messages=max_messages, ttl_seconds=ttl_seconds)
+    if backend == 'memory':
+        return MemorySessionStore(
+            max_messages=max_messages,
+            ttl_seconds=ttl_seconds,
+            max_sessions=store_config.get('max_sessions', 10000)
+        )
+    raise ValueError(f"Unknown session store backend: {backend}")
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from prompt_history import render_message
+from session_store import SessionStore
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and Sasha.
+Update the summary so it also covers the new turns below. Keep facts, decisions, open requests
+and user preferences; drop small talk. Reply with the summary only, in at most {max_words} words.
+
+Current summary:
+{summary}
+
+New turns:
+{turns}
+"""
+
+class RollingSummarizer:
+    """
+    Compacts turns that fall out of the history window into a running
+    summary stored with the session.
+
+    ``submit`` only queues work; a single background task calls the
+    ``summarize`` model, so the request path never waits on it. Turns
+    queued for the same session are merged into one model call. The
+    summary records the timestamp of the last turn it covers, so turns
+    reported twice (e.g. by another worker) are not summarized again.
+    """
+
+    def __init__(self, store: SessionStore, summarize: Callable[[str], Awaitable[str]],
+                 max_words: int = 200, max_pending: int = 1000,
+                 run: Optional[Callable[..., Awaitable]] = None):
+        self.store = store
+        self.summarize = summarize
+        # Store calls can block (SQLite), so they are run off the event loop
+        self.run = run or asyncio.to_thread
+        self.max_words = max_words
+        self.max_pending = max_pending
+        self._pending: "OrderedDict[str, List[Dict]]" = OrderedDict()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def _ensure_started(self):
+        if self._worker is None:
+            self._wakeup = asyncio.Event()
+            self._idle = asyncio.Event()
+            self._idle.set()
+            self._worker = asyncio.create_task(self._run(), name="rolling-summarizer")
+
+    def submit(self, session_id: str, messages: List[Dict]):
+        if not messages:
+            return
+        self._ensure_started()
+        if session_id not in self._pending and len(self._pending) >= self.max_pending:
+            dropped, _ = self._pending.popitem(last=False)
+            logger.warning(f"Summary backlog full, dropping pending turns for session {dropped}")
+        self._pending.setdefault(session_id, []).extend(messages)
+        self._idle.clear()
+        self._wakeup.set()
+
+    def build_prompt(self, summary: str, messages: List[Dict]) -> str:
+        return SUMMARY_PROMPT.format(
+            max_words=self.max_words,
+            summary=summary or "(none yet)",
+            turns="\n".join(render_message(m) for m in messages)
+        )
+
+    async def _summarize_session(self, session_id: str, messages: List[Dict]):
+        current = await self.run(self.store.get_summary, session_id)
+        through = current.get('through') or ""
+        messages = [m for m in messages if (m.get('timestamp') or "") > through]
+        if not messages:
+            return
+
+        text = await self.summarize(self.build_prompt(current.get('text', ""), messages))
+        # Skip sessions cleared while the model was running
+        if not await self.run(self.store.get_messages, session_id):
+            return
+        await self.run(self.store.set_summary, session_id, {
+            'text': text.strip(),
+            'through': messages[-1].get('timestamp') or through
+        })
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._pending:
+                session_id, messages = self._pending.popitem(last=False)
+                try:
+                    await self._summarize_session(session_id, messages)
+                except Exception as e:
+                    logger.error(f"Failed to summarize session {session_id}: {str(e)}")
+            self._idle.set()
+
+    async def drain(self):
+        """Wait until every submitted turn has been summarized."""
+        if self._worker is not None:
+            await self._idle.wait()
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
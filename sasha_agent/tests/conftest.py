@@ -0,0 +1,29 @@
+import asyncio
+import os
+import sys
+
+import pytest
+import yaml
+
+# The service modules are imported flat, the same way api.py imports them
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+@pytest.fixture
+def service(tmp_path):
+    """An AIService on the shipped config, writing to tmp_path; tests stub out the model calls."""
+    pytest.importorskip("google.generativeai")
+    pytest.importorskip("langgraph")
+    from ai_service import AIService
+
+    with open(os.path.join(SERVICE_DIR, 'ai_config.yaml')) as f:
+        config = yaml.safe_load(f)
+    config['audit_log']['directory'] = str(tmp_path / 'audit_logs')
+    config['conversation']['summary']['enabled'] = False
+    config['integrations']['text_to_speech']['cache']['directory'] = str(tmp_path / 'tts')
+    config_path = tmp_path / 'ai_config.yaml'
+    config_path.write_text(yaml.safe_dump(config))
+
+    ai_service = AIService(str(config_path))
+    yield ai_service
+    asyncio.run(ai_service.shutdown())
@@ -0,0 +1,42 @@
+import os
+
+from audio_cache import AudioCache
+
+def test_key_covers_voice_parameters():
+    base = AudioCache.make_key("Hello King", "en-US-Neural2-F", 1.0, 1.0, 'MP3')
+    assert base == AudioCache.make_key("Hello King", "en-US-Neural2-F", 1.0, 1.0, 'MP3')
+    assert base != AudioCache.make_key("Hello King", "en-US-Neural2-F", 1.0, 1.2, 'MP3')
+    assert base != AudioCache.make_key("Hello King", "en-US-Wavenet-F", 1.0, 1.0, 'MP3')
+    assert base != AudioCache.make_key("Hello King", "en-US-Neural2-F", 1.0, 1.0, 'OGG_OPUS')
+
+def test_hits_skip_synthesis(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=1024)
+    calls = []
+
+    def synthesize():
+        calls.append(1)
+        return b"audio"
+
+    key = AudioCache.make_key("Hi", "voice")
+    assert cache.get_or_synthesize(key, synthesize) == b"audio"
+    assert cache.get_or_synthesize(key, synthesize) == b"audio"
+    assert len(calls) == 1
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+def test_least_recently_used_is_evicted_over_budget(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=10)
+    cache.put("a", b"1234")
+    cache.put("b", b"1234")
+    cache.get("a")
+    cache.put("c", b"1234")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1234"
+    assert cache.get("c") == b"1234"
+    assert cache.stats()['bytes'] <= 10
+    assert not os.path.exists(os.path.join(str(tmp_path), "b.audio"))
+
+def test_index_survives_restart(tmp_path):
+    AudioCache(str(tmp_path)).put("greeting", b"hello")
+    assert AudioCache(str(tmp_path)).get("greeting") == b"hello"
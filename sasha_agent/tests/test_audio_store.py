@@ -0,0 +1,92 @@
+import os
+import threading
+import time
+
+from audio_store import AudioStore
+
+def test_put_returns_artifact_served_by_url():
+    store = AudioStore()
+    artifact = store.put(b"mp3 bytes")
+    assert artifact.url == f"/audio/{artifact.id}"
+    assert bytes(artifact.view[:3]) == b"mp3"
+
+    fetched = store.get(artifact.id)
+    assert fetched.data == b"mp3 bytes"
+    assert store.get("not-a-real-artifact-id") is None
+    assert store.get("../../etc/passwd") is None
+
+def test_artifacts_expire():
+    store = AudioStore(ttl_seconds=0.05)
+    artifact = store.put(b"short lived")
+    assert store.get(artifact.id) is not None
+    time.sleep(0.06)
+    assert store.get(artifact.id) is None
+    assert store.stats()["expired"] == 1
+
+def test_memory_tier_drops_oldest_without_spill_directory():
+    store = AudioStore(max_memory_bytes=10)
+    first = store.put(b"aaaaaa")
+    second = store.put(b"bbbbbb")
+    assert store.get(first.id) is None
+    assert store.get(second.id).data == b"bbbbbb"
+    assert store.stats()["memory_bytes"] == 6
+    assert store.stats()["dropped"] == 1
+
+def test_spilled_artifacts_are_read_from_disk(tmp_path):
+    store = AudioStore(max_memory_bytes=10, spill_directory=str(tmp_path))
+    first = store.put(b"aaaaaa")
+    store.put(b"bbbbbb")
+    assert os.path.exists(tmp_path / f"{first.id}.audio")
+    assert store.get(first.id).data == b"aaaaaa"
+
+    # Another process sharing the directory can serve it too
+    other = AudioStore(spill_directory=str(tmp_path))
+    assert other.get(first.id).data == b"aaaaaa"
+
+def test_collect_removes_expired_spill_files(tmp_path):
+    store = AudioStore(max_memory_bytes=1, spill_directory=str(tmp_path), ttl_seconds=0.05)
+    artifact = store.put(b"aaaaaa")
+    leftover = tmp_path / "leftover-from-a-crashed-process.audio"
+    leftover.write_bytes(b"old")
+    os.utime(leftover, (time.time() - 1, time.time() - 1))
+
+    time.sleep(0.06)
+    assert store.collect() == 2
+    assert os.listdir(tmp_path) == []
+    assert store.get(artifact.id) is None
+
+def test_collect_removes_partial_spill_files_once_stale(tmp_path):
+    store = AudioStore(spill_directory=str(tmp_path), ttl_seconds=60)
+    crashed = tmp_path / "tmpabc123.tmp"
+    crashed.write_bytes(b"half written")
+    os.utime(crashed, (time.time() - 61, time.time() - 61))
+    # Possibly another process's spill in progress
+    in_progress = tmp_path / "tmpdef456.tmp"
+    in_progress.write_bytes(b"being written")
+    unrelated = tmp_path / "notes.txt"
+    unrelated.write_bytes(b"not ours")
+    os.utime(unrelated, (0, 0))
+
+    assert store.collect() == 1
+    assert sorted(os.listdir(tmp_path)) == ["notes.txt", "tmpdef456.tmp"]
+
+def test_concurrent_puts_keep_every_artifact_readable(tmp_path):
+    store = AudioStore(max_memory_bytes=1000, spill_directory=str(tmp_path))
+    artifacts = []
+    lock = threading.Lock()
+
+    def worker(n):
+        for i in range(50):
+            artifact = store.put(f"{n}-{i}".encode() * 20)
+            with lock:
+                artifacts.append(artifact)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len({a.id for a in artifacts}) == 400
+    assert all(store.get(a.id).data == a.data for a in artifacts)
+    assert store.stats()["memory_bytes"] <= 1000
@@ -0,0 +1,107 @@
+import time
+
+from audit_log import AuditLog
+
+def _pages(log, **kwargs):
+    entries, cursor = [], None
+    while True:
+        page = log.query(cursor=cursor, **kwargs)
+        entries.extend(page['entries'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return entries
+
+def test_append_does_not_wait_for_disk(tmp_path):
+    log = AuditLog(str(tmp_path), flush_interval=0.05)
+    started = time.perf_counter()
+    for i in range(2000):
+        log.append('user_message', {'i': i})
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 1.0
+    assert len(log.recent) == 1000
+    assert log.flush()
+    assert len(_pages(log, limit=500)) == 2000
+    log.close()
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    log = AuditLog(str(tmp_path), max_queue=1)
+    log._closed = True
+    log._writer.join()  # No writer, so the queue stays full
+    log.append('a', {})
+    log.append('b', {})
+
+    assert log.dropped == 1
+    assert [e['action'] for e in log.recent] == ['a', 'b']
+
+def test_rotation_and_paginated_range_queries(tmp_path):
+    log = AuditLog(str(tmp_path), segment_bytes=2000, batch_size=10)
+    entries = []
+    for i in range(200):
+        entries.append(log.append('user_message' if i % 2 else 'assistant_response', {'i': i}))
+        if i % 10 == 9:
+            log.flush()
+
+    assert len(log._segments()) > 5
+    start, end = entries[50]['timestamp'], entries[149]['timestamp']
+    page = log.query(start=start, end=end, limit=30)
+    assert [e['details']['i'] for e in page['entries']] == list(range(50, 80))
+
+    found = _pages(log, start=start, end=end, limit=30)
+    assert [e['details']['i'] for e in found] == list(range(50, 150))
+    replies = _pages(log, action='user_message', limit=25)
+    assert [e['details']['i'] for e in replies] == list(range(1, 200, 2))
+    log.close()
+
+def test_old_segments_are_pruned(tmp_path):
+    log = AuditLog(str(tmp_path), segment_bytes=100, retain_segments=3)
+    for i in range(20):
+        log.append('user_message', {'i': i})
+        log.flush()
+
+    assert len(log._segments()) <= 4
+    log.close()
+
+def test_queries_merge_worker_shards(tmp_path):
+    workers = [AuditLog(str(tmp_path)) for _ in range(2)]
+    workers[1]._shard = "9999999"
+    for i in range(40):
+        workers[i % 2].append('user_message', {'i': i})
+    for worker in workers:
+        worker.flush()
+
+    # Any worker sees every entry, in time order
+    found = _pages(workers[0], limit=7)
+    assert [e['details']['i'] for e in found] == list(range(40))
+    assert len({e['id'] for e in found}) == 40
+    for worker in workers:
+        worker.close()
+
+def test_retention_covers_segments_of_exited_workers(tmp_path):
+    previous = AuditLog(str(tmp_path), segment_bytes=100)
+    previous._shard = "9999999"
+    for i in range(10):
+        previous.append('user_message', {'i': i})
+        previous.flush()
+    previous.close()
+    assert len(previous._segments()) > 3
+
+    log = AuditLog(str(tmp_path), segment_bytes=100, retain_segments=3)
+    for i in range(5):
+        log.append('user_message', {'i': i})
+        log.flush()
+
+    assert len(log._segments()) <= 4
+    assert all(log._shard in path for path in log._segments())
+    log.close()
+
+def test_flush_gives_up_when_the_queue_stays_full(tmp_path):
+    log = AuditLog(str(tmp_path), max_queue=1)
+    log._closed = True
+    log._writer.join()
+    log.append('a', {})
+
+    started = time.perf_counter()
+    assert log.flush(timeout=0.05) is False
+    assert time.perf_counter() - started < 1.0
+    assert log.query()['entries'] == []
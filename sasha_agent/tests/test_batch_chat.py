@@ -0,0 +1,120 @@
+import asyncio
+import json
+
+import pytest
+
+from memory_writer import MemoryWriter
+from test_memory_writer import FakeFirestore
+
+def _collect(service, items, **kwargs):
+    async def run():
+        return [result async for result in service.generate_batch(items, **kwargs)]
+    return asyncio.run(run())
+
+def test_turns_of_a_session_run_in_order(service):
+    running = {'now': 0, 'max': 0}
+    seen = []
+
+    async def fake_gemini(session_id, message, turn):
+        running['now'] += 1
+        running['max'] = max(running['max'], running['now'])
+        # The previous turn of the session is already in its history
+        seen.append((session_id, message, [m['content'] for m in service.sessions.get_messages(session_id)]))
+        await asyncio.sleep(0.01)
+        running['now'] -= 1
+        return f"re: {message}"
+
+    service._call_gemini = fake_gemini
+    items = [{'session_id': session, 'message': f"{session}{i}"} for i in range(3) for session in "ab"]
+    results = _collect(service, items, concurrency=4)
+
+    assert sorted(result['index'] for result in results) == list(range(6))
+    assert all(result['response'] == f"re: {items[result['index']]['message']}" for result in results)
+    for session in "ab":
+        turns = [(message, history) for session_id, message, history in seen if session_id == session]
+        assert [message for message, _ in turns] == [f"{session}0", f"{session}1", f"{session}2"]
+        assert turns[2][1] == [f"{session}0", f"re: {session}0", f"{session}1", f"re: {session}1", f"{session}2"]
+    # The two sessions ran side by side
+    assert running['max'] == 2
+
+def test_failing_items_get_an_error_line(service):
+    async def fake_gemini(session_id, message, turn):
+        if message == "boom":
+            raise RuntimeError("gemini down")
+        return f"re: {message}"
+
+    async def fake_fallback(prompt):
+        raise RuntimeError("fallback down")
+
+    service._call_gemini = fake_gemini
+    service._generate_fallback = fake_fallback
+    results = _collect(service, [{'message': "hi"}, {'message': "boom"}, {'message': "there"}])
+
+    by_index = {result['index']: result for result in results}
+    assert by_index[0]['response'] == "re: hi"
+    assert by_index[2]['response'] == "re: there"
+    assert 'response' not in by_index[1]
+    assert by_index[1]['error']
+
+def test_closing_the_stream_cancels_the_rest(service):
+    started, cancelled = [], []
+
+    async def fake_gemini(session_id, message, turn):
+        started.append(message)
+        if message == "fast":
+            return "done"
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(message)
+            raise
+
+    service._call_gemini = fake_gemini
+    firestore = FakeFirestore()
+    service.memory_writer = MemoryWriter(lambda: (firestore, firestore.collection("sasha_memory")),
+                                         flush_interval=0.01)
+
+    async def run():
+        batch = service.generate_batch([{'message': "fast"}, {'message': "slow1"}, {'message': "slow2"}])
+        first = await batch.__anext__()
+        # What StreamingResponse does when the client disconnects
+        await batch.aclose()
+        return first
+
+    first = asyncio.run(run())
+    assert first['response'] == "done"
+    assert sorted(cancelled) == ["slow1", "slow2"]
+    assert sorted(started) == ["fast", "slow1", "slow2"]
+    # The cancelled turns gave back the Firestore queue slots they reserved
+    assert service.memory_writer.flush()
+    assert service.memory_writer.stats()['reserved'] == 0
+    assert [doc['response'] for doc in firestore.documents.values()] == ["done"]
+
+@pytest.fixture
+def client(service, monkeypatch):
+    pytest.importorskip("fastapi")
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+    import api
+
+    monkeypatch.setattr(api, "ai_service", service)
+    return TestClient(api.app)
+
+def test_batch_endpoint_streams_ndjson(service, client):
+    async def fake_gemini(session_id, message, turn):
+        return message.upper()
+
+    service._call_gemini = fake_gemini
+    response = client.post('/chat/batch', json={'items': [{'message': "one"}, {'message': "two"}]})
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted((line['index'], line['response']) for line in lines) == [(0, "ONE"), (1, "TWO")]
+
+def test_batch_endpoint_rejects_oversized_batches(service, client):
+    service.config['batch']['max_items'] = 2
+    response = client.post('/chat/batch', json={'items': [{'message': str(i)} for i in range(3)]})
+
+    assert response.status_code == 413
+    assert "at most 2" in response.json()['detail']
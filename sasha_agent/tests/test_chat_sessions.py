@@ -0,0 +1,69 @@
+from chat_sessions import ChatSessionCache
+
+class FakeChat:
+    def __init__(self, history):
+        self.history = list(history)
+
+def _window(*pairs):
+    return [{'role': role, 'content': content} for role, content in pairs]
+
+def _turn(cache, session_id, window, message, reply, prompt_key="sys", system_prompt="sys"):
+    cache.lock(session_id)
+    chat = cache.checkout(session_id, prompt_key, system_prompt, window, message, legacy_prompt=system_prompt + message)
+    cache.commit(session_id, message, reply)
+    return chat
+
+def test_chat_is_reused_across_turns():
+    cache = ChatSessionCache(FakeChat)
+    first = _turn(cache, "s1", [], "hi", "hello")
+    second = _turn(cache, "s1", _window(('user', "hi"), ('assistant', "hello")), "how are you", "great")
+
+    assert first is second
+    assert first.history[0] == {'role': 'user', 'parts': ["sys"]}
+    stats = cache.stats.snapshot()
+    assert stats['turns'] == 2
+    assert stats['rebuilds'] == 1
+
+def test_chat_is_rebuilt_when_history_moves_on_without_it():
+    cache = ChatSessionCache(FakeChat)
+    first = _turn(cache, "s1", [], "hi", "hello")
+    # e.g. the reply came from the fallback model or another worker
+    window = _window(('user', "hi"), ('assistant', "fallback reply"))
+    second = _turn(cache, "s1", window, "next", "ok")
+
+    assert second is not first
+    assert second.history[-1] == {'role': 'model', 'parts': ["fallback reply"]}
+
+def test_prompt_key_change_rebuilds_but_summary_alone_does_not():
+    cache = ChatSessionCache(FakeChat)
+    first = _turn(cache, "s1", [], "hi", "hello")
+    window = _window(('user', "hi"), ('assistant', "hello"))
+    same = _turn(cache, "s1", window, "a", "b", system_prompt="sys + summary")
+    window += _window(('user', "a"), ('assistant', "b"))
+    changed = _turn(cache, "s1", window, "c", "d", prompt_key="formal tone")
+
+    assert same is first
+    assert changed is not first
+
+def test_rebuilds_once_chat_outgrows_window_by_slack():
+    cache = ChatSessionCache(FakeChat, rebuild_slack=4)
+    chat = _turn(cache, "s1", [], "m0", "r0")
+    window = []
+    chats = []
+    for i in range(1, 6):
+        # The window only ever holds the latest exchange
+        window = _window(('user', f"m{i - 1}"), ('assistant', f"r{i - 1}"))
+        chats.append(_turn(cache, "s1", window, f"m{i}", f"r{i}"))
+
+    assert all(c is chat for c in chats[:3])
+    assert chats[3] is not chat
+
+def test_reused_turns_send_fewer_new_bytes_than_legacy_prompt():
+    cache = ChatSessionCache(FakeChat)
+    window = []
+    for i in range(10):
+        _turn(cache, "s1", list(window), f"message {i}", f"reply {i}", system_prompt="s" * 500)
+        window += _window(('user', f"message {i}"), ('assistant', f"reply {i}"))
+
+    stats = cache.stats.snapshot()
+    assert stats['avg_new_bytes'] < stats['avg_legacy_bytes'] / 5
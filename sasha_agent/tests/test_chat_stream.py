@@ -0,0 +1,186 @@
+import asyncio
+import json
+
+import pytest
+
+from memory_writer import MemoryWriter
+from provider_router import ProviderUnavailable
+from test_memory_writer import FakeFirestore
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+class _FakeChat:
+    """Stands in for a Gemini chat; ``send_message_async(stream=True)`` yields ``tokens``."""
+
+    def __init__(self, tokens, fail_before=None, fail_after=None):
+        self.tokens = tokens
+        self.fail_before = fail_before
+        self.fail_after = fail_after
+
+    async def send_message_async(self, message, stream=False):
+        if self.fail_before:
+            raise self.fail_before
+        return self._stream()
+
+    async def _stream(self):
+        for token in self.tokens:
+            await asyncio.sleep(0)
+            yield _Chunk(token)
+        if self.fail_after:
+            raise self.fail_after
+
+def _use_chat(service, **kwargs):
+    service.chats.start_chat = lambda history=None: _FakeChat(**kwargs)
+
+def _events(service, message="hello", session_id="s1"):
+    async def run():
+        return [event async for event in service.stream_response(message, session_id)]
+    return asyncio.run(run())
+
+def _audit(service, action):
+    return [entry['details'] for entry in service.system_access.audit_log.recent if entry['action'] == action]
+
+def test_tokens_are_streamed_between_start_and_done(service):
+    _use_chat(service, tokens=["Hel", "lo ", "King"])
+
+    events = _events(service)
+
+    assert [event['event'] for event in events] == ['start', 'token', 'token', 'token', 'done']
+    assert [event['text'] for event in events[1:4]] == ["Hel", "lo ", "King"]
+    assert events[-1]['response'] == "Hello King"
+    assert service.sessions.get_messages("s1")[-1]['content'] == "Hello King"
+    assert _audit(service, 'assistant_response')[-1]['completed'] is True
+
+def test_falls_back_when_gemini_fails_before_the_first_token(service):
+    _use_chat(service, tokens=[], fail_before=RuntimeError("quota exceeded"))
+
+    async def fake_fallback(prompt):
+        return "from the fallback"
+
+    service._generate_fallback = fake_fallback
+    events = _events(service)
+
+    assert [event['event'] for event in events] == ['start', 'token', 'done']
+    assert events[-1]['response'] == "from the fallback"
+    assert _audit(service, 'assistant_response')[-1]['provider'] == 'huggingface'
+
+def test_failure_after_tokens_is_not_retried_on_the_fallback(service):
+    _use_chat(service, tokens=["partial"], fail_after=RuntimeError("stream reset"))
+    fallback_calls = []
+
+    async def fake_fallback(prompt):
+        fallback_calls.append(prompt)
+        return "from the fallback"
+
+    service._generate_fallback = fake_fallback
+    with pytest.raises(RuntimeError, match="stream reset"):
+        _events(service)
+
+    assert fallback_calls == []
+    details = _audit(service, 'assistant_response')[-1]
+    assert details['completed'] is False
+    assert service.sessions.get_messages("s1")[-1]['content'] == "partial"
+
+def test_disconnect_still_records_the_partial_reply(service):
+    _use_chat(service, tokens=["one ", "two ", "three"])
+
+    async def run():
+        stream = service.stream_response("hello", "s1")
+        received = [await stream.__anext__(), await stream.__anext__()]
+        # What StreamingResponse does when the client goes away
+        await stream.aclose()
+        return received
+
+    received = asyncio.run(run())
+
+    assert [event['event'] for event in received] == ['start', 'token']
+    messages = service.sessions.get_messages("s1")
+    assert [m['role'] for m in messages] == ['user', 'assistant']
+    assert messages[-1]['content'] == "one "
+    details = _audit(service, 'assistant_response')[-1]
+    assert details['completed'] is False
+    assert details['streamed'] is True
+
+def _use_memory_writer(service):
+    firestore = FakeFirestore()
+    service.memory_writer = MemoryWriter(lambda: (firestore, firestore.collection("sasha_memory")),
+                                         flush_interval=0.01)
+    return firestore
+
+def test_nothing_is_stored_when_both_models_fail_before_replying(service):
+    _use_chat(service, tokens=[], fail_before=RuntimeError("quota exceeded"))
+    firestore = _use_memory_writer(service)
+
+    async def fake_fallback(prompt):
+        raise RuntimeError("fallback down")
+
+    service._generate_fallback = fake_fallback
+    with pytest.raises(ProviderUnavailable, match="fallback down"):
+        _events(service)
+
+    assert [m['role'] for m in service.sessions.get_messages("s1")] == ['user']
+    assert _audit(service, 'assistant_response') == []
+    assert "fallback down" in _audit(service, 'assistant_response_failed')[-1]['error']
+    assert service.memory_writer.flush()
+    assert service.memory_writer.stats()['reserved'] == 0
+    assert firestore.documents == {}
+
+def test_disconnect_before_the_first_token_stores_nothing(service):
+    _use_chat(service, tokens=["never sent"])
+    _use_memory_writer(service)
+
+    async def run():
+        stream = service.stream_response("hello", "s1")
+        start = await stream.__anext__()
+        await stream.aclose()
+        return start
+
+    assert asyncio.run(run())['event'] == 'start'
+    assert [m['role'] for m in service.sessions.get_messages("s1")] == ['user']
+    assert _audit(service, 'assistant_response_failed')[-1]['error'] == "client disconnected"
+    assert service.memory_writer.stats()['reserved'] == 0
+
+@pytest.fixture
+def client(service, monkeypatch):
+    pytest.importorskip("fastapi")
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+    import api
+
+    monkeypatch.setattr(api, "ai_service", service)
+    return TestClient(api.app)
+
+def _sse(body):
+    frames = []
+    for frame in body.split("\n\n"):
+        if not frame:
+            continue
+        event_line, data_line = frame.split("\n")
+        assert event_line.startswith("event: ") and data_line.startswith("data: ")
+        data = json.loads(data_line[len("data: "):])
+        assert data['event'] == event_line[len("event: "):]
+        frames.append(data)
+    return frames
+
+def test_stream_endpoint_sends_server_sent_events(service, client):
+    _use_chat(service, tokens=["Hi", " there"])
+
+    response = client.post('/chat/stream', json={'message': "hello", 'session_id': "s1"})
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/event-stream')
+    frames = _sse(response.text)
+    assert [frame['event'] for frame in frames] == ['start', 'token', 'token', 'done']
+    assert frames[0]['session_id'] == "s1"
+    assert frames[-1]['response'] == "Hi there"
+
+def test_stream_endpoint_reports_errors_as_an_event(service, client):
+    _use_chat(service, tokens=["partial"], fail_after=RuntimeError("stream reset"))
+
+    response = client.post('/chat/stream', json={'message': "hello"})
+
+    frames = _sse(response.text)
+    assert [frame['event'] for frame in frames] == ['start', 'token', 'error']
+    assert "stream reset" in frames[-1]['detail']
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("langgraph")
+pytest.importorskip("google.generativeai")
+
+from ai_service import DecisionGraph
+from graph_registry import tracer
+from safety_policy import SafetyPolicy
+
+CONFIG = {
+    'decision_threshold': 0.8,
+    'escalation_enabled': True,
+    'safety': {'escalate_severity': 'high', 'rules': [
+        {'pattern': 'delete', 'severity': 'high'},
+        {'pattern': 'shutdown', 'severity': 'medium'}
+    ]}
+}
+
+def _run(graph, message):
+    async def load_preferences(state):
+        await asyncio.sleep(0.01)
+        return {'tone': 'casual'}
+
+    async def load_permissions(state):
+        return {'files': {'level': 'read'}}
+
+    async def load_memory(state):
+        return {'messages': [{'role': 'user', 'content': "hi"}], 'summary': None}
+
+    return asyncio.run(graph.ainvoke(
+        {"input": message},
+        context_sources={"preferences": load_preferences, "permissions": load_permissions, "memory": load_memory}
+    ))
+
+def test_safe_input_runs_every_branch_and_merges_context():
+    result = _run(DecisionGraph(CONFIG), "schedule the shutdown review")
+
+    assert result['context'] == {
+        'preferences': {'tone': 'casual'},
+        'permissions': {'files': {'level': 'read'}},
+        'memory': {'messages': [{'role': 'user', 'content': "hi"}], 'summary': None}
+    }
+    assert result['decision'] == 'safe'
+    assert result['escalated'] is False
+    # Below the escalation severity, but the match is still reported
+    assert result['safety']['severity'] == 'medium'
+
+    spans = tracer.export(1)
+    assert spans[0]['graph'] == 'decision_graph'
+    assert sorted(span['name'] for span in spans[1:]) == [
+        'decide_action', 'execute_action', 'load_memory', 'load_permissions', 'load_preferences'
+    ]
+
+def test_unsafe_input_is_escalated_after_one_classification(monkeypatch):
+    classified = []
+    classify = SafetyPolicy.classify
+    monkeypatch.setattr(SafetyPolicy, "classify", lambda self, text: classified.append(text) or classify(self, text))
+
+    result = _run(DecisionGraph(CONFIG), "please delete the production database")
+
+    assert result['decision'] == 'unsafe'
+    assert result['escalated'] is True
+    assert result['safety']['label'] == 'unsafe'
+    assert [match['pattern'] for match in result['safety']['matches']] == ['delete']
+    assert set(result['context']) == {'preferences', 'permissions', 'memory'}
+    assert classified == ["please delete the production database"]
+    assert 'escalate' in [span['name'] for span in tracer.export(1)]
+
+def test_instances_share_the_compiled_graph_but_use_their_own_policy():
+    strict = DecisionGraph({**CONFIG, 'safety': {'escalate_severity': 'medium', 'rules': CONFIG['safety']['rules']}})
+    lenient = DecisionGraph(CONFIG)
+    disabled = DecisionGraph({**CONFIG, 'escalation_enabled': False})
+
+    assert strict.graph is lenient.graph is disabled.graph
+    assert _run(strict, "start the shutdown")['escalated'] is True
+    assert _run(lenient, "start the shutdown")['escalated'] is False
+    assert _run(disabled, "delete everything")['escalated'] is False
+
+def test_turn_prompt_is_built_from_the_loaded_context(service):
+    service.sessions.append_message("s1", 'user', "earlier question")
+    service.sessions.append_message("s1", 'assistant', "earlier answer")
+    service.sessions.set_summary("s1", {'text': "They talked about deployments."})
+    service.system_access.permissions['billing'] = {'level': 'read'}
+
+    turn = asyncio.run(service._build_turn("keep it brief please", "s1", "default"))
+
+    # Preferences were updated from this message before the prompt was built
+    assert "Providing concise responses" in turn['system_prompt']
+    assert "- billing: read" in turn['system_prompt']
+    assert "They talked about deployments." in turn['system_prompt']
+    assert "earlier question" in turn['prompt'] and "earlier answer" in turn['prompt']
+    # The current message is in the prompt once, after the history
+    assert turn['prompt'].count("keep it brief please") == 1
+    assert service.sessions.get_messages("s1")[-1]['content'] == "keep it brief please"
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+httpx = pytest.importorskip("httpx")
+
+from direct_chat import AsyncSashaDirectChat, SashaDirectChat
+
+class _StubSasha(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    failures_left = 0
+    failure_status = 503
+    delay = 0.0
+    client_ports = []
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, content_type="application/json"):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._send(200, json.dumps({"status": "healthy"}))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        type(self).client_ports.append(self.client_address[1])
+        path = self.path.split("?")[0]
+        if path == "/chat":
+            if type(self).failures_left:
+                type(self).failures_left -= 1
+                self._send(type(self).failure_status, json.dumps({"detail": "overloaded"}))
+                return
+            # The turn has run by now; only the reply is late
+            time.sleep(type(self).delay)
+            self._send(200, json.dumps({"response": f"echo: {body['message']}", "session_id": body["session_id"]}))
+        elif path == "/chat/stream":
+            events = [{"event": "start"}, {"event": "token", "text": "Hi"}, {"event": "done", "response": "Hi"}]
+            self._send(200, "".join(f"event: {e['event']}\ndata: {json.dumps(e)}\n\n" for e in events),
+                       "text/event-stream")
+        elif path == "/chat/batch":
+            lines = [json.dumps({"index": i, "response": item["message"]}) for i, item in enumerate(body["items"])]
+            self._send(200, "\n".join(lines) + "\n", "application/x-ndjson")
+        else:
+            self._send(200, json.dumps({"status": "success"}))
+
+@pytest.fixture
+def server():
+    _StubSasha.failures_left = 0
+    _StubSasha.failure_status = 503
+    _StubSasha.delay = 0.0
+    _StubSasha.client_ports = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _StubSasha)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+def test_requests_reuse_one_connection(server):
+    sasha = SashaDirectChat(server)
+    for i in range(5):
+        assert sasha.chat(f"hello {i}")["response"] == f"echo: hello {i}"
+    sasha.close()
+
+    assert len(set(_StubSasha.client_ports)) == 1
+
+def test_gateway_errors_are_retried(server):
+    _StubSasha.failures_left = 2
+    sasha = SashaDirectChat(server, backoff_factor=0.01)
+
+    assert sasha.chat("hello")["response"] == "echo: hello"
+    sasha.close()
+
+def test_chat_is_not_retried_once_it_may_have_run(server):
+    sasha = SashaDirectChat(server, timeout=(5.0, 0.2), backoff_factor=0.01)
+
+    _StubSasha.failures_left = 1
+    _StubSasha.failure_status = 504
+    assert "error" in sasha.chat("gateway timeout")
+    _StubSasha.delay = 0.5
+    assert "error" in sasha.chat("read timeout")
+    sasha.close()
+
+    # One request each: a retry could have stored the turn twice
+    assert len(_StubSasha.client_ports) == 2
+
+def test_async_chat_is_not_retried_once_it_may_have_run(server):
+    async def run():
+        async with AsyncSashaDirectChat(server, read_timeout=0.2, backoff_factor=0.01) as sasha:
+            _StubSasha.failures_left = 1
+            _StubSasha.failure_status = 504
+            with pytest.raises(Exception, match="overloaded"):
+                await sasha.chat("gateway timeout")
+            _StubSasha.delay = 0.5
+            with pytest.raises(httpx.ReadTimeout):
+                await sasha.chat("read timeout")
+
+    asyncio.run(run())
+    assert len(_StubSasha.client_ports) == 2
+
+def test_connection_errors_are_retried():
+    async def run():
+        async with AsyncSashaDirectChat("http://127.0.0.1:1", retries=2, backoff_factor=0.01) as sasha:
+            attempts = []
+            original = sasha.http.request
+
+            async def request(*args, **kwargs):
+                attempts.append(args)
+                return await original(*args, **kwargs)
+
+            sasha.http.request = request
+            with pytest.raises(httpx.ConnectError):
+                await sasha.chat("hello")
+            return len(attempts)
+
+    assert asyncio.run(run()) == 3
+
+def test_streams_and_batches(server):
+    sasha = SashaDirectChat(server)
+
+    assert [e["event"] for e in sasha.chat_stream("hello")] == ["start", "token", "done"]
+    results = list(sasha.chat_batch([{"message": "a"}, {"message": "b"}]))
+    assert [r["response"] for r in results] == ["a", "b"]
+    sasha.close()
+
+def test_async_client_drives_concurrent_sessions(server):
+    async def run():
+        _StubSasha.failures_left = 1
+        async with AsyncSashaDirectChat(server, backoff_factor=0.01, max_connections=4) as sasha:
+            assert await sasha.check_health()
+            replies = await asyncio.gather(*[
+                sasha.chat(f"hello {i}", session_id=f"session-{i}") for i in range(20)
+            ])
+            events = [e async for e in sasha.chat_stream("hello")]
+            batch = [r async for r in sasha.chat_batch([{"message": "a"}])]
+        return replies, events, batch
+
+    replies, events, batch = asyncio.run(run())
+    assert sorted(r["session_id"] for r in replies) == sorted(f"session-{i}" for i in range(20))
+    assert events[-1] == {"event": "done", "response": "Hi"}
+    assert batch == [{"index": 0, "response": "a"}]
+    # Connections are pooled rather than opened per request
+    assert len(set(_StubSasha.client_ports)) <= 4
@@ -0,0 +1,131 @@
+import json
+import threading
+import time
+
+import pytest
+
+from graph_registry import GraphRegistry, GraphTracer, state_size
+
+class FakeGraph:
+    """Runs its nodes in sequence, merging each returned dict into the state."""
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    def invoke(self, state):
+        state = dict(state)
+        for node in self.nodes:
+            state.update(node(state) or {})
+        return state
+
+def _slow(seconds, **update):
+    def node(state):
+        time.sleep(seconds)
+        return update
+    return node
+
+def test_registry_compiles_each_graph_once():
+    tracer = GraphTracer()
+    registry = GraphRegistry(tracer)
+    builds = []
+
+    def builder():
+        builds.append(1)
+        return FakeGraph([])
+
+    graphs = []
+    threads = [threading.Thread(target=lambda: graphs.append(registry.get("g", builder))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(builds) == 1
+    assert all(graph is graphs[0] for graph in graphs)
+    assert registry.get("g", builder, key="other config") is not graphs[0]
+    assert len(builds) == 2
+
+def test_invoke_records_a_span_per_node():
+    tracer = GraphTracer()
+    registry = GraphRegistry(tracer)
+    graph = registry.get("decision", lambda: FakeGraph([
+        tracer.node("retrieve_context", _slow(0.03, text="hello")),
+        tracer.node("decide_action", _slow(0.0))
+    ]))
+
+    assert graph.invoke({"input": "hi"}) == {"input": "hi", "text": "hello"}
+
+    spans = json.loads(tracer.export_json())
+    assert [span["name"] for span in spans] == ["invoke", "retrieve_context", "decide_action"]
+    root, retrieve, decide = spans
+    assert {span["trace_id"] for span in spans} == {root["trace_id"]}
+    assert retrieve["parent_id"] == decide["parent_id"] == root["span_id"]
+    assert retrieve["duration_ms"] >= 30 > decide["duration_ms"]
+    assert retrieve["attributes"] == {"state_bytes": 7, "output_bytes": 9}
+    assert tracer.summary()["decision.retrieve_context"]["count"] == 1
+
+def test_failing_node_is_recorded_and_reraised():
+    tracer = GraphTracer()
+    seen = []
+    tracer.add_listener(seen.append)
+
+    def broken(state):
+        raise ValueError("no memory store")
+
+    graph = GraphRegistry(tracer).get("g", lambda: FakeGraph([tracer.node("retrieve_context", broken)]))
+    with pytest.raises(ValueError):
+        graph.invoke({"input": "hi"})
+
+    assert [(span["name"], span["status"]) for span in seen] == [("retrieve_context", "error"), ("invoke", "error")]
+    assert "no memory store" in seen[0]["error"]
+
+def test_concurrent_invocations_keep_separate_traces():
+    tracer = GraphTracer()
+    graph = GraphRegistry(tracer).get("g", lambda: FakeGraph([tracer.node("a", _slow(0.01)), tracer.node("b", _slow(0.01))]))
+
+    threads = [threading.Thread(target=graph.invoke, args=({"input": str(i)},)) for i in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(tracer.traces) == 6
+    for spans in tracer.traces:
+        assert [span["name"] for span in spans] == ["invoke", "a", "b"]
+        assert len({span["trace_id"] for span in spans}) == 1
+    assert len(tracer.export(limit=2)) == 6
+
+def test_state_size_counts_arrays_by_their_bytes():
+    np = pytest.importorskip("numpy")
+    assert state_size({"embedding": np.zeros(384, dtype=np.float32)}) == len("embedding") + 384 * 4
+    assert state_size({"input": "héllo", "n": 1}) == 5 + 6 + 1 + 8
+
+def test_ainvoke_traces_async_nodes_running_in_parallel():
+    import asyncio
+
+    tracer = GraphTracer()
+
+    async def load(state):
+        await asyncio.sleep(0.05)
+        return {"loaded": True}
+
+    class ParallelGraph:
+        def __init__(self, nodes):
+            self.nodes = nodes
+
+        async def ainvoke(self, state):
+            updates = await asyncio.gather(*(asyncio.create_task(node(state)) for node in self.nodes))
+            return {**state, **{k: v for update in updates for k, v in update.items()}}
+
+    graph = GraphRegistry(tracer).get("g", lambda: ParallelGraph([
+        tracer.node("load_preferences", load),
+        tracer.node("load_permissions", load)
+    ]))
+
+    started = time.perf_counter()
+    assert asyncio.run(graph.ainvoke({"input": "hi"})) == {"input": "hi", "loaded": True}
+    assert time.perf_counter() - started < 0.09
+
+    spans = tracer.export()
+    assert sorted(span["name"] for span in spans) == ["invoke", "load_permissions", "load_preferences"]
+    assert len({span["trace_id"] for span in spans}) == 1
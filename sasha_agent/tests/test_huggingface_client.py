@@ -0,0 +1,125 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from huggingface_client import HuggingFaceClient, HuggingFaceError
+
+class _StubInferenceAPI(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests = []
+    loading_responses = 0
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        type(self).requests.append({'path': self.path, 'body': body})
+        if type(self).loading_responses:
+            type(self).loading_responses -= 1
+            self._send(503, {"error": "Model gpt2 is currently loading", "estimated_time": 0.05})
+            return
+        if body["inputs"] == "fail":
+            self._send(400, {"error": "Input is invalid"})
+            return
+        inputs = body["inputs"]
+        if isinstance(inputs, list):
+            self._send(200, [[{"generated_text": f"{text}!"}] for text in inputs])
+        else:
+            self._send(200, [{"generated_text": f"{inputs}!"}])
+
+@pytest.fixture
+def base_url():
+    _StubInferenceAPI.requests = []
+    _StubInferenceAPI.loading_responses = 0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _StubInferenceAPI)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/models"
+    httpd.shutdown()
+    httpd.server_close()
+
+def test_concurrent_prompts_share_one_request(base_url):
+    async def run():
+        client = HuggingFaceClient("key", base_url=base_url, batch_window=0.05, max_batch_size=8)
+        results = await asyncio.gather(*[client.generate(f"prompt {i}") for i in range(5)])
+        await client.aclose()
+        return results
+
+    assert asyncio.run(run()) == [f"prompt {i}!" for i in range(5)]
+    assert len(_StubInferenceAPI.requests) == 1
+    assert _StubInferenceAPI.requests[0]['path'] == "/models/gpt2"
+    assert _StubInferenceAPI.requests[0]['body']['inputs'] == [f"prompt {i}" for i in range(5)]
+
+def test_batches_split_by_size_and_parameters(base_url):
+    async def run():
+        client = HuggingFaceClient("key", base_url=base_url, batch_window=0.05, max_batch_size=2)
+        await asyncio.gather(
+            *[client.generate(f"a{i}") for i in range(3)],
+            client.generate("b", parameters={'max_new_tokens': 8})
+        )
+        await client.aclose()
+
+    asyncio.run(run())
+    inputs = sorted(json.dumps(r['body']['inputs']) for r in _StubInferenceAPI.requests)
+    assert inputs == sorted(json.dumps(i) for i in (["a0", "a1"], "a2", "b"))
+
+def test_model_loading_is_retried(base_url):
+    _StubInferenceAPI.loading_responses = 2
+
+    async def run():
+        client = HuggingFaceClient("key", base_url=base_url, batch_window=0)
+        result = await client.generate("hello")
+        await client.aclose()
+        return result
+
+    assert asyncio.run(run()) == "hello!"
+    assert len(_StubInferenceAPI.requests) == 3
+
+def test_errors_reach_every_caller(base_url):
+    async def run():
+        client = HuggingFaceClient("key", base_url=base_url, batch_window=0)
+        with pytest.raises(HuggingFaceError):
+            await client.generate("fail")
+        message = await client.generate_response("fail")
+        await client.aclose()
+        return message
+
+    assert asyncio.run(run()) == "[HuggingFace error: 400: Input is invalid]"
+
+def test_aclose_sends_waiting_prompts_and_cancels_stuck_requests(base_url):
+    async def run():
+        client = HuggingFaceClient("key", base_url=base_url, batch_window=60, max_wait=60)
+        waiting = asyncio.ensure_future(client.generate("hello"))
+        await asyncio.sleep(0)
+        # The batch window is far off; closing sends it straight away
+        await client.aclose()
+        sent = await waiting
+
+        # Still loading after every retry the test waits for
+        _StubInferenceAPI.loading_responses = 1000
+        client = HuggingFaceClient("key", base_url=base_url, batch_window=0, max_retries=1000)
+        stuck = asyncio.ensure_future(client.generate("hello"))
+        await asyncio.sleep(0.1)
+        assert len(client._tasks) == 1
+        await client.aclose(timeout=0.05)
+        with pytest.raises(HuggingFaceError, match="closed"):
+            await stuck
+        return sent, client._tasks
+
+    sent, tasks = asyncio.run(run())
+    assert sent == "hello!"
+    assert tasks == set()
@@ -0,0 +1,42 @@
+import threading
+import time
+
+import pytest
+
+from lazy_resource import LazyResource
+
+def test_loads_once_under_concurrent_first_use():
+    loads = []
+
+    def loader():
+        loads.append(1)
+        time.sleep(0.05)
+        return object()
+
+    resource = LazyResource('model', loader)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(resource.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert len({id(r) for r in results}) == 1
+    assert resource.status()['loaded']
+
+def test_failed_load_is_retried():
+    attempts = []
+
+    def loader():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("credentials not ready")
+        return "client"
+
+    resource = LazyResource('firestore', loader)
+    with pytest.raises(RuntimeError):
+        resource.get()
+    assert resource.status()['error'] == "credentials not ready"
+    assert resource.get() == "client"
+    assert resource.status()['error'] is None
@@ -0,0 +1,183 @@
+import asyncio
+import os
+import threading
+import time
+import uuid
+
+import pytest
+
+from memory_writer import MemoryWriter
+
+class FakeFirestore:
+    """Enough of the Firestore client for batched writes: client.batch() and collection.document()."""
+
+    def __init__(self, commit_delay=0.0, failures=0):
+        self.documents = {}
+        self.commits = []
+        self.commit_delay = commit_delay
+        self.failures = failures
+        self.gate = threading.Event()
+        self.gate.set()
+        self._lock = threading.Lock()
+
+    def collection(self, name):
+        return FakeCollection(name)
+
+    def batch(self):
+        return FakeBatch(self)
+
+class FakeCollection:
+    def __init__(self, name):
+        self.name = name
+
+    def document(self, document_id):
+        return (self.name, document_id)
+
+class FakeBatch:
+    def __init__(self, client):
+        self.client = client
+        self.writes = []
+
+    def set(self, reference, data):
+        self.writes.append((reference, dict(data)))
+
+    def commit(self):
+        self.client.gate.wait()
+        time.sleep(self.client.commit_delay)
+        with self.client._lock:
+            if self.client.failures:
+                self.client.failures -= 1
+                raise RuntimeError("deadline exceeded")
+            self.client.commits.append(len(self.writes))
+            self.client.documents.update(self.writes)
+
+def _writer(client, **kwargs):
+    return MemoryWriter(lambda: (client, client.collection("sasha_memory")), **kwargs)
+
+def test_turns_are_committed_in_batches_of_n():
+    client = FakeFirestore()
+    client.gate.clear()
+    writer = _writer(client, batch_size=10, flush_interval=5)
+    for i in range(25):
+        writer.submit_turn("s1", f"message {i}", f"reply {i}")
+    client.gate.set()
+
+    assert writer.flush()
+    assert client.commits == [10, 10, 5]
+    assert len(client.documents) == 25
+    assert all(doc["session_id"] == "s1" for doc in client.documents.values())
+    writer.close()
+
+def test_partial_batch_is_committed_after_the_interval():
+    client = FakeFirestore()
+    writer = _writer(client, batch_size=100, flush_interval=0.05)
+    writer.submit({"n": 1})
+    writer.submit({"n": 2})
+
+    deadline = time.monotonic() + 2
+    while not client.commits and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert client.commits == [2]
+    writer.close()
+
+def test_submit_does_not_wait_for_firestore():
+    client = FakeFirestore(commit_delay=0.05)
+    writer = _writer(client, batch_size=5, flush_interval=0.01)
+    started = time.perf_counter()
+    for i in range(50):
+        writer.submit({"n": i})
+    assert time.perf_counter() - started < 0.1
+    writer.close()
+    assert len(client.documents) == 50
+
+def test_failed_commits_are_retried_with_the_same_ids():
+    client = FakeFirestore(failures=2)
+    writer = _writer(client, flush_interval=0.01, retry_backoff=0.01)
+    ids = [writer.submit({"n": i}) for i in range(3)]
+    assert writer.flush()
+    assert sorted(doc_id for _, doc_id in client.documents) == sorted(ids)
+    assert writer.stats()["failed"] == 0
+    writer.close()
+
+def test_full_queue_applies_backpressure_then_drops():
+    client = FakeFirestore()
+    client.gate.clear()
+    writer = _writer(client, batch_size=1, flush_interval=0.01, max_queue=2, put_timeout=0.05)
+    writer.submit({"n": 0})  # Taken by the writer, which then blocks on the commit
+    time.sleep(0.05)
+    writer.submit({"n": 1})
+    writer.submit({"n": 2})
+
+    assert asyncio.run(writer.reserve()) is False
+    assert writer.submit({"n": 3}) is None
+    assert writer.stats()["dropped"] == 1
+
+    async def wait_then_release():
+        waiting = asyncio.ensure_future(writer.reserve())
+        await asyncio.sleep(0.01)
+        client.gate.set()
+        return await waiting
+
+    writer.put_timeout = 2
+    assert asyncio.run(wait_then_release()) is True
+    assert writer.stats()["throttled"] == 2
+    assert writer.submit({"n": 4}, reserved=True)
+    writer.close()
+    assert len(client.documents) == 4
+
+def test_reserved_slot_survives_other_submits():
+    client = FakeFirestore()
+    client.gate.clear()
+    writer = _writer(client, batch_size=1, flush_interval=0.01, max_queue=2, put_timeout=0.05)
+    writer.submit({"n": 0})
+    time.sleep(0.05)
+
+    # Admitted while there was room; turns that were not throttled fill the rest meanwhile
+    assert asyncio.run(writer.reserve()) is True
+    writer.submit({"n": 1})
+    assert writer.submit({"n": 2}) is None
+    assert writer.submit({"n": 3}, reserved=True)
+    assert writer.stats()["reserved"] == 0
+
+    assert asyncio.run(writer.reserve()) is False
+    client.gate.set()
+    writer.close()
+    assert sorted(doc["n"] for doc in client.documents.values()) == [0, 1, 3]
+
+def test_released_slot_can_be_reserved_again():
+    writer = _writer(FakeFirestore(), max_queue=1, put_timeout=0.01)
+    assert asyncio.run(writer.reserve()) is True
+    assert asyncio.run(writer.reserve()) is False
+    writer.release()
+    assert asyncio.run(writer.reserve()) is True
+    writer.close()
+
+def test_submit_after_close_is_dropped():
+    client = FakeFirestore()
+    writer = _writer(client)
+    assert asyncio.run(writer.reserve()) is True
+    assert writer.close()
+
+    assert writer.submit({"n": 1}) is None
+    assert writer.submit({"n": 2}, reserved=True) is None
+    assert asyncio.run(writer.reserve()) is False
+    assert writer.stats()["dropped"] == 2
+    assert client.documents == {}
+
+def test_close_commits_what_is_buffered():
+    client = FakeFirestore()
+    writer = _writer(client, batch_size=100, flush_interval=60)
+    for i in range(7):
+        writer.submit({"n": i})
+    assert writer.close()
+    assert client.commits == [7]
+
+@pytest.mark.skipif(not os.getenv("FIRESTORE_EMULATOR_HOST"), reason="needs a Firestore emulator")
+def test_against_the_firestore_emulator():
+    firestore = pytest.importorskip("google.cloud.firestore")
+    client = firestore.Client(project="sasha-test")
+    collection = client.collection(f"memory-writer-{uuid.uuid4().hex}")
+    writer = MemoryWriter(lambda: (client, collection), batch_size=3, flush_interval=0.05)
+    ids = [writer.submit_turn("s1", f"message {i}", f"reply {i}") for i in range(5)]
+    assert writer.close()
+    assert sorted(doc.id for doc in collection.stream()) == sorted(ids)
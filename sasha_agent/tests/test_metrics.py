@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from metrics import MetricsMiddleware, MetricsRegistry, ServiceMetrics, _Metric
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram('stage_seconds', 'Stage latency.', ['stage'], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        latency.observe(value, stage='gemini')
+
+    text = registry.render()
+    assert '# TYPE stage_seconds histogram' in text
+    assert 'stage_seconds_bucket{stage="gemini",le="0.1"} 1' in text
+    assert 'stage_seconds_bucket{stage="gemini",le="1"} 3' in text
+    assert 'stage_seconds_bucket{stage="gemini",le="+Inf"} 4' in text
+    assert 'stage_seconds_count{stage="gemini"} 4' in text
+    assert 'stage_seconds_sum{stage="gemini"} 4.05' in text
+
+def test_counter_labels_are_escaped():
+    registry = MetricsRegistry()
+    requests = registry.counter('requests_total', 'Requests.', ['endpoint'])
+    requests.inc(endpoint='say "hi"')
+    requests.inc(2, endpoint='say "hi"')
+
+    assert 'requests_total{endpoint="say \\"hi\\""} 3' in registry.render()
+
+def test_failing_callback_does_not_break_scrape(caplog):
+    registry = MetricsRegistry()
+    broken = {'now': True}
+
+    def collect():
+        if broken['now']:
+            raise ZeroDivisionError("no sessions yet")
+        return {(): 1}
+
+    registry.callback('broken', 'Broken.', 'gauge', collect)
+    registry.gauge('sessions', 'Sessions.').set(4)
+
+    with caplog.at_level('ERROR', logger='metrics'):
+        assert registry.render().endswith('sessions 4\n')
+        registry.render()
+    # Logged with its traceback once, not on every scrape
+    assert [record.exc_info[0] for record in caplog.records] == [ZeroDivisionError]
+    assert 'broken' in caplog.records[0].getMessage()
+
+    broken['now'] = False
+    assert 'broken 1' in registry.render()
+    broken['now'] = True
+    with caplog.at_level('ERROR', logger='metrics'):
+        registry.render()
+    assert len(caplog.records) == 2
+
+def test_stage_times_and_counts_errors():
+    metrics = ServiceMetrics()
+    with metrics.stage('prompt_build'):
+        pass
+    with pytest.raises(RuntimeError):
+        with metrics.stage('gemini'):
+            raise RuntimeError("quota")
+
+    assert metrics.stage_seconds.count(stage='prompt_build') == 1
+    assert metrics.stage_seconds.count(stage='gemini') == 1
+    assert metrics.stage_errors.value(stage='gemini') == 1
+    assert metrics.stage_errors.value(stage='prompt_build') == 0
+
+def test_middleware_tracks_streams_until_they_finish():
+    metrics = ServiceMetrics()
+    in_flight_during_body = []
+
+    async def chat_stream(scope, receive, send):
+        scope['endpoint'] = chat_stream
+        await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+        in_flight_during_body.append(metrics.in_flight.value())
+        await send({'type': 'http.response.body', 'body': b'data', 'more_body': False})
+
+    async def send(message):
+        pass
+
+    middleware = MetricsMiddleware(chat_stream, metrics)
+    asyncio.run(middleware({'type': 'http', 'path': '/chat/stream'}, None, send))
+
+    assert in_flight_during_body == [1]
+    assert metrics.in_flight.value() == 0
+    assert metrics.requests.value(endpoint='chat_stream', status=200) == 1
+    assert metrics.request_seconds.count(endpoint='chat_stream') == 1
+
+def test_metric_types_must_provide_samples():
+    class NoSamples(_Metric):
+        kind = "gauge"
+
+    with pytest.raises(TypeError, match="samples"):
+        NoSamples("sasha_broken", "Never renders.")
+
+def test_prompt_bytes_are_exported(service):
+    service.chats.stats.record(legacy_bytes=1000, new_bytes=100, request_bytes=1200, rebuilt=True)
+    service.chats.stats.record(legacy_bytes=1100, new_bytes=20, request_bytes=1250, rebuilt=False)
+
+    text = service.metrics.render()
+
+    assert 'sasha_prompt_bytes_total{prompt="legacy"} 2100' in text
+    assert 'sasha_prompt_bytes_total{prompt="rendered"} 120' in text
+    assert 'sasha_prompt_bytes_total{prompt="request"} 2450' in text
+    assert 'sasha_cache_lookups_total{cache="chat",result="hit"} 1' in text
+    prompt = service.get_cache_stats()['prompt']
+    assert prompt['turns'] == 2
+    assert prompt['avg_legacy_bytes'] == 1050 and prompt['avg_new_bytes'] == 60
@@ -0,0 +1,70 @@
+from prompt_history import HistoryBuilder, estimate_tokens
+
+def _messages(count, size=40):
+    return [
+        {'role': 'user' if i % 2 == 0 else 'assistant', 'content': f"{i:03d}" + "x" * size, 'timestamp': str(i)}
+        for i in range(count)
+    ]
+
+def test_history_is_trimmed_to_token_budget():
+    builder = HistoryBuilder(max_messages=100)
+    messages = _messages(20)
+    budget = estimate_tokens("User: 000" + "x" * 40) * 5
+
+    history, evicted = builder.build("s1", messages, budget)
+
+    lines = history.split("\n")
+    assert len(lines) == 5
+    assert lines[-1].startswith("Sasha: 019")
+    assert [m['content'][:3] for m in evicted] == [f"{i:03d}" for i in range(15)]
+
+def test_incremental_build_matches_full_render():
+    messages = _messages(30)
+    incremental = HistoryBuilder(max_messages=10)
+    for end in range(1, 31):
+        history, _ = incremental.build("s1", messages[:end], token_budget=10_000)
+
+    fresh, _ = HistoryBuilder(max_messages=10).build("s1", messages, token_budget=10_000)
+    assert history == fresh
+    assert len(history.split("\n")) == 10
+
+def test_token_counts_are_cached_per_message():
+    counted = []
+
+    def count_tokens(text):
+        counted.append(text)
+        return estimate_tokens(text)
+
+    builder = HistoryBuilder(count_tokens=count_tokens)
+    messages = _messages(5)
+    builder.build("s1", messages[:4], 10_000)
+    builder.build("s1", messages, 10_000)
+
+    assert len(counted) == 5
+
+def test_changed_history_is_rebuilt():
+    builder = HistoryBuilder()
+    builder.build("s1", _messages(4), 10_000)
+    history, _ = builder.build("s1", [{'role': 'user', 'content': "fresh start", 'timestamp': "x"}], 10_000)
+    assert history == "User: fresh start"
+
+def test_short_turn_after_long_turn_gets_history_back():
+    builder = HistoryBuilder(max_messages=100)
+    messages = _messages(20)
+    line_tokens = estimate_tokens("User: 000" + "x" * 40)
+
+    # A long message leaves room for two lines of history, the next short one for eight
+    history, evicted = builder.build("s1", messages[:19], line_tokens * 2)
+    assert len(history.split("\n")) == 2
+    assert len(evicted) == 17
+
+    history, evicted = builder.build("s1", messages, line_tokens * 8)
+    fresh, _ = HistoryBuilder(max_messages=100).build("s1", messages, line_tokens * 8)
+    assert history == fresh
+    assert len(history.split("\n")) == 8
+    assert evicted == []
+    assert builder.window_messages("s1") == messages[12:]
+
+    # Restored lines were already reported as evicted; trimming them again reports only new ones
+    _, evicted = builder.build("s1", messages, line_tokens * 2)
+    assert evicted == [messages[17]]
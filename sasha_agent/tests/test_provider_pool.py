@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+
+from provider_pool import ProviderExecutor
+
+REQUESTS = 16
+
+class FakeProvider:
+    """
+    A blocking model call that records how many calls run at once. The
+    first calls hold on until ``expected`` of them are running (or a second
+    passes), so the count does not depend on how quickly threads start.
+    """
+
+    def __init__(self, expected):
+        self.expected = expected
+        self.running = 0
+        self.max_running = 0
+        self.reached = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            if self.running >= self.expected:
+                self.reached.set()
+        try:
+            self.reached.wait(1.0)
+            time.sleep(0.001)
+            return prompt.upper()
+        finally:
+            with self._lock:
+                self.running -= 1
+
+def _max_concurrency(limit):
+    provider = FakeProvider(expected=limit)
+
+    async def run():
+        providers = ProviderExecutor(max_workers=16, limits={'gemini': limit})
+        results = await asyncio.gather(*[
+            providers.run('gemini', provider, f"prompt {i}")
+            for i in range(REQUESTS)
+        ])
+        providers.shutdown()
+        assert results[3] == "PROMPT 3"
+
+    asyncio.run(run())
+    return provider.max_running
+
+def test_concurrency_follows_the_provider_limit():
+    for limit in (1, 2, 4, 8):
+        assert _max_concurrency(limit) == limit
+
+def test_event_loop_stays_responsive_during_calls():
+    release = threading.Event()
+
+    async def run():
+        providers = ProviderExecutor(limits={'huggingface': 1})
+        call = asyncio.create_task(providers.run('huggingface', release.wait, 5))
+        # The loop keeps turning while the worker thread is blocked
+        for _ in range(20):
+            await asyncio.sleep(0)
+        blocked = not call.done()
+        release.set()
+        result = await call
+        providers.shutdown()
+        return blocked, result
+
+    assert asyncio.run(run()) == (True, True)
+
+def test_saturated_provider_does_not_block_others():
+    release = threading.Event()
+
+    async def run():
+        providers = ProviderExecutor(limits={'huggingface': 1, 'gemini': 2})
+        slow = [asyncio.create_task(providers.run('huggingface', release.wait, 5)) for _ in range(3)]
+        await asyncio.sleep(0)
+        reply = await asyncio.wait_for(providers.run('gemini', str.upper, "hi"), timeout=5)
+        waiting = sum(not task.done() for task in slow)
+        in_flight = providers.in_flight['huggingface']
+        release.set()
+        await asyncio.gather(*slow)
+        providers.shutdown()
+        return reply, waiting, in_flight
+
+    # Gemini answered while every Hugging Face call was still queued or running, one at a time
+    assert asyncio.run(run()) == ("HI", 3, 1)
@@ -0,0 +1,112 @@
+import asyncio
+import time
+
+import pytest
+
+from provider_router import CircuitBreaker, ProviderRouter, ProviderUnavailable, create_provider_router
+
+def _router(hedge=False, hedge_delay=None, gemini_timeout=1.0):
+    return ProviderRouter(
+        ['gemini', 'huggingface'],
+        {
+            'gemini': CircuitBreaker('gemini', min_calls=2, error_rate=0.5, cooldown_seconds=0.2),
+            'huggingface': CircuitBreaker('huggingface')
+        },
+        {'gemini': gemini_timeout, 'huggingface': 1.0},
+        hedge=hedge,
+        hedge_delay=hedge_delay
+    )
+
+def _reply(text, delay=0.0, error=None):
+    async def call():
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return text
+    return call
+
+def test_falls_back_when_primary_fails():
+    router = _router()
+    result = asyncio.run(router.call({
+        'gemini': _reply("", error=RuntimeError("quota")),
+        'huggingface': _reply("fallback")
+    }))
+    assert result == ('huggingface', "fallback")
+
+def test_open_circuit_skips_primary_without_waiting_for_timeout():
+    router = _router(gemini_timeout=0.1)
+    started = []
+    late = _reply("late", delay=5)
+
+    async def gemini():
+        started.append(1)
+        return await late()
+
+    calls = {'gemini': gemini, 'huggingface': _reply("fallback")}
+
+    async def run():
+        for _ in range(2):
+            await router.call(calls)
+        return await router.call(calls)
+
+    result = asyncio.run(run())
+    assert router.breakers['gemini'].state == 'open'
+    assert result == ('huggingface', "fallback")
+    # The third call went straight to the fallback
+    assert len(started) == 2
+
+def test_half_open_trial_closes_circuit_on_success():
+    breaker = CircuitBreaker('gemini', min_calls=1, cooldown_seconds=0.05)
+    breaker.record(False, 0.1)
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial at a time
+    breaker.record(True, 0.1)
+    assert breaker.state == 'closed'
+
+def test_slow_calls_open_the_circuit():
+    breaker = CircuitBreaker('gemini', min_calls=3, slow_call_seconds=1.0, slow_rate=0.6)
+    for latency in (2.0, 2.0, 0.1):
+        breaker.record(True, latency)
+    assert breaker.state == 'open'
+
+def test_hedge_returns_fallback_while_primary_hangs():
+    router = _router(hedge=True, hedge_delay=0.05, gemini_timeout=5.0)
+    cancelled = []
+
+    async def hanging_gemini():
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append('gemini')
+            raise
+
+    result = asyncio.run(router.call({'gemini': hanging_gemini, 'huggingface': _reply("fallback", delay=0.05)}))
+    assert result == ('huggingface', "fallback")
+    assert cancelled == ['gemini']
+    # The cancelled primary is not counted as a failure
+    assert len(router.breakers['gemini'].calls) == 0
+
+def test_hedge_delay_defaults_to_primary_p95():
+    router = _router(hedge=True)
+    for latency in [0.01] * 19 + [0.5]:
+        router.record('gemini', True, latency)
+    assert router._hedge_delay('gemini') == 0.5
+
+def test_all_failures_raise_provider_unavailable():
+    router = _router()
+    with pytest.raises(ProviderUnavailable):
+        asyncio.run(router.call({
+            'gemini': _reply("", error=RuntimeError("down")),
+            'huggingface': _reply("", error=RuntimeError("down too"))
+        }))
+
+def test_router_from_config():
+    router = create_provider_router({
+        'order': ['gemini', 'huggingface'],
+        'providers': {'gemini': {'timeout_seconds': 30, 'error_rate': 0.25}}
+    })
+    assert router.timeouts == {'gemini': 30, 'huggingface': None}
+    assert router.breakers['gemini'].error_rate == 0.25
@@ -0,0 +1,42 @@
+import time
+
+from response_cache import ResponseCache
+
+def _key(cache, message, history=(), mode="default", system_prompt="You are Sasha."):
+    return cache.make_key(mode, system_prompt, list(history), message)
+
+def test_key_normalizes_case_and_whitespace():
+    cache = ResponseCache()
+
+    assert _key(cache, "What can you do?") == _key(cache, "  what CAN you\n do? ")
+    assert _key(cache, "What can you do?") != _key(cache, "What can you do?", mode="code")
+    assert _key(cache, "What can you do?") != _key(cache, "What can you do?", system_prompt="Other")
+
+def test_key_only_covers_the_history_tail():
+    cache = ResponseCache(history_tail=2)
+    old = [{'role': 'user', 'content': f"old {i}"} for i in range(3)]
+    tail = [{'role': 'user', 'content': "hi"}, {'role': 'assistant', 'content': "Hello!"}]
+
+    assert _key(cache, "and then?", old + tail) == _key(cache, "and then?", tail)
+    assert _key(cache, "and then?", tail) != _key(cache, "and then?")
+
+def test_hits_misses_and_lru_eviction():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", "reply a")
+    cache.put("b", "reply b")
+    assert cache.get("a") == "reply a"
+    cache.put("c", "reply c")
+
+    assert cache.get("b") is None
+    assert cache.get("c") == "reply c"
+    assert cache.stats()['hits'] == 2
+    assert cache.stats()['misses'] == 1
+    assert cache.stats()['entries'] == 2
+
+def test_entries_expire():
+    cache = ResponseCache(ttl_seconds=0.05)
+    cache.put("a", "reply a")
+    time.sleep(0.1)
+
+    assert cache.get("a") is None
+    assert cache.stats()['entries'] == 0
@@ -0,0 +1,53 @@
+import time
+
+import pytest
+
+from safety_policy import SafetyPolicy, SafetyRule
+
+def test_whole_words_and_fragments():
+    policy = SafetyPolicy([
+        SafetyRule('drop', 'high'),
+        SafetyRule('rm -rf', 'critical'),
+        SafetyRule('passw', 'medium', whole_word=False)
+    ])
+
+    assert policy.classify("Please DROP the staging table").label == "unsafe"
+    assert policy.classify("Open the dropdown menu").label == "safe"
+    assert policy.classify("run rm -rf / now").severity == "critical"
+    assert [r.pattern for r in policy.classify("my Passwords file").matches] == ['passw']
+
+def test_overlapping_rules_report_the_longest_match():
+    policy = SafetyPolicy([SafetyRule('drop', 'high'), SafetyRule('drop table', 'critical')])
+
+    result = policy.classify("drop table users; then drop it")
+    assert [r.pattern for r in result.matches] == ['drop table', 'drop']
+    assert result.severity == "critical"
+
+def test_escalation_threshold_uses_most_severe_match():
+    policy = SafetyPolicy(
+        [SafetyRule('shutdown', 'medium'), SafetyRule('wipe', 'critical')],
+        escalate_severity='critical'
+    )
+
+    assert policy.classify("shutdown the laptop").label == "safe"
+    assert policy.classify("shutdown and wipe it").label == "unsafe"
+
+def test_config_defaults_and_validation():
+    policy = SafetyPolicy.from_config(None)
+    assert policy.classify("delete my account").escalate
+    assert not policy.classify("tell me a joke").escalate
+
+    with pytest.raises(ValueError):
+        SafetyRule('wipe', 'severe')
+
+def test_large_rule_sets_stay_fast():
+    rules = [SafetyRule(f'forbidden{i}', 'high') for i in range(5000)]
+    policy = SafetyPolicy(rules + [SafetyRule('destroy', 'high')])
+    text = "a perfectly ordinary sentence about the weather " * 200 + "destroy"
+
+    started = time.perf_counter()
+    result = policy.classify(text)
+    elapsed = time.perf_counter() - started
+
+    assert [r.pattern for r in result.matches] == ['destroy']
+    assert elapsed < 0.1
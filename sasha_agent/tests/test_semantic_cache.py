@@ -0,0 +1,55 @@
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from semantic_cache import SemanticCache
+
+def _vector(*values):
+    return np.array(values + (0.0,) * (4 - len(values)), dtype=np.float32)
+
+def test_similar_questions_hit_above_threshold():
+    cache = SemanticCache(dim=4, threshold=0.9)
+    cache.add("default", "what can you do?", _vector(1.0, 0.1), "I can help with code.")
+
+    assert cache.lookup("default", "what are you able to do?", _vector(1.0, 0.2)) == "I can help with code."
+    assert cache.lookup("default", "tell me a joke", _vector(0.1, 1.0)) is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (1, 1)
+    assert cache.recent_hits[0]['matched'] == "what can you do?"
+    assert cache.recent_hits[0]['similarity'] > 0.9
+
+def test_partitions_do_not_share_answers():
+    cache = SemanticCache(dim=4)
+    cache.add("mode=code", "what can you do?", _vector(1.0), "I write code.")
+
+    assert cache.lookup("mode=devops", "what can you do?", _vector(1.0)) is None
+    assert cache.lookup("mode=code", "what can you do?", _vector(1.0)) == "I write code."
+
+def test_best_match_wins():
+    cache = SemanticCache(dim=4, threshold=0.5)
+    cache.add("p", "close", _vector(1.0, 0.5), "close answer")
+    cache.add("p", "closest", _vector(1.0, 0.1), "closest answer")
+
+    assert cache.lookup("p", "q", _vector(1.0)) == "closest answer"
+
+def test_least_recently_used_entry_is_replaced():
+    cache = SemanticCache(dim=4, max_entries=2)
+    cache.add("p", "a", _vector(1.0), "answer a")
+    cache.add("p", "b", _vector(0.0, 1.0), "answer b")
+    assert cache.lookup("p", "a", _vector(1.0)) == "answer a"
+    cache.add("p", "c", _vector(0.0, 0.0, 1.0), "answer c")
+
+    assert cache.lookup("p", "b", _vector(0.0, 1.0)) is None
+    assert cache.lookup("p", "a", _vector(1.0)) == "answer a"
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['entries'] == 2
+
+def test_entries_expire():
+    cache = SemanticCache(dim=4, ttl_seconds=0.05)
+    cache.add("p", "a", _vector(1.0), "answer a")
+    time.sleep(0.1)
+
+    assert cache.lookup("p", "a", _vector(1.0)) is None
+    assert cache.stats()['entries'] == 0
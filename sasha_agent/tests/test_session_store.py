@@ -0,0 +1,120 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from session_store import MemorySessionStore, SQLiteSessionStore, SessionStore, create_session_store
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        store = MemorySessionStore(max_messages=3, ttl_seconds=60)
+    else:
+        store = SQLiteSessionStore(str(tmp_path / "sessions.db"), max_messages=3, ttl_seconds=60)
+    yield store
+    store.close()
+
+def test_messages_are_capped_on_write(store):
+    for i in range(5):
+        evicted = store.append_message("s1", 'user', f"message {i}")
+
+    assert [m['content'] for m in store.get_messages("s1")] == ["message 2", "message 3", "message 4"]
+    assert [m['content'] for m in evicted] == ["message 1"]
+
+def test_preferences_and_delete(store):
+    store.set_preferences("s1", {'tone': 'casual'})
+    store.append_message("s1", 'user', "hi")
+    assert store.get_preferences("s1") == {'tone': 'casual'}
+
+    store.delete("s1")
+    assert store.get_messages("s1") == []
+    assert store.get_preferences("s1") == {}
+
+def test_idle_sessions_expire(store):
+    store.ttl_seconds = 0.05
+    store.append_message("s1", 'user', "hi")
+    time.sleep(0.1)
+    assert store.get_messages("s1") == []
+
+def test_memory_store_evicts_least_recently_used_session():
+    store = MemorySessionStore(max_sessions=2)
+    store.append_message("a", 'user', "hi")
+    store.append_message("b", 'user', "hi")
+    store.get_messages("a")
+    store.append_message("c", 'user', "hi")
+
+    assert store.get_messages("b") == []
+    assert store.session_count() == 2
+
+def test_sqlite_sessions_are_visible_to_other_workers(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    worker_a = SQLiteSessionStore(path)
+    worker_b = SQLiteSessionStore(path)
+
+    worker_a.append_message("s1", 'user', "hello from worker a")
+    worker_a.set_preferences("s1", {'detail_level': 'concise'})
+
+    assert worker_b.get_messages("s1")[0]['content'] == "hello from worker a"
+    assert worker_b.get_preferences("s1") == {'detail_level': 'concise'}
+
+def test_factory_uses_conversation_config(tmp_path):
+    store = create_session_store(
+        {'max_history': 7, 'store': {'backend': 'sqlite', 'path': 'sessions.db'}},
+        base_dir=str(tmp_path)
+    )
+    assert isinstance(store, SQLiteSessionStore)
+    assert store.max_messages == 7
+    assert (tmp_path / "sessions.db").exists()
+
+def test_summary_is_stored_with_the_session(store):
+    store.append_message("s1", 'user', "hi")
+    store.set_summary("s1", {'text': "User said hi", 'through': "t1"})
+    assert store.get_summary("s1") == {'text': "User said hi", 'through': "t1"}
+
+    store.delete("s1")
+    assert store.get_summary("s1") == {}
+
+def test_backends_must_implement_the_whole_interface():
+    class Partial(SessionStore):
+        def get_messages(self, session_id):
+            return []
+
+    with pytest.raises(TypeError, match="append_message"):
+        Partial()
+
+class ThreadRecordingStore:
+    """Delegates to ``store`` and records which thread each call ran on."""
+
+    def __init__(self, store):
+        self.store = store
+        self.calls = []
+
+    def __getattr__(self, name):
+        method = getattr(self.store, name)
+
+        def call(*args, **kwargs):
+            self.calls.append((name, threading.current_thread()))
+            return method(*args, **kwargs)
+        return call
+
+def test_turns_do_not_touch_the_store_on_the_event_loop(service):
+    store = ThreadRecordingStore(service.sessions)
+    service.sessions = store
+
+    async def fake_gemini(session_id, message, turn):
+        return "reply"
+
+    service._call_gemini = fake_gemini
+
+    async def run():
+        loop_thread = threading.current_thread()
+        await service.generate_response("be brief", "s1")
+        await service.clear_conversation("s1")
+        return loop_thread
+
+    loop_thread = asyncio.run(run())
+    names = {name for name, _ in store.calls}
+    assert {'get_preferences', 'set_preferences', 'get_summary', 'get_messages',
+            'append_message', 'delete'} <= names
+    assert [name for name, thread in store.calls if thread is loop_thread] == []
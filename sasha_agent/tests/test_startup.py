@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+class FakeGemini:
+    """``count_tokens`` fails while ``down`` is set."""
+
+    def __init__(self, down=False):
+        self.down = down
+        self.calls = 0
+
+    def count_tokens(self, text):
+        self.calls += 1
+        if self.down:
+            raise ConnectionError("Gemini unreachable")
+        return 1
+
+@pytest.fixture
+def startup_service(service):
+    service.config['startup']['primary_check_attempts'] = 1
+    service.config['startup']['primary_recheck_seconds'] = 0.01
+    # The deferred clients need credentials; stand in for them so warm_up can finish
+    for resource in (service._hf_model, service.tts.client_resource,
+                     service._memory_collection, service._assets_bucket):
+        resource.loader = object
+    return service
+
+def test_ready_after_warm_up(startup_service):
+    startup_service.gemini_model = FakeGemini()
+    assert not startup_service.is_ready()
+
+    asyncio.run(startup_service.warm_up())
+
+    status = startup_service.get_startup_status()
+    assert status['ready'] and status['primary_checked']
+    assert all(backend['loaded'] for backend in status['backends'].values())
+
+def test_not_ready_until_gemini_answers(startup_service):
+    gemini = FakeGemini(down=True)
+    startup_service.gemini_model = gemini
+
+    async def run():
+        await startup_service.warm_up()
+        warmed = (startup_service.is_ready(), startup_service.tts.client_resource.loaded)
+        # Rechecked in the background until it answers
+        while gemini.calls < 3:
+            await asyncio.sleep(0.01)
+        still_down = startup_service.is_ready()
+        gemini.down = False
+        await asyncio.wait_for(startup_service._primary_recheck, timeout=5)
+        return warmed, still_down
+
+    (ready_after_warm_up, tts_loaded), ready_while_down = asyncio.run(run())
+    assert not ready_after_warm_up and not ready_while_down
+    # The other backends were still warmed while Gemini was down
+    assert tts_loaded
+    assert startup_service.is_ready()
+
+@pytest.fixture
+def client(startup_service, monkeypatch):
+    pytest.importorskip("fastapi")
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+    import api
+
+    monkeypatch.setattr(api, "ai_service", startup_service)
+    # Without the context manager the startup event does not run; the tests warm up themselves
+    return TestClient(api.app)
+
+def test_live_before_ready(startup_service, client):
+    gemini = FakeGemini(down=True)
+    startup_service.gemini_model = gemini
+
+    assert client.get('/health/live').status_code == 200
+    response = client.get('/health/ready')
+    assert response.status_code == 503
+    assert response.json()['status'] == "starting"
+
+    async def run():
+        await startup_service.warm_up()
+        unready = client.get('/health/ready').status_code
+        gemini.down = False
+        await asyncio.wait_for(startup_service._primary_recheck, timeout=5)
+        return unready
+
+    assert asyncio.run(run()) == 503
+    response = client.get('/health/ready')
+    assert response.status_code == 200
+    assert response.json()['ready'] is True
+    assert client.get('/health/live').status_code == 200
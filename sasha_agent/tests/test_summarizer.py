@@ -0,0 +1,77 @@
+import asyncio
+
+from session_store import MemorySessionStore
+from summarizer import RollingSummarizer
+
+def _turn(store, session_id, role, content):
+    store.append_message(session_id, role, content)
+    return store.get_messages(session_id)[-1]
+
+class StubModel:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.prompts = []
+
+    async def __call__(self, prompt):
+        self.prompts.append(prompt)
+        await asyncio.sleep(self.delay)
+        return f"summary #{len(self.prompts)}"
+
+def test_evicted_turns_are_summarized_in_the_background():
+    async def run():
+        store = MemorySessionStore()
+        model = StubModel(delay=0.05)
+        summarizer = RollingSummarizer(store, model)
+        evicted = [_turn(store, "s1", 'user', "my name is Mike"), _turn(store, "s1", 'assistant', "Hello Mike")]
+
+        summarizer.submit("s1", evicted)
+        assert store.get_summary("s1") == {}  # submit does not wait for the model
+
+        await summarizer.drain()
+        await summarizer.stop()
+        return store, model
+
+    store, model = asyncio.run(run())
+    assert store.get_summary("s1")['text'] == "summary #1"
+    assert "User: my name is Mike" in model.prompts[0]
+    assert "Sasha: Hello Mike" in model.prompts[0]
+
+def test_running_summary_is_carried_forward_once_per_turn():
+    async def run():
+        store = MemorySessionStore()
+        model = StubModel()
+        summarizer = RollingSummarizer(store, model)
+        first = _turn(store, "s1", 'user', "first")
+        summarizer.submit("s1", [first])
+        await summarizer.drain()
+
+        second = _turn(store, "s1", 'user', "second")
+        summarizer.submit("s1", [first, second])
+        await summarizer.drain()
+        await summarizer.stop()
+        return model
+
+    model = asyncio.run(run())
+    assert len(model.prompts) == 2
+    assert "summary #1" in model.prompts[1]
+    assert "User: first" not in model.prompts[1]
+    assert "User: second" in model.prompts[1]
+
+def test_model_failure_does_not_stop_the_worker():
+    async def flaky(prompt):
+        if "boom" in prompt:
+            raise RuntimeError("model down")
+        return "ok"
+
+    async def run():
+        store = MemorySessionStore()
+        summarizer = RollingSummarizer(store, flaky)
+        summarizer.submit("s1", [_turn(store, "s1", 'user', "boom")])
+        summarizer.submit("s2", [_turn(store, "s2", 'user', "fine")])
+        await summarizer.drain()
+        await summarizer.stop()
+        return store
+
+    store = asyncio.run(run())
+    assert store.get_summary("s1") == {}
+    assert store.get_summary("s2")['text'] == "ok"
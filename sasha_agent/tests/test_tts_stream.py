@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+import pytest
+
+from tts_stream import split_sentences, synthesize_stream
+
+def test_split_at_sentence_boundaries():
+    text = "Hello King, how was your day? I handled the deploy. The build is green again!"
+    assert split_sentences(text) == [
+        "Hello King, how was your day?",
+        "I handled the deploy.",
+        "The build is green again!"
+    ]
+
+def test_abbreviations_and_quotes_stay_in_their_sentence():
+    text = 'Use a cache, e.g. the audio cache. She said "done." Then it shipped.'
+    assert split_sentences(text, min_chars=1) == [
+        "Use a cache, e.g. the audio cache.",
+        'She said "done."',
+        "Then it shipped."
+    ]
+
+def test_short_sentences_are_joined_and_long_ones_split():
+    assert split_sentences("Okay. Sure. Here is the full plan for today.", min_chars=20) == [
+        "Okay. Sure. Here is the full plan for today."
+    ]
+    long = "First part of a long sentence, second part of it; and a very long tail " * 4
+    chunks = split_sentences(long, max_chars=80)
+    assert all(len(chunk) <= 80 for chunk in chunks)
+    assert " ".join(chunks).split() == long.split()
+
+def test_trailing_fragment_without_punctuation_is_kept():
+    assert split_sentences("All done. and one more") == ["All done. and one more"]
+    assert split_sentences("All done here. ok") == ["All done here. ok"]
+    assert split_sentences("   ") == []
+
+def test_stream_yields_in_order_and_starts_before_the_whole_reply():
+    delays = {"one": 0.05, "two": 0.01, "three": 0.02, "four": 0.01}
+    started = []
+
+    async def synthesize(chunk):
+        started.append(chunk)
+        await asyncio.sleep(delays[chunk])
+        return chunk.encode()
+
+    async def run():
+        begin = time.monotonic()
+        received = []
+        first_at = None
+        async for audio in synthesize_stream(list(delays), synthesize, lookahead=2):
+            if first_at is None:
+                first_at = time.monotonic() - begin
+                # Only the lookahead window has been requested so far
+                assert started == ["one", "two"]
+            received.append(audio)
+        return received, first_at
+
+    received, first_at = asyncio.run(run())
+    assert received == [b"one", b"two", b"three", b"four"]
+    assert first_at < 0.09
+
+def test_closing_the_stream_cancels_pending_chunks():
+    cancelled = []
+
+    async def synthesize(chunk):
+        try:
+            await asyncio.sleep(0 if chunk == "a" else 1)
+        except asyncio.CancelledError:
+            cancelled.append(chunk)
+            raise
+        return chunk.encode()
+
+    async def run():
+        stream = synthesize_stream(["a", "b", "c"], synthesize, lookahead=3)
+        assert await stream.__anext__() == b"a"
+        await stream.aclose()
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert sorted(cancelled) == ["b", "c"]
+
+def test_errors_propagate():
+    async def synthesize(chunk):
+        raise RuntimeError("tts unavailable")
+
+    async def run():
+        return [audio async for audio in synthesize_stream(["a"], synthesize)]
+
+    with pytest.raises(RuntimeError, match="unavailable"):
+        asyncio.run(run())
@@ -0,0 +1,112 @@
+import asyncio
+import threading
+
+import pytest
+
+from audio_store import AudioStore
+from voice_jobs import VoiceJobQueue, VoiceQueueFull
+
+async def _wait_for(queue, job_id):
+    async def finished():
+        while queue.get(job_id)['status'] in ('queued', 'running'):
+            await asyncio.sleep(0.01)
+        return queue.get(job_id)
+    # The timeout only stops a hung test
+    return await asyncio.wait_for(finished(), timeout=5)
+
+class GatedSynthesizer:
+    """Stores the text as audio, but only once ``release`` is set."""
+
+    def __init__(self, store):
+        self.store = store
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, text):
+        self.started.set()
+        self.release.wait(5)
+        return self.store.put(text.encode())
+
+def test_submit_returns_before_synthesis_finishes():
+    store = AudioStore()
+    synthesize = GatedSynthesizer(store)
+
+    async def run():
+        queue = VoiceJobQueue(synthesize, workers=1)
+        job_id = queue.submit("Hello King")
+        # submit returned while nothing has been synthesized
+        queued = queue.get(job_id)['status']
+        await asyncio.to_thread(synthesize.started.wait, 5)
+        running = queue.get(job_id)['status']
+        synthesize.release.set()
+        job = await _wait_for(queue, job_id)
+        await queue.stop()
+        return queued, running, job
+
+    queued, running, job = asyncio.run(run())
+    assert (queued, running) == ('queued', 'running')
+    assert job['status'] == 'done'
+    # The job only points at the audio, which the store holds and bounds
+    assert set(job['artifact']) == {'id', 'url', 'bytes', 'expires_at'}
+    assert store.get(job['artifact']['id']).data == b"Hello King"
+    assert store.stats()['memory_bytes'] == len(b"Hello King")
+
+def test_failed_synthesis_is_reported():
+    def broken_synthesize(text):
+        raise RuntimeError("tts unavailable")
+
+    async def run():
+        queue = VoiceJobQueue(broken_synthesize, workers=1)
+        job = await _wait_for(queue, queue.submit("Hello"))
+        await queue.stop()
+        return job
+
+    job = asyncio.run(run())
+    assert job['status'] == 'failed'
+    assert "tts unavailable" in job['error']
+
+def test_backlog_is_bounded():
+    synthesize = GatedSynthesizer(AudioStore())
+
+    async def run():
+        queue = VoiceJobQueue(synthesize, workers=1, max_pending=1)
+        first = queue.submit("first")
+        # The worker holds the first job, so the backlog has room for exactly one more
+        await asyncio.to_thread(synthesize.started.wait, 5)
+        second = queue.submit("second")
+        with pytest.raises(VoiceQueueFull):
+            queue.submit("third")
+        statuses = [queue.get(first)['status'], queue.get(second)['status']]
+        synthesize.release.set()
+        jobs = [await _wait_for(queue, first), await _wait_for(queue, second)]
+        await queue.stop()
+        return statuses, jobs
+
+    statuses, jobs = asyncio.run(run())
+    assert statuses == ['running', 'queued']
+    assert [job['status'] for job in jobs] == ['done', 'done']
+
+def test_voice_endpoint_serves_audio_from_the_store(service, monkeypatch):
+    pytest.importorskip("fastapi")
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+    import api
+
+    monkeypatch.setattr(api, "ai_service", service)
+    service.tts.synthesize = lambda text: text.encode()
+
+    async def run():
+        job = await _wait_for(service.voice_queue, service.voice_queue.submit("Hello King"))
+        await service.voice_queue.stop()
+        return job
+
+    job = asyncio.run(run())
+    client = TestClient(api.app)
+
+    response = client.get(f"/voice/{job['id']}")
+    assert response.status_code == 200
+    assert response.content == b"Hello King"
+    assert response.headers['content-type'] == "audio/mpeg"
+
+    service.audio_store.delete(job['artifact']['id'])
+    assert client.get(f"/voice/{job['id']}").status_code == 410
@@ -0,0 +1,90 @@
+import asyncio
+import itertools
+import re
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Deque, Iterable, List
+
+# Google TTS rejects inputs over 5000 bytes; chunks stay well under that
+DEFAULT_MAX_CHARS = 400
+DEFAULT_MIN_CHARS = 20
+
+# Sentence-ending punctuation plus any closing quotes or brackets, followed by whitespace
+_SENTENCE_END = re.compile(r'[.!?…]+["\'”’)\]]*(?=\s)')
+_SOFT_BREAK = re.compile(r'[,;:—]\s')
+
+def _split_long(sentence: str, max_chars: int) -> List[str]:
+    parts = []
+    while len(sentence) > max_chars:
+        window = sentence[:max_chars]
+        breaks = [m.end() for m in _SOFT_BREAK.finditer(window)]
+        cut = breaks[-1] if breaks else window.rfind(' ') + 1
+        if cut <= 0:
+            cut = max_chars
+        parts.append(sentence[:cut].strip())
+        sentence = sentence[cut:].lstrip()
+    if sentence:
+        parts.append(sentence)
+    return parts
+
+def split_sentences(text: str, max_chars: int = DEFAULT_MAX_CHARS,
+                    min_chars: int = DEFAULT_MIN_CHARS) -> List[str]:
+    """
+    Split ``text`` into chunks for synthesis, at sentence boundaries.
+
+    A full stop followed by a lowercase letter ("e.g. this") does not end
+    a sentence. Sentences shorter than ``min_chars`` are joined to the
+    next one so each TTS request carries enough speech to be worth the
+    round trip; sentences longer than ``max_chars`` are split at the last
+    comma, semicolon or space that fits.
+    """
+    sentences = []
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        rest = text[match.end():].lstrip()
+        if rest and rest[0].islower():
+            continue
+        sentences.append(text[start:match.end()].strip())
+        start = match.end()
+    sentences.append(text[start:].strip())
+
+    chunks: List[str] = []
+    pending = ""
+    for sentence in filter(None, sentences):
+        pending = f"{pending} {sentence}" if pending else sentence
+        if len(pending) >= min_chars:
+            chunks.extend(_split_long(pending, max_chars))
+            pending = ""
+    if pending:
+        if chunks and len(chunks[-1]) + len(pending) < max_chars:
+            chunks[-1] = f"{chunks[-1]} {pending}"
+        else:
+            chunks.append(pending)
+    return chunks
+
+async def synthesize_stream(chunks: Iterable[str], synthesize: Callable[[str], Awaitable[bytes]],
+                            lookahead: int = 3) -> AsyncIterator[bytes]:
+    """
+    Yield the audio for each chunk, in order, as soon as it is ready.
+
+    Up to ``lookahead`` chunks are synthesized at once, starting with the
+    first, so its audio arrives after one TTS round trip and later chunks
+    are usually ready by the time the earlier ones have been sent. Closing
+    the generator cancels the outstanding requests.
+    """
+    remaining = iter(chunks)
+    tasks: Deque[asyncio.Future] = deque()
+
+    def schedule(count: int):
+        for chunk in itertools.islice(remaining, count):
+            tasks.append(asyncio.ensure_future(synthesize(chunk)))
+
+    schedule(max(1, lookahead))
+    try:
+        while tasks:
+            audio = await tasks[0]
+            tasks.popleft()
+            schedule(1)
+            yield audio
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,80 @@
+"""
+Copy the modules shared with the other Sasha deployables into their trees.
+
+"sasha code" is built from its own directory (the Docker context) and
+agent-zero is packaged from its own by PyInstaller, so neither can import
+from sasha_agent. The modules in VENDORED are maintained here and copied
+there with a header naming the original. Edit the original, then run:
+
+    python vendor_shared.py          # rewrite the copies
+    python vendor_shared.py --check  # exit 1 if a copy is out of date
+
+tests/test_vendored_copies.py runs the check with the rest of the suite.
+"""
+import argparse
+import os
+import sys
+from typing import Dict, List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(HERE)
+
+# Original, relative to sasha_agent -> copies, relative to the repository root
+VENDORED: Dict[str, List[str]] = {
+    'audio_cache.py': ['agent-zero/audio_cache.py'],
+    'audio_store.py': ['sasha_agent/sasha code/agent/audio_store.py'],
+    'graph_registry.py': ['sasha_agent/sasha code/agent/graph_registry.py'],
+    'safety_policy.py': ['sasha_agent/sasha code/agent/safety_policy.py'],
+    'tts_stream.py': ['sasha_agent/sasha code/agent/tts_stream.py'],
+}
+
+HEADER = (
+    "# Vendored from sasha_agent/{source}; do not edit this copy.\n"
+    "# Change the original and run `python vendor_shared.py` in sasha_agent.\n"
+)
+
+def expected_copy(source: str) -> str:
+    with open(os.path.join(HERE, source), encoding='utf-8') as f:
+        return HEADER.format(source=source) + f.read()
+
+def stale_copies() -> List[str]:
+    """Copies whose content differs from their original, as repository-relative paths."""
+    stale = []
+    for source, targets in VENDORED.items():
+        expected = expected_copy(source)
+        for target in targets:
+            try:
+                with open(os.path.join(REPO, target), encoding='utf-8') as f:
+                    current = f.read()
+            except FileNotFoundError:
+                current = None
+            if current != expected:
+                stale.append(target)
+    return stale
+
+def write_copies() -> List[str]:
+    stale = set(stale_copies())
+    written = []
+    for source, targets in VENDORED.items():
+        for target in targets:
+            if target in stale:
+                with open(os.path.join(REPO, target), 'w', encoding='utf-8', newline='\n') as f:
+                    f.write(expected_copy(source))
+                written.append(target)
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--check', action='store_true', help="only report copies that are out of date")
+    args = parser.parse_args()
+
+    if args.check:
+        stale = stale_copies()
+        for target in stale:
+            print(f"out of date: {target}")
+        sys.exit(1 if stale else 0)
+    for target in write_copies():
+        print(f"updated {target}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from audio_store import AudioArtifact
+from provider_pool import ProviderExecutor
+
+logger = logging.getLogger(__name__)
+
+class VoiceQueueFull(Exception):
+    """Raised when the synthesis backlog is at capacity."""
+
+class VoiceJobQueue:
+    """
+    Background text-to-speech synthesis with a bounded worker pool.
+
+    Jobs are submitted from the request path and synthesized by a fixed
+    number of asyncio workers, each running the blocking ``synthesize``
+    call in a thread (through ``executor``'s ``tts`` limit when given).
+    ``synthesize`` stores the audio (in an ``AudioStore``, which bounds it
+    by bytes and expires it) and returns the artifact; jobs only keep its
+    id and URL. Finished jobs are kept for polling until ``max_jobs`` is
+    exceeded, oldest first.
+    """
+
+    def __init__(self, synthesize: Callable[[str], AudioArtifact], workers: int = 2,
+                 max_pending: int = 100, max_jobs: int = 500,
+                 executor: Optional[ProviderExecutor] = None):
+        self.synthesize = synthesize
+        self.executor = executor
+        self.worker_count = workers
+        self.max_pending = max_pending
+        self.max_jobs = max_jobs
+        self.jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    def _ensure_started(self):
+        # Workers are started lazily so the queue can be built before the event loop exists
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"voice-worker-{i}")
+            for i in range(self.worker_count)
+        ]
+        logger.info(f"Started {self.worker_count} voice synthesis workers")
+
+    def submit(self, text: str) -> str:
+        self._ensure_started()
+        job_id = str(uuid.uuid4())
+        try:
+            self._queue.put_nowait(job_id)
+        except asyncio.QueueFull:
+            raise VoiceQueueFull(f"Voice synthesis backlog is full ({self.max_pending} jobs)")
+
+        self.jobs[job_id] = {
+            'id': job_id,
+            'status': 'queued',
+            'text': text,
+            'artifact': None,
+            'error': None,
+            'created_at': datetime.utcnow().isoformat()
+        }
+        self._evict_finished()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        return self.jobs.get(job_id)
+
+    def _evict_finished(self):
+        if len(self.jobs) <= self.max_jobs:
+            return
+        for job_id in list(self.jobs):
+            if len(self.jobs) <= self.max_jobs:
+                break
+            if self.jobs[job_id]['status'] in ('done', 'failed'):
+                del self.jobs[job_id]
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            job = self.jobs.get(job_id)
+            try:
+                if job is None:
+                    continue
+                job['status'] = 'running'
+                if self.executor is not None:
+                    artifact = await self.executor.run('tts', self.synthesize, job['text'])
+                else:
+                    artifact = await asyncio.to_thread(self.synthesize, job['text'])
+                job['artifact'] = artifact.to_dict()
+                job['status'] = 'done'
+            except Exception as e:
+                logger.error(f"Voice synthesis failed for job {job_id}: {str(e)}")
+                job['status'] = 'failed'
+                job['error'] = str(e)
+            finally:
+                if job is not None:
+                    job['completed_at'] = datetime.utcnow().isoformat()
+                self._queue.task_done()
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None